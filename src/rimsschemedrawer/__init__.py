@@ -1,6 +1,39 @@
 # Init package
 
+import importlib
+
 from rimsschemedrawer.json_parser import json_reader, ConfigParser
-from rimsschemedrawer.plotter import Plotter
 
 __all__ = ["ConfigParser", "json_reader", "Plotter"]
+
+# Submodules that are only imported when accessed, e.g., to not load matplotlib
+# when only parsing schemes.
+_LAZY_SUBMODULES = [
+    "app",
+    "cache",
+    "cli",
+    "gui",
+    "ip_table",
+    "layout",
+    "nist",
+    "plotter",
+    "scheme_batch",
+    "svg",
+    "tikz",
+]
+
+
+def __getattr__(name: str):
+    """Import the plotter and the submodules on first access."""
+    if name == "Plotter":
+        from rimsschemedrawer.plotter import Plotter
+
+        return Plotter
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    """List the lazily imported attributes as well."""
+    return sorted(list(globals()) + ["Plotter"] + _LAZY_SUBMODULES)
@@ -0,0 +1,6 @@
+"""Allow running the package with `python -m rimsschemedrawer`."""
+
+from rimsschemedrawer.app import run_gui
+
+if __name__ == "__main__":
+    run_gui()
@@ -1,19 +1,29 @@
-"""Entry point for the GUI."""
+"""Entry point for the GUI and the command line interface."""
 
 import sys
 
-try:
-    from qtpy import QtWidgets
-except ImportError as e:
-    raise ImportError(
-        "No GUI environment found. Please install rimsschemedrawer with option [gui]."
-    ) from e
-
-from rimsschemedrawer.gui import SchemeDrawer
+from rimsschemedrawer import cli
 
 
 def run_gui():
-    """Launch the GUI."""
+    """Launch the GUI.
+
+    If a command line subcommand is given, e.g., `rimsschemedrawer render`,
+    the command line interface is run instead and no GUI environment is required.
+    """
+    if len(sys.argv) > 1 and sys.argv[1] in cli.COMMANDS:
+        sys.exit(cli.main())
+
+    try:
+        from qtpy import QtWidgets
+    except ImportError as e:
+        raise ImportError(
+            "No GUI environment found. Please install rimsschemedrawer with option "
+            "[gui]."
+        ) from e
+
+    from rimsschemedrawer.gui import SchemeDrawer
+
     application = QtWidgets.QApplication(sys.argv)
     window = SchemeDrawer()
     window.show()
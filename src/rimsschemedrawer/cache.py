@@ -0,0 +1,220 @@
+"""On-disk cache for rendered scheme figures."""
+
+import hashlib
+import importlib.metadata
+import io
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from rimsschemedrawer.json_parser import ConfigParser
+
+DEFAULT_CACHE_SIZE = 512 * 1024**2  # 512 MiB
+
+# ConfigParser properties that determine what the figure looks like
+_CANONICAL_PROPERTIES = [
+    "element",
+    "gs_level",
+    "gs_term_no_formatting",
+    "ip_level",
+    "ip_term_no_formatting",
+    "is_low_lying",
+    "last_step_to_ip_mode",
+    "step_levels",
+    "step_forbidden",
+    "step_nm",
+    "step_terms_no_formatting",
+    "transition_strengths",
+    "sett_arrow_fmt",
+    "sett_fig_size",
+    "sett_fontsize",
+    "sett_headspace",
+    "sett_ip_label_pos",
+    "sett_line_breaks",
+    "sett_prec",
+    "sett_plot_style",
+    "sett_shows",
+    "sett_title",
+]
+
+
+class RenderCache:
+    """Size-bounded on-disk cache of rendered figures with LRU eviction.
+
+    Figures are keyed by a hash of the scheme after normalization by the
+    `ConfigParser`, the package and matplotlib versions, the output format,
+    the resolution, and the keyword arguments passed to the `Plotter`. Equivalent
+    schemes, e.g., with levels given as `"0"` or `"0.0"`, share the same entry.
+
+    Whenever an entry is read, its modification time is updated. If the cache grows
+    larger than its maximum size, the least recently used entries are removed.
+    """
+
+    def __init__(self, path: Union[str, Path], max_size: int = DEFAULT_CACHE_SIZE):
+        """Initialize the cache.
+
+        :param path: Folder to store the cached figures in, created if necessary.
+        :param max_size: Maximum size of the cache in bytes.
+        """
+        self.path = Path(path).expanduser()
+        self.max_size = max_size
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def size(self) -> int:
+        """Get the current size of all cached figures in bytes."""
+        return sum(it.stat().st_size for it in self._entries())
+
+    def clear(self):
+        """Remove all cached figures."""
+        for entry in self._entries():
+            entry.unlink()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a cached figure and mark it as recently used.
+
+        :param key: Key of the figure, see `RenderCache.key`.
+
+        :return: Content of the figure file or `None` if not cached.
+        """
+        fname = self.path.joinpath(key)
+        try:
+            content = fname.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        try:
+            os.utime(fname)
+        except FileNotFoundError:  # evicted by another process in the meantime
+            pass
+
+        return content
+
+    def key(
+        self, data: dict, fmt: str = "pdf", dpi: Optional[float] = None, **kwargs
+    ) -> str:
+        """Create the cache key for a given scheme.
+
+        :param data: Dictionary with the scheme, directly from json file.
+        :param fmt: Output format, e.g., "pdf", "png", or "svg".
+        :param dpi: Resolution of the figure.
+        :param kwargs: Keyword arguments that will be passed to the `Plotter`.
+
+        :return: Hexadecimal hash of the scheme and render settings.
+        """
+        parser = ConfigParser(data)
+        canonical = {
+            prop: _to_builtin(getattr(parser, prop)) for prop in _CANONICAL_PROPERTIES
+        }
+        canonical["render"] = {
+            "format": fmt.lower(),
+            "dpi": dpi,
+            "kwargs": {key: _to_builtin(val) for key, val in kwargs.items()},
+            "version": _package_version("rimsschemedrawer"),
+            "matplotlib": _package_version("matplotlib"),
+        }
+        dump = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(dump.encode("utf-8")).hexdigest()
+
+    def put(self, key: str, content: bytes):
+        """Store a figure in the cache and evict old entries if necessary.
+
+        :param key: Key of the figure, see `RenderCache.key`.
+        :param content: Content of the figure file.
+        """
+        fname = self.path.joinpath(key)
+        ftmp = fname.with_suffix(f".{os.getpid()}.tmp")
+        ftmp.write_bytes(content)
+        os.replace(ftmp, fname)
+
+        self._evict()
+
+    def render(
+        self, data: dict, fmt: str = "pdf", dpi: Optional[float] = None, **kwargs
+    ) -> bytes:
+        """Render a scheme or get it from the cache.
+
+        :param data: Dictionary with the scheme, directly from json file.
+        :param fmt: Output format, e.g., "pdf", "png", or "svg".
+        :param dpi: Resolution of the figure.
+        :param kwargs: Keyword arguments that are passed to the `Plotter`.
+
+        :return: Content of the figure file.
+        """
+        from rimsschemedrawer.plotter import Plotter
+
+        key = self.key(data, fmt, dpi, **kwargs)
+        if (content := self.get(key)) is not None:
+            return content
+
+        plotter = Plotter(data, pyplot=False, **kwargs)
+        buffer = io.BytesIO()
+        plotter.savefig(buffer, format=fmt, dpi=dpi)
+        content = buffer.getvalue()
+
+        self.put(key, content)
+        return content
+
+    def savefig(
+        self, data: dict, fout: Union[str, Path], dpi: Optional[float] = None, **kwargs
+    ) -> Path:
+        """Save a scheme to a file, using the cached figure if available.
+
+        :param data: Dictionary with the scheme, directly from json file.
+        :param fout: File name to save the plot to. The file extension determines
+            the file type.
+        :param dpi: Resolution of the figure.
+        :param kwargs: Keyword arguments that are passed to the `Plotter`.
+
+        :return: Path to the saved file.
+        """
+        fout = Path(fout)
+        fout.write_bytes(self.render(data, fout.suffix[1:], dpi, **kwargs))
+        return fout
+
+    def _entries(self):
+        """Iterate over all cached figures, skipping temporary files."""
+        return (it for it in self.path.iterdir() if it.is_file() and not it.suffix)
+
+    def _evict(self):
+        """Remove the least recently used figures until the cache is small enough."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(it[1] for it in entries)
+        for _, fsize, entry in sorted(entries, key=lambda it: it[0]):
+            if total <= self.max_size:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            total -= fsize
+
+
+def _package_version(package: str) -> str:
+    """Get the installed version of a package or "unknown" if not installed."""
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _to_builtin(value):
+    """Convert numpy types and tuples to json serializable builtin types."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, list)):
+        return [_to_builtin(it) for it in value]
+    return value
@@ -0,0 +1,338 @@
+"""Command line interface to render RIMS schemes without the GUI."""
+
+import argparse
+import concurrent.futures
+import glob
+import os
+from pathlib import Path
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from rimsschemedrawer.cache import DEFAULT_CACHE_SIZE, RenderCache
+
+COMMANDS = ["render"]
+
+# Output formats that are written without matplotlib
+NATIVE_FORMATS = ["tikz"]
+
+
+def collect_files(inputs: Iterable[str]) -> List[Path]:
+    """Collect all json files to render from the given inputs.
+
+    Inputs can be json files, directories, or glob patterns. Directories are
+    searched (non-recursively) for json files. Glob patterns support `**` for
+    recursive searches. Every file is only returned once.
+
+    :param inputs: Files, directories, or glob patterns.
+
+    :return: Sorted list of json files, without duplicates.
+    """
+    files = []
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            files.extend(path.glob("*.json"))
+        elif path.is_file():
+            files.append(path)
+        else:
+            files.extend(Path(it) for it in glob.glob(entry, recursive=True))
+
+    return sorted({it.absolute() for it in files if it.is_file()})
+
+
+def output_file(fin: Path, fmt: str, output_dir: Optional[Path] = None) -> Path:
+    """Get the output file name for a given input file.
+
+    :param fin: Input json file.
+    :param fmt: Output format, used as the file extension.
+    :param output_dir: Output directory. Defaults to the directory of the input file.
+
+    :return: Path to the output file.
+    """
+    if output_dir is None:
+        output_dir = fin.parent
+    return output_dir.joinpath(fin.stem).with_suffix(f".{fmt}")
+
+
+def output_files(
+    files: List[Path], fmt: str, output_dir: Optional[Path] = None
+) -> Dict[Path, Path]:
+    """Get the output file names for many input files, see `output_file`.
+
+    :param files: Input json files.
+    :param fmt: Output format, used as the file extension.
+    :param output_dir: Output directory. Defaults to the directory of each input file.
+
+    :return: Dictionary with the input files as keys and the output files as values.
+
+    :raises ValueError: Several input files would be written to the same output file,
+        e.g., files with the same name from different folders.
+    """
+    outputs = {fin: output_file(fin, fmt, output_dir) for fin in files}
+    inputs = {}
+    for fin, fout in outputs.items():
+        inputs.setdefault(fout, []).append(fin)
+    if clashes := [fins for fins in inputs.values() if len(fins) > 1]:
+        names = "; ".join(", ".join(str(it) for it in fins) for fins in clashes)
+        raise ValueError(f"Files would overwrite each other's output: {names}")
+    return outputs
+
+
+def render_file(
+    fin: Path,
+    fout: Path,
+    dpi: Optional[float] = None,
+    cache: Optional[RenderCache] = None,
+    plain_labels: bool = False,
+    layout: str = "tight",
+    native_svg: bool = False,
+) -> Path:
+    """Render one scheme file and save the figure.
+
+    :param fin: Input json file.
+    :param fout: Output file, the extension determines the file type. TikZ
+        pictures (".tikz") are written without matplotlib, see
+        `rimsschemedrawer.tikz`, the other options are not used for them.
+    :param dpi: Resolution of the figure, defaults to the matplotlib setting.
+    :param cache: Render cache to use. If `None`, the figure is always rendered.
+    :param plain_labels: Write labels as plain text instead of mathtext, which is
+        faster. See `Plotter`.
+    :param layout: Layout of the figure, "tight" or "analytic". See `Plotter`.
+    :param native_svg: Write the svg file directly without matplotlib, see
+        `rimsschemedrawer.svg`. The cache and the other options are not used.
+
+    :return: Path to the output file.
+    """
+    from rimsschemedrawer.json_parser import json_reader
+
+    if native_svg:
+        from rimsschemedrawer.svg import write_svg
+
+        write_svg(json_reader(fin), fout)
+        return fout
+    if fout.suffix == ".tikz":
+        from rimsschemedrawer.tikz import write_tikz
+
+        write_tikz(json_reader(fin), fout)
+        return fout
+
+    from rimsschemedrawer.plotter import Plotter
+
+    # only pass options if set, such that cache keys of default renders stay valid
+    kwargs = {"plain_labels": True} if plain_labels else {}
+    if layout != "tight":
+        kwargs["layout"] = layout
+
+    data = json_reader(fin)
+    if cache is not None:
+        return cache.savefig(data, fout, dpi=dpi, **kwargs)
+
+    plotter = Plotter(data, pyplot=False, **kwargs)
+    plotter.savefig(fout, dpi=dpi)
+
+    return fout
+
+
+def render_files(
+    files: List[Path],
+    fmt: str = "pdf",
+    output_dir: Optional[Path] = None,
+    dpi: Optional[float] = None,
+    jobs: Optional[int] = None,
+    cache: Optional[RenderCache] = None,
+    plain_labels: bool = False,
+    layout: str = "tight",
+    native_svg: bool = False,
+) -> dict:
+    """Render many scheme files, distributed over a process pool.
+
+    Errors are collected per file and do not stop the rendering of other files.
+
+    :param files: List of json files to render.
+    :param fmt: Output format, e.g., "pdf", "png", or "svg".
+    :param output_dir: Output directory, defaults to the folder of each input file.
+    :param dpi: Resolution of the figures, defaults to the matplotlib setting.
+    :param jobs: Number of worker processes, defaults to the number of CPUs.
+        If set to 1, all files are rendered in the current process.
+    :param cache: Render cache to use. If `None`, all figures are rendered.
+    :param plain_labels: Write labels as plain text instead of mathtext.
+    :param layout: Layout of the figures, "tight" or "analytic".
+    :param native_svg: Write svg files directly without matplotlib.
+
+    :return: Dictionary with the input files as keys and the exception that occurred
+        as values. Successfully rendered files have `None` as value.
+
+    :raises ValueError: Several input files would be written to the same output file.
+    """
+    outputs = output_files(files, fmt, output_dir)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(files)))
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    if jobs == 1:
+        for fin in files:
+            try:
+                render_file(
+                    fin,
+                    outputs[fin],
+                    dpi,
+                    cache,
+                    plain_labels,
+                    layout,
+                    native_svg,
+                )
+                results[fin] = None
+            except Exception as err:
+                results[fin] = err
+        return results
+
+    initializer = None if native_svg or fmt in NATIVE_FORMATS else _init_worker
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=initializer
+    ) as executor:
+        futures = {
+            executor.submit(
+                render_file,
+                fin,
+                outputs[fin],
+                dpi,
+                cache,
+                plain_labels,
+                layout,
+                native_svg,
+            ): fin
+            for fin in files
+        }
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.exception()
+
+    return {fin: results[fin] for fin in files}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command line interface.
+
+    :param argv: Command line arguments, defaults to `sys.argv[1:]`.
+
+    :return: Exit code, 0 if all files were rendered successfully.
+    """
+    parser = argparse.ArgumentParser(
+        prog="rimsschemedrawer",
+        description="Draw RIMS schemes from json configuration files.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_render = subparsers.add_parser(
+        "render", help="Render scheme files to figures without the GUI."
+    )
+    parser_render.add_argument(
+        "inputs",
+        nargs="+",
+        help="Json files, directories, or glob patterns (quote them) to render.",
+    )
+    parser_render.add_argument(
+        "-f",
+        "--format",
+        default=None,
+        help="Output format, e.g., pdf, png, svg, or tikz for TikZ pictures "
+        "(default: pdf).",
+    )
+    parser_render.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=None,
+        help="Output directory (default: next to the input files).",
+    )
+    parser_render.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    parser_render.add_argument(
+        "--dpi", type=float, default=None, help="Resolution of the figures."
+    )
+    parser_render.add_argument(
+        "--plain-labels",
+        action="store_true",
+        help="Write labels as plain text instead of mathtext, which is faster.",
+    )
+    parser_render.add_argument(
+        "--layout",
+        choices=["tight", "analytic"],
+        default="tight",
+        help="Fit the axes by drawing the figure (tight, default) or by calculating "
+        "the margins from font metrics (analytic), which is faster.",
+    )
+    parser_render.add_argument(
+        "--native-svg",
+        action="store_true",
+        help="Write svg files directly without matplotlib, which is much faster, "
+        "but only approximates the layout of the figures. Only for -f svg, which "
+        "is the default with this option.",
+    )
+    parser_render.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help="Folder of the render cache. Unchanged schemes are not rendered again.",
+    )
+    parser_render.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_CACHE_SIZE / 1024**2,
+        help="Maximum size of the render cache in MiB (default: %(default).0f).",
+    )
+
+    args = parser.parse_args(argv)
+
+    fmt = (args.format or ("svg" if args.native_svg else "pdf")).lower().lstrip(".")
+    if args.native_svg and fmt != "svg":
+        parser_render.error(f"--native-svg writes svg files, not {fmt}.")
+    if not args.native_svg and fmt not in NATIVE_FORMATS:
+        _init_worker()
+
+    files = collect_files(args.inputs)
+    if not files:
+        print("No json files found.", file=sys.stderr)
+        return 1
+
+    cache = None
+    if args.cache is not None:
+        cache = RenderCache(args.cache, int(args.cache_size * 1024**2))
+
+    try:
+        results = render_files(
+            files,
+            fmt=fmt,
+            output_dir=args.output_dir,
+            dpi=args.dpi,
+            jobs=args.jobs,
+            cache=cache,
+            plain_labels=args.plain_labels,
+            layout=args.layout,
+            native_svg=args.native_svg,
+        )
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        return 1
+
+    failed = {fin: err for fin, err in results.items() if err is not None}
+    for fin, err in failed.items():
+        print(f"Error rendering {fin}: {type(err).__name__}: {err}", file=sys.stderr)
+    print(f"Rendered {len(files) - len(failed)} of {len(files)} files.")
+
+    return 1 if failed else 0
+
+
+def _init_worker():
+    """Select the non-interactive Agg backend for rendering."""
+    import matplotlib
+
+    matplotlib.use("Agg")
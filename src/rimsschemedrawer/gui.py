@@ -4,13 +4,6 @@ import importlib.metadata
 import json
 from pathlib import Path
 
-from matplotlib.backends.backend_qtagg import (
-    FigureCanvasQTAgg,
-    NavigationToolbar2QT as NavigationToolbar,
-)
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
-
 import rimsschemedrawer.json_parser
 
 try:
@@ -21,6 +14,7 @@ except ImportError as e:
         "Please install this package with 'pip install rimsschemedrawer[gui]'"
     ) from e
 
+from rimsschemedrawer.ip_table import get_ip_table
 from rimsschemedrawer.plotter import Plotter
 import rimsschemedrawer.utils as ut
 
@@ -58,6 +52,7 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         # settings:
         self.numberofsteps = 7
         self.lineedit_size = QtCore.QSize(100, 20)
+        self.preview_delay = 300  # ms to wait after the last edit to update preview
 
         # entries and labels necessary
         self._element = None
@@ -73,6 +68,7 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         self.edt_iplevel = QtWidgets.QLineEdit()
         self.edt_ipterm = QtWidgets.QLineEdit()
         self.cmb_element = None
+        self.cmb_charge = None
         self.cmb_lasers = None
         self.chk_lowlying = []
         self.chk_forbidden = []
@@ -120,6 +116,15 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         self.mainwidget = QtWidgets.QWidget()
         self.setCentralWidget(self.mainwidget)
 
+        # docked preview, updated with a delay after the last edit
+        self.preview = PreviewDock(parent=self)
+        self.addDockWidget(QtCore.Qt.DockWidgetArea.RightDockWidgetArea, self.preview)
+        self.preview_timer = QtCore.QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.preview_delay)
+        self.preview_timer.timeout.connect(self.update_preview)
+        self.preview.btn_save.clicked.connect(self.save_figure)
+
         # style forms
         self.fontheader = QtGui.QFont()
         self.fontheader.setBold(True)
@@ -280,9 +285,16 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         self.edt_iplevel.setEnabled(False)
         self.edt_ipterm.setToolTip("Set term symbol of IP. " + tt_termsymbol)
 
-        # Set the elements
+        # Set the elements and their charge state
         element_lbl = QtWidgets.QLabel("Element")
         layout.addWidget(element_lbl, 5 + len(self.lbl_steps), 0, 1, 1)
+        cmb_charge = QtWidgets.QComboBox()
+        layout.addWidget(cmb_charge, 5 + len(self.lbl_steps), 2, 1, 1)
+        cmb_charge.setToolTip(
+            "Select the charge state of the element that is ionized, "
+            "e.g., 1+ for the second IP."
+        )
+        self.cmb_charge = cmb_charge
         cmb_element = QtWidgets.QComboBox()
         cmb_element.addItems(ut.get_elements())
         layout.addWidget(cmb_element, 5 + len(self.lbl_steps), 1, 1, 1)
@@ -291,6 +303,9 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         cmb_element.setCurrentIndex(0)
         cmb_element.currentIndexChanged.emit(0)  # emit the signal even if not changed!
         self.cmb_element = cmb_element
+        cmb_charge.currentIndexChanged.connect(
+            lambda _: self.set_ip(self.cmb_element.currentIndex())
+        )
 
         # Laser selection
         laser_lbls = QtWidgets.QLabel("Lasers")
@@ -506,7 +521,9 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         self.rbtn_cm.toggled.connect(self.set_label_names)
         # buttons
         self.btn_plot.clicked.connect(self.plot)
-        self.btn_plot.setToolTip("Plot the scheme.")
+        self.btn_plot.setToolTip(
+            "Show the preview of the scheme and fill empty settings with defaults."
+        )
         self.btn_load_conf.clicked.connect(self.load_config)
         self.btn_load_conf.setToolTip("Load a saved configuration file.")
         self.btn_save_conf.clicked.connect(self.save_config)
@@ -531,6 +548,48 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         self.btn_quit.clicked.connect(self.close)
         self.btn_quit.setToolTip("Close the program")
 
+        # update the preview whenever an entry changes
+        for edt in (
+            self.edt_level
+            + self.edt_term
+            + self.edt_transition_strengths
+            + [
+                self.edt_gslevel,
+                self.edt_gsterm,
+                self.edt_iplevel,
+                self.edt_ipterm,
+                self.edt_sett_plttitle,
+                self.edt_sett_figwidth,
+                self.edt_sett_figheight,
+                self.edt_sett_fstitle,
+                self.edt_sett_fsaxes,
+                self.edt_sett_fsaxlbl,
+                self.edt_sett_fslbl,
+                self.edt_sett_headspace,
+                self.edt_sett_arrwidth,
+                self.edt_sett_arrheadwidth,
+                self.edt_sett_preclambda,
+                self.edt_sett_preclevel,
+            ]
+        ):
+            edt.textChanged.connect(self.schedule_preview)
+        for btn in (
+            self.chk_lowlying
+            + self.chk_forbidden
+            + [
+                self.chk_laststep,
+                self.rbtn_nm,
+                self.rbtn_iplable_top,
+                self.rbtn_sett_xoutarrow,
+                self.chk_sett_trans_strength,
+                self.chk_sett_linebreaks,
+                self.chk_sett_showcmax,
+                self.chk_sett_showevax,
+            ]
+        ):
+            btn.toggled.connect(self.schedule_preview)
+        self.drop_plot_style.currentIndexChanged.connect(self.schedule_preview)
+
         # set the layout to the widget
         self.mainwidget.setLayout(layout)
 
@@ -690,10 +749,38 @@ class SchemeDrawer(QtWidgets.QMainWindow):
             return False
         return True
 
+    def schedule_preview(self):
+        """Update the preview once no entry has changed for `preview_delay` ms.
+
+        Every call restarts the timer, such that typing a value only results in one
+        update of the preview.
+        """
+        self.preview_timer.start()
+
+    def update_preview(self):
+        """Update the docked preview with the current entries.
+
+        Incomplete entries do not raise a warning, since the user is probably still
+        typing. The problem is shown in the preview instead.
+        """
+        self.preview_timer.stop()
+        if not self.preview.isVisible():
+            return
+
+        if self.edt_level[0].text() == "" or self.edt_gslevel.text() == "":
+            self.preview.set_status("Need at least ground state and one level.")
+            return
+
+        darkmode = "dark" in self.drop_plot_style.currentText()
+        transparent = "transparent" in self.drop_plot_style.currentText()
+        self.preview.show_scheme(
+            self.write_json(), darkmode=darkmode, transparent=transparent
+        )
+
     # buttons
     def plot(self):
         """
-        Call the plotting window
+        Show the preview and update it right away
         """
         if not self.check_fields():
             return
@@ -701,12 +788,9 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         # fill default values - if not already there
         self.fill_default_values()
 
-        # open the plotting window
-        data = self.write_json()
-
-        darkmode = "dark" in self.drop_plot_style.currentText()
-        transparent = "transparent" in self.drop_plot_style.currentText()
-        PlotDisplay(data, parent=self, darkmode=darkmode, transparent=transparent)
+        self.preview.show()
+        self.preview.raise_()
+        self.update_preview()
 
     def load_config(self, **kwargs):
         """
@@ -742,7 +826,8 @@ class SchemeDrawer(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(
                 self,
                 "Error",
-                f"An error occurred while reading the file.\n{'\n'.join(err.args)}",
+                "An error occurred while reading the file.\n"
+                + "\n".join(str(arg) for arg in err.args),
                 QtWidgets.QMessageBox.Ok,
             )
             return
@@ -798,6 +883,7 @@ class SchemeDrawer(QtWidgets.QMainWindow):
 
         # IP level
         self.cmb_element.setCurrentText(config_parser.element)
+        self.cmb_charge.setCurrentIndex(self.cmb_charge.findData(config_parser.charge))
         if config_parser.element_guessed:
             QtWidgets.QMessageBox.information(
                 self,
@@ -882,6 +968,7 @@ class SchemeDrawer(QtWidgets.QMainWindow):
             ].isChecked()
         savedict["scheme"]["ip_term"] = self.edt_ipterm.text()
         savedict["scheme"]["element"] = self.cmb_element.currentText()
+        savedict["scheme"]["charge"] = self.cmb_charge.currentData()
         savedict["scheme"]["lasers"] = self.cmb_lasers.currentText()
         savedict["scheme"]["last_step_to_ip"] = self.chk_laststep.isChecked()
 
@@ -944,6 +1031,40 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         with open(filename, "w") as write_file:
             json.dump(savedict, write_file, indent=4, sort_keys=True)
 
+    def save_figure(self):
+        """
+        Save the figure shown in the preview to a file the user defines
+        """
+        options = QtWidgets.QFileDialog.Options()
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "Save Figure",
+            str(self.user_path.absolute()),
+            filter="PDF Files (*.pdf);;PNG Files (*.png);;SVG Files (*.svg);;"
+            "All Files (*.*)",
+            options=options,
+        )
+        # user pressed cancel
+        if filename == "":
+            return
+
+        filename = Path(filename)
+        if filename.suffix == "":
+            filename = filename.with_suffix(".pdf")
+
+        self.user_path = filename.parent
+
+        self.preview.save_figure(str(filename))
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        """Stop the preview's background thread before closing the window.
+
+        :param event: Close event.
+        """
+        self.preview_timer.stop()
+        self.preview.stop()
+        super().closeEvent(event)
+
     def about(self):
         """
         Gives a QtWidgets.QMessageBox with an about thing
@@ -968,10 +1089,28 @@ class SchemeDrawer(QtWidgets.QMainWindow):
     def set_ip(self, index: int) -> None:
         """Set the element name (to be written to json) and the ionization potential.
 
+        The charge states to choose from are updated for the element. The selected
+        charge state is kept if the element has an IP for it.
+
         :param index: Index of element in list
         """
-        element = ut.get_elements()[index]
-        self.edt_iplevel.setText(str(ut.get_ip(element)))
+        table = get_ip_table()
+        element = table.elements[index]
+
+        charge = self.cmb_charge.currentData()
+        charges = table.charges(element)
+        self.cmb_charge.blockSignals(True)  # only set the IP once
+        self.cmb_charge.clear()
+        for chg in charges:
+            self.cmb_charge.addItem(f"{chg}+" if chg else "neutral", chg)
+        self.cmb_charge.setCurrentIndex(
+            charges.index(charge) if charge in charges else 0
+        )
+        self.cmb_charge.blockSignals(False)
+
+        self.edt_iplevel.setText(
+            str(table.get_ip(element, self.cmb_charge.currentData()))
+        )
         self._element = element
 
     def test(self):
@@ -987,48 +1126,303 @@ class SchemeDrawer(QtWidgets.QMainWindow):
         )
 
 
-class MplCanvas(FigureCanvasQTAgg):
-    def __init__(self, width=5, height=4, dpi=100):
+class PreviewWorker(QtCore.QObject):
+    """Render the preview of a scheme in a background thread.
+
+    The worker keeps one standalone plotter and updates it for every new request,
+    see `Plotter.update`. Requests are queued by Qt, all requests but the latest one
+    are skipped. The worker does not wait for other threads, e.g., the GUI thread
+    saving a figure, since plotters do not share a lock.
+    """
+
+    rendered = QtCore.Signal(int, QtGui.QImage)
+    failed = QtCore.Signal(int, str)
+    saved = QtCore.Signal(str, str)
+
+    def __init__(self):
         super().__init__()
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = fig.add_subplot(111)
-        super().__init__(fig)
 
+        # latest requested generation, set from the GUI thread to cancel renders
+        self.generation = 0
+        self.plotter = None
 
-class PlotDisplay(QtWidgets.QMainWindow):
-    def __init__(
+    @QtCore.Slot(int, object, bool, bool, int, int)
+    def render(
         self,
+        generation: int,
         json_data: dict,
-        parent: QtWidgets.QWidget = None,
-        darkmode: bool = False,
-        transparent: bool = False,
+        darkmode: bool,
+        transparent: bool,
+        width: int = 0,
+        height: int = 0,
     ):
-        """Prepare the plot display window.
+        """Render the scheme to an image.
+
+        Emits `rendered` with the generation and the image, or `failed` with the
+        generation and the error message. If a newer render was requested in the
+        meantime, nothing is emitted.
 
+        :param generation: Number of the request, see `PreviewDock.show_scheme`.
         :param json_data: Data according to rimsschemedrawer json format.
-        :param parent: Parent widget.
         :param darkmode: Use dark background for plot?
         :param transparent: Use transparent background for plot?
+        :param width: Width of the preview in pixels. The image is rendered at the
+            resolution that fits the figure into width and height, keeping its
+            aspect ratio. If zero, the dpi of the figure is used.
+        :param height: Height of the preview in pixels.
         """
-        super().__init__(parent=parent)
+        if generation != self.generation:  # superseded before it started
+            return
 
-        if darkmode:
-            plt.style.use("dark_background")
-        else:
-            plt.style.use("default")
-        sc = MplCanvas(width=5, height=4, dpi=100)
-        Plotter(json_data, fig_ax=(sc.figure, sc.axes))
-        if transparent:
-            sc.figure.patch.set_alpha(0.0)
-            sc.axes.patch.set_alpha(0.0)
+        try:
+            if self.plotter is not None:
+                try:
+                    self.plotter.update(
+                        json_data, darkmode=darkmode, transparent=transparent
+                    )
+                except Exception:  # plotter is half updated, rebuild from scratch
+                    self.plotter = None
+            if self.plotter is None:
+                self.plotter = Plotter(
+                    json_data, pyplot=False, darkmode=darkmode, transparent=transparent
+                )
+
+            if generation != self.generation:  # superseded, skip drawing
+                return
+
+            dpi = None
+            if width > 0 and height > 0:
+                fig_width, fig_height = self.plotter.figure.get_size_inches()
+                dpi = min(width / fig_width, height / fig_height)
+
+            rgba = self.plotter.to_rgba(dpi=dpi)
+        except Exception as err:
+            self.failed.emit(generation, str(err))
+            return
+
+        height, width = rgba.shape[:2]
+        image = QtGui.QImage(
+            rgba.tobytes(),
+            width,
+            height,
+            4 * width,
+            QtGui.QImage.Format.Format_RGBA8888,
+        ).copy()  # copy, such that the image owns its data
+        self.rendered.emit(generation, image)
+
+    @QtCore.Slot(str)
+    def save(self, fname: str):
+        """Save the last rendered figure to a file.
+
+        Emits `saved` with the file name and an error message, which is empty if the
+        figure was saved successfully.
 
-        toolbar = NavigationToolbar(sc, self)
+        :param fname: File name to save the figure to.
+        """
+        if self.plotter is None:
+            self.saved.emit(fname, "Nothing to save yet.")
+            return
+
+        try:
+            self.plotter.savefig(fname)
+        except Exception as err:
+            self.saved.emit(fname, str(err))
+            return
+        self.saved.emit(fname, "")
+
+
+class PreviewLabel(QtWidgets.QLabel):
+    """Label that shows an image scaled to its size, keeping the aspect ratio."""
+
+    def __init__(self):
+        super().__init__()
+
+        self.image = None
+        self.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        # the pixmap must not set the minimum size, such that the label can shrink
+        self.setSizePolicy(
+            QtWidgets.QSizePolicy.Policy.Ignored, QtWidgets.QSizePolicy.Policy.Ignored
+        )
+
+    def set_image(self, image: QtGui.QImage):
+        """Show a new image, scaled to the size of the label.
+
+        :param image: Image to show.
+        """
+        self.image = image
+        self.update_pixmap()
+
+    def update_pixmap(self):
+        """Scale the current image to the size of the label."""
+        if self.image is None or self.width() <= 0 or self.height() <= 0:
+            return
+
+        ratio = self.devicePixelRatioF()
+        pixmap = QtGui.QPixmap.fromImage(
+            self.image.scaled(
+                self.size() * ratio,
+                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                QtCore.Qt.TransformationMode.SmoothTransformation,
+            )
+        )
+        pixmap.setDevicePixelRatio(ratio)
+        self.setPixmap(pixmap)
+
+    def resizeEvent(self, event: QtGui.QResizeEvent):
+        """Rescale the image to the new size of the label."""
+        super().resizeEvent(event)
+        self.update_pixmap()
+
+
+class PreviewDock(QtWidgets.QDockWidget):
+    render_requested = QtCore.Signal(int, object, bool, bool, int, int)
+    save_requested = QtCore.Signal(str)
+
+    def __init__(self, parent: QtWidgets.QWidget = None):
+        """Prepare the docked preview of the scheme.
+
+        The preview is rendered in a background thread by a `PreviewWorker`, such
+        that the GUI stays responsive while rendering. Renders that are superseded
+        by newer ones are cancelled. The image is rendered at the resolution of the
+        preview and rendered again once the preview was resized.
+
+        :param parent: Parent widget.
+        """
+        super().__init__("Preview", parent=parent)
+
+        self.generation = 0
+        self.request = None  # last requested scheme, to render again after resizes
+
+        self.lbl_image = PreviewLabel()
+        self.lbl_image.setMinimumSize(400, 400)
+
+        self.lbl_status = QtWidgets.QLabel()
+        self.lbl_status.setWordWrap(True)
+        self.lbl_status.hide()
+
+        self.btn_save = QtWidgets.QPushButton("Save Figure")
+        self.btn_save.setToolTip("Save the figure shown in the preview.")
+        self.btn_save.setEnabled(False)
 
         layout = QtWidgets.QVBoxLayout()
-        layout.addWidget(toolbar)
-        layout.addWidget(sc)
+        layout.addWidget(self.lbl_image)
+        layout.addWidget(self.lbl_status)
+        layout.addWidget(self.btn_save)
 
         widget = QtWidgets.QWidget()
         widget.setLayout(layout)
-        self.setCentralWidget(widget)
-        self.show()
+        self.setWidget(widget)
+
+        # worker in background thread, signals across threads are queued by Qt
+        self.worker = PreviewWorker()
+        self.thread = QtCore.QThread(self)
+        self.worker.moveToThread(self.thread)
+        self.render_requested.connect(self.worker.render)
+        self.save_requested.connect(self.worker.save)
+        self.worker.rendered.connect(self.show_image)
+        self.worker.failed.connect(self.show_error)
+        self.worker.saved.connect(self.show_saved)
+        self.thread.start()
+
+        # render again at the new resolution once resizing stopped
+        self.resize_timer = QtCore.QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(300)
+        self.resize_timer.timeout.connect(self.render_again)
+
+    def set_status(self, msg: str = None):
+        """Show a status message below the preview.
+
+        :param msg: Message to show. If `None`, the status message is hidden.
+        """
+        self.lbl_status.setText(msg or "")
+        self.lbl_status.setVisible(msg is not None)
+
+    def save_figure(self, fname: str):
+        """Save the figure in the background thread, once all renders are done.
+
+        :param fname: File name to save the figure to.
+        """
+        self.set_status(f"Saving {fname}...")
+        self.save_requested.emit(fname)
+
+    def show_error(self, generation: int, msg: str):
+        """Show an error of a render, the last valid preview is kept.
+
+        :param generation: Number of the render request.
+        :param msg: Error message.
+        """
+        if generation == self.generation:
+            self.set_status(f"Preview not updated: {msg}")
+
+    def show_image(self, generation: int, image: QtGui.QImage):
+        """Show a rendered image, unless a newer render was requested.
+
+        :param generation: Number of the render request.
+        :param image: Rendered image.
+        """
+        if generation != self.generation:
+            return
+        self.lbl_image.set_image(image)
+        self.btn_save.setEnabled(True)
+        self.set_status()
+
+    def show_saved(self, fname: str, msg: str):
+        """Show the result of saving a figure.
+
+        :param fname: File name the figure was saved to.
+        :param msg: Error message, empty if the figure was saved.
+        """
+        if msg:
+            self.set_status(None)
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Error",
+                f"The figure could not be saved to {fname}.\n{msg}",
+                QtWidgets.QMessageBox.Ok,
+            )
+        else:
+            self.set_status(f"Figure saved to {fname}.")
+
+    def show_scheme(
+        self, json_data: dict, darkmode: bool = False, transparent: bool = False
+    ):
+        """Request a new render of the scheme for the preview.
+
+        All renders that were requested earlier are cancelled: If they have not
+        started yet, they are skipped, otherwise their results are discarded.
+
+        :param json_data: Data according to rimsschemedrawer json format.
+        :param darkmode: Use dark background for plot?
+        :param transparent: Use transparent background for plot?
+        """
+        self.request = (json_data, darkmode, transparent)
+        self.generation += 1
+        self.worker.generation = self.generation
+
+        size = self.lbl_image.size() * self.lbl_image.devicePixelRatioF()
+        self.render_requested.emit(
+            self.generation,
+            json_data,
+            darkmode,
+            transparent,
+            size.width(),
+            size.height(),
+        )
+
+    def render_again(self):
+        """Render the last requested scheme again, e.g., at a new resolution."""
+        if self.request is not None:
+            self.show_scheme(*self.request)
+
+    def resizeEvent(self, event: QtGui.QResizeEvent):
+        """Render the preview again once the dock is not resized anymore."""
+        super().resizeEvent(event)
+        self.resize_timer.start()
+
+    def stop(self):
+        """Stop the background thread, waiting for a running render to finish."""
+        self.resize_timer.stop()
+        self.worker.generation = -1  # cancel all pending renders
+        self.thread.quit()
+        self.thread.wait()
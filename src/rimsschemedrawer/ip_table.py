@@ -0,0 +1,243 @@
+"""Table of ionization potentials by element and charge state."""
+
+import functools
+import json
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+# Packaged table that is loaded by default
+DEFAULT_TABLE = Path(__file__).parent.joinpath("assets/ip_table.json")
+
+# Columns of the table, one value per row
+_COLUMNS = ["element", "charge", "ip", "uncertainty", "reference"]
+
+
+class IPEntry(NamedTuple):
+    """One row of the IP table, see `IPTable.entry`."""
+
+    element: str
+    """Element symbol, e.g., "Ti"."""
+    charge: int
+    """Charge state of the atom or ion that is ionized, 0 for the first IP."""
+    ip: float
+    """Ionization potential in cm-1."""
+    uncertainty: float
+    """Uncertainty of the ionization potential in cm-1, `nan` if not known."""
+    reference: Dict
+    """Reference with "author", "year", and "url" entries."""
+
+
+class IPTable:
+    """Ionization potentials of all elements and their ions.
+
+    Every row holds the IP of one element in one charge state, i.e., charge 0 for
+    the first IP of the neutral atom, charge 1 for the second IP, etc. The columns
+    are numpy arrays. Rows are looked up by `(element, charge)` in a dictionary.
+
+    The packaged table is loaded once on first use with `get_ip_table`.
+    """
+
+    def __init__(
+        self,
+        element: np.ndarray,
+        charge: np.ndarray,
+        ip: np.ndarray,
+        uncertainty: np.ndarray,
+        reference: np.ndarray,
+        references: Dict[str, Dict],
+    ):
+        """Initialize the table from its columns.
+
+        :param element: Element symbol of each row.
+        :param charge: Charge state of each row.
+        :param ip: Ionization potential of each row in cm-1.
+        :param uncertainty: Uncertainty of each IP in cm-1, `nan` if not known.
+        :param reference: Key of the reference of each row in `references`.
+        :param references: Dictionary of all references, each with "author",
+            "year", and "url" entries.
+        """
+        self._element = np.asarray(element, dtype=str)
+        self._charge = np.asarray(charge, dtype=int)
+        self._ip = np.asarray(ip, dtype=float)
+        self._uncertainty = np.asarray(uncertainty, dtype=float)
+        self._reference = np.asarray(reference, dtype=str)
+        self._references = references
+
+        lengths = {len(getattr(self, f"_{col}")) for col in _COLUMNS}
+        if len(lengths) != 1:
+            raise ValueError("All columns of the IP table must have the same length.")
+
+        missing = set(self._reference) - set(references)
+        if missing:
+            raise ValueError(f"Missing references: {', '.join(sorted(missing))}")
+
+        self._index = {
+            (ele, chg): row
+            for row, (ele, chg) in enumerate(
+                zip(self._element.tolist(), self._charge.tolist())
+            )
+        }
+        if len(self._index) != len(self._element):
+            raise ValueError("Elements and charge states of the IP table not unique.")
+
+        # IPs as floats for fast lookups of single values
+        self._ip_list = self._ip.tolist()
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        """Check if an element in a given charge state is in the table."""
+        return key in self._index
+
+    def __len__(self) -> int:
+        """Return the number of rows in the table."""
+        return len(self._index)
+
+    @classmethod
+    def from_file(cls, fin: Union[str, Path]) -> "IPTable":
+        """Read a table from a json file, as written by `IPTable.save`.
+
+        :param fin: Json file to read.
+
+        :return: Table with all rows of the file.
+        """
+        with open(fin, "r", encoding="utf-8") as fobj:
+            data = json.load(fobj)
+
+        uncertainty = [np.nan if it is None else it for it in data["uncertainty"]]
+        return cls(
+            element=data["element"],
+            charge=data["charge"],
+            ip=data["ip"],
+            uncertainty=uncertainty,
+            reference=data["reference"],
+            references=data["references"],
+        )
+
+    def save(self, fout: Union[str, Path]):
+        """Save the table to a json file with one line per column.
+
+        Unknown uncertainties are saved as `null`.
+
+        :param fout: File to save the table to.
+        """
+        uncertainty = [
+            None if np.isnan(it) else it for it in self._uncertainty.tolist()
+        ]
+        columns = {
+            "element": self._element.tolist(),
+            "charge": self._charge.tolist(),
+            "ip": self._ip_list,
+            "uncertainty": uncertainty,
+            "reference": self._reference.tolist(),
+        }
+
+        references = json.dumps(self._references, indent=4).replace("\n", "\n    ")
+        lines = [f'    "references": {references}']
+        lines += [
+            f"    {json.dumps(key)}: {json.dumps(val)}" for key, val in columns.items()
+        ]
+        with open(fout, "w", encoding="utf-8") as fobj:
+            fobj.write("{\n" + ",\n".join(lines) + "\n}\n")
+
+    @property
+    def charge(self) -> np.ndarray:
+        """Get the charge state of each row."""
+        return self._charge
+
+    @property
+    def element(self) -> np.ndarray:
+        """Get the element symbol of each row."""
+        return self._element
+
+    @property
+    def ip(self) -> np.ndarray:
+        """Get the ionization potential of each row in cm-1."""
+        return self._ip
+
+    @property
+    def reference(self) -> np.ndarray:
+        """Get the key of the reference of each row, see `references`."""
+        return self._reference
+
+    @property
+    def references(self) -> Dict[str, Dict]:
+        """Get all references, each with "author", "year", and "url" entries."""
+        return self._references
+
+    @property
+    def uncertainty(self) -> np.ndarray:
+        """Get the uncertainty of the IP of each row in cm-1, `nan` if not known."""
+        return self._uncertainty
+
+    @functools.cached_property
+    def elements(self) -> List[str]:
+        """Get all elements with a first IP, in the order of the table."""
+        return self._element[self._charge == 0].tolist()
+
+    def charges(self, element: str) -> List[int]:
+        """Get all charge states of an element that are in the table.
+
+        :param element: Element symbol.
+
+        :return: Sorted charge states.
+        """
+        return sorted(self._charge[self._element == element].tolist())
+
+    def entry(self, element: str, charge: int = 0) -> IPEntry:
+        """Get the full row of an element in a given charge state.
+
+        :param element: Element symbol.
+        :param charge: Charge state, 0 for the first IP.
+
+        :return: IP, uncertainty, and reference of the element.
+
+        :raises KeyError: Element in the given charge state is not in the table.
+        """
+        row = self._index[(element, charge)]
+        return IPEntry(
+            element=element,
+            charge=charge,
+            ip=self._ip_list[row],
+            uncertainty=float(self._uncertainty[row]),
+            reference=self._references[self._reference[row]],
+        )
+
+    def get_ip(self, element: str, charge: int = 0) -> float:
+        """Get the ionization potential of an element in a given charge state.
+
+        :param element: Element symbol.
+        :param charge: Charge state, 0 for the first IP.
+
+        :return: Ionization potential in cm-1.
+
+        :raises KeyError: Element in the given charge state is not in the table.
+        """
+        return self._ip_list[self._index[(element, charge)]]
+
+    def get_uncertainty(self, element: str, charge: int = 0) -> float:
+        """Get the uncertainty of the ionization potential of an element.
+
+        In the packaged table, the uncertainties of the NIST values are taken from
+        the NIST ASD. Values from other references and NIST values without a given
+        uncertainty, e.g., the first IP of Rn, have no uncertainty.
+
+        :param element: Element symbol.
+        :param charge: Charge state, 0 for the first IP.
+
+        :return: Uncertainty in cm-1, `nan` if not known.
+
+        :raises KeyError: Element in the given charge state is not in the table.
+        """
+        return float(self._uncertainty[self._index[(element, charge)]])
+
+
+@functools.lru_cache(maxsize=None)
+def get_ip_table(fin: Optional[Union[str, Path]] = None) -> IPTable:
+    """Load an IP table once and return it on subsequent calls.
+
+    :param fin: Json file to load, defaults to the table that ships with the package.
+
+    :return: IP table.
+    """
+    return IPTable.from_file(DEFAULT_TABLE if fin is None else fin)
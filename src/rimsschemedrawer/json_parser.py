@@ -2,17 +2,23 @@
 
 import json
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 
-try:
-    from rttools import StringFmt
-except ImportError:
-    StringFmt = None
-
 import rimsschemedrawer.utils as ut
 
+StringFmt = None  # imported from rttools when needed, see `rttools_error`
+
+# keys in the scheme that are followed by the index of the step, e.g., "step_level0"
+_STEP_KEYS = {
+    "step_forbidden",
+    "step_level",
+    "step_lowlying",
+    "step_term",
+    "trans_strength",
+}
+
 
 class ConfigParser:
     """Class to parse the json configuration file.
@@ -21,13 +27,33 @@ class ConfigParser:
     """
 
     def __init__(self, data: Dict):
-        """Initialize the class by parsing the data and saving it as variables."""
-        self._num_steps = None
+        """Initialize the class by parsing the data and saving it as variables.
+
+        Formatted terms are only created when first accessed and are then cached.
+        To parse new data, assign it to `data`, which also clears the cache.
+        """
+        self._cache = {}
         self.data = data
-        self._element_guessed = False
 
+    @property
+    def data(self) -> Dict:
+        """Get the data of the scheme, directly from the json file."""
+        return self._data
+
+    @data.setter
+    def data(self, value: Dict):
+        """Set new data of the scheme, parse it, and clear the cache.
+
+        If you modify the dictionary in place, assign it again to parse it.
+
+        :param value: Dictionary with the scheme, directly from the json file.
+        """
+        self._data = value
+        self._num_steps = None
+        self._element_guessed = False
         self._last_step_to_ip_mode = False
 
+        self.clear_cache()
         self._parse_data_scheme()
         self._parse_data_settings()
 
@@ -38,6 +64,11 @@ class ConfigParser:
         """Get the element of the scheme."""
         return self._element
 
+    @property
+    def charge(self) -> int:
+        """Get the charge state of the ionized atom, 0 for the first IP."""
+        return self._charge
+
     @property
     def element_guessed(self) -> bool:
         """Return if the element was guessed from the IP."""
@@ -51,19 +82,26 @@ class ConfigParser:
     @property
     def gs_term(self) -> str:
         """Get the ground state term, formatted for plotting."""
-        return ut.term_to_string(self._gs_term)
+        return self._cached("gs_term", lambda: ut.term_to_string(self._gs_term))
 
     @property
     def gs_term_html(self):
         """Get the ground state term, formatted for HTML."""
         rttools_error()
-        return StringFmt(self.gs_term, StringFmt.Type.latex).html
+        return self._cached(
+            "gs_term_html", lambda: StringFmt(self.gs_term, StringFmt.Type.latex).html
+        )
 
     @property
     def gs_term_no_formatting(self) -> str:
         """Get the ground state term, not formatted for plotting."""
         return self._gs_term
 
+    @property
+    def gs_term_plain(self) -> Optional[str]:
+        """Get the ground state term with Unicode super- and subscripts."""
+        return ut.parse_term(self._gs_term).unicode
+
     @property
     def ip_level(self) -> float:
         """Get the ionization potential level."""
@@ -72,13 +110,18 @@ class ConfigParser:
     @property
     def ip_term(self) -> str:
         """Get the ionization potential term, formatted for plotting."""
-        return ut.term_to_string(self._ip_term)
+        return self._cached("ip_term", lambda: ut.term_to_string(self._ip_term))
 
     @property
     def ip_term_no_formatting(self):
         """Get the ionization potential term, not formatted for plotting."""
         return self._ip_term
 
+    @property
+    def ip_term_plain(self) -> Optional[str]:
+        """Get the ionization potential term with Unicode super- and subscripts."""
+        return ut.parse_term(self._ip_term).unicode
+
     @property
     def is_low_lying(self) -> np.ndarray:
         """Return a boolean array if a level is a low-lying state.
@@ -126,15 +169,21 @@ class ConfigParser:
 
     @property
     def step_terms(self) -> np.ndarray:
-        """Get the terms for all states, formatted for plotting."""
-        return np.array([ut.term_to_string(it) for it in self._step_term])
+        """Get the terms for all states, formatted for plotting (read-only)."""
+        return self._cached(
+            "step_terms",
+            lambda: np.array([ut.term_to_string(it) for it in self._step_term]),
+        )
 
     @property
     def step_terms_html(self) -> np.ndarray:
-        """Get the terms for all states, formatted for HTML."""
+        """Get the terms for all states, formatted for HTML (read-only)."""
         rttools_error()
-        return np.array(
-            [StringFmt(it, StringFmt.Type.latex).html for it in self.step_terms]
+        return self._cached(
+            "step_terms_html",
+            lambda: np.array(
+                [StringFmt(it, StringFmt.Type.latex).html for it in self.step_terms]
+            ),
         )
 
     @property
@@ -142,6 +191,14 @@ class ConfigParser:
         """Get the terms for all states, not formatted for plotting."""
         return self._step_term
 
+    @property
+    def step_terms_plain(self) -> np.ndarray:
+        """Get the terms for all states with Unicode super- and subscripts."""
+        return self._cached(
+            "step_terms_plain",
+            lambda: np.array([ut.parse_term(it).unicode for it in self._step_term]),
+        )
+
     @property
     def transition_strengths(self) -> np.ndarray:
         """Get the transition strength of all steps."""
@@ -241,6 +298,30 @@ class ConfigParser:
 
     # METHODS
 
+    def clear_cache(self):
+        """Clear all cached formatted values, they are recreated on next access."""
+        self._cache.clear()
+
+    def layout(self, darkmode: Optional[bool] = None, plain_labels: bool = False):
+        """Get the positions of all levels, arrows, and labels of the scheme.
+
+        The layout is cached until new data is assigned.
+
+        :param darkmode: Use arrow colors for dark mode, defaults to the setting of
+            the scheme.
+        :param plain_labels: Write labels as plain text instead of mathtext.
+
+        :return: Layout of the scheme, see `rimsschemedrawer.layout.SchemeLayout`.
+        """
+        from rimsschemedrawer.layout import SchemeLayout
+
+        if darkmode is None:
+            darkmode = self.sett_plot_dark
+        return self._cached(
+            f"layout_{darkmode}_{plain_labels}",
+            lambda: SchemeLayout(self, darkmode, plain_labels),
+        )
+
     def scheme_table(self, prec: int = 3, prec_strength: int = 1) -> Tuple[List, List]:
         """Create a scheme table for further processing.
 
@@ -393,6 +474,23 @@ class ConfigParser:
 
     # PRIVATE METHODS
 
+    def _cached(self, key: str, func: Callable) -> Any:
+        """Get a cached value or create and cache it.
+
+        Arrays are set to read-only, such that the cached values cannot be modified.
+
+        :param key: Key of the value in the cache.
+        :param func: Function without arguments that creates the value.
+
+        :return: Cached value.
+        """
+        if key not in self._cache:
+            value = func()
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+            self._cache[key] = value
+        return self._cache[key]
+
     def _parse_data_scheme(self):
         """Parse the data of the scheme and save it to class variables."""
         # variable that defines if input is in nm (True). Otherwise in cm^-1 (False)
@@ -403,13 +501,22 @@ class ConfigParser:
         self._gs_term = self.data["scheme"]["gs_term"]
 
         # IP
-        try:  # new format with element instead of IP defined
+        self._charge = int(
+            self.data["scheme"].get("charge", ut.DEFAULT_SETTINGS["scheme"]["charge"])
+        )
+        if "element" in self.data["scheme"]:  # new format with element defined
             self._element = self.data["scheme"]["element"]
-            self._ip_level = ut.get_ip(self._element)
-        except KeyError:  # new format with element instead of IP defined
+            try:
+                self._ip_level = ut.get_ip(self._element, self._charge)
+            except KeyError as err:
+                raise ValueError(
+                    f"No IP for {self._element} in charge state {self._charge}."
+                ) from err
+        else:  # old format with IP defined, guess the element of the first IP
             self._ip_level = float(self.data["scheme"]["ip_level"])
             self._element = ut.guess_element_from_ip(self._ip_level)
             self._element_guessed = True
+            self._charge = 0
         self._ip_term = self.data["scheme"]["ip_term"]
 
         # Get the laser value and default to Ti:Sa if none selected
@@ -424,21 +531,12 @@ class ConfigParser:
             "last_step_to_ip", last_step_to_ip_default
         )
 
-        # Get the step levels and save them as cm-1 (transform if in nm)
-        step_levels = []
-        idx = 0
-        breaker = True
-        while breaker:
-            try:
-                step_level = self.data["scheme"][f"step_level{idx}"]
-                try:  # append step level as float, if Value error, we are done
-                    step_levels.append(float(step_level))
-                    idx += 1
-                except ValueError:  # we are done since we encountered an empty string
-                    breaker = False
-            except KeyError:  # we ran out of step_level keys in the json file
-                breaker = False
-        step_levels = np.array(step_levels)
+        # collect all step keys of the scheme at once
+        self._step_values = _scan_step_keys(self.data["scheme"])
+
+        # Get the step levels: all consecutive levels until the first missing or
+        # empty one, then save them as cm-1 (transform if in nm)
+        step_levels = _consecutive_floats(self._step_values.get("step_level", {}))
 
         # Number of steps to look for
         self._num_steps = len(step_levels)
@@ -464,8 +562,8 @@ class ConfigParser:
                 step_levels[ll_mask]
             )  # now all in cm-1
 
-            for it in range(idx_first_step + 1, len(step_levels)):
-                step_levels[it] += step_levels[it - 1]
+            # levels are the sum of all photon energies from the first step on
+            step_levels[idx_first_step:] = np.cumsum(step_levels[idx_first_step:])
 
             # add ground level
             step_levels[ll_mask] += self._gs_level
@@ -479,15 +577,10 @@ class ConfigParser:
         self._steps_nm[self._low_lying] = ut.cm_2_to_nm(
             self._step_levels_cm[idx_first_step] - self._step_levels_cm[self._low_lying]
         )
-        # step from ground state
-        self._steps_nm[idx_first_step] = ut.cm_2_to_nm(
-            self._step_levels_cm[idx_first_step] - self._gs_level
-        )
-        # actual steps from second on
-        for it in range(idx_first_step + 1, len(self._steps_nm)):
-            self._steps_nm[it] = ut.cm_2_to_nm(
-                self._step_levels_cm[it] - self._step_levels_cm[it - 1]
-            )
+        # step from ground state and actual steps from second on
+        upper = self._step_levels_cm[idx_first_step:]
+        lower = np.concatenate(([self._gs_level], upper[:-1]))
+        self._steps_nm[idx_first_step:] = ut.cm_2_to_nm(upper - lower)
 
         # adjust scheme if last_step_to_ip and set mode if required
         if self._last_step_to_ip and self._step_levels_cm[-1] < self._ip_level:
@@ -502,7 +595,7 @@ class ConfigParser:
             self._transition_strength = np.append(self._transition_strength, 0)
             self._step_term = np.append(self._step_term, "")
 
-    def _parse_data_key(self, key: str, dtype: type, default: any) -> np.ndarray:
+    def _parse_data_key(self, key: str, dtype: type, default: Any) -> np.ndarray:
         """Parse a key from the data and return values with the correct type.
 
         All keys with `key{idx}`, where `idx` runs from 0 to `self._num_steps` will
@@ -518,19 +611,13 @@ class ConfigParser:
 
         :raises ValueError: If `self._num_steps` is not set.
         """
-        values = []
-
         if self._num_steps is None:
             raise ValueError("Number of steps is not set.")
 
-        for idx in range(self._num_steps):
-            try:
-                value = self.data["scheme"][f"{key}{idx}"]
-                values.append(dtype(value))
-            except (KeyError, ValueError):  # key not found, conversion failed
-                values.append(default)
+        found = self._step_values.get(key, {})
+        values = [found.get(idx, default) for idx in range(self._num_steps)]
 
-        return np.array(values)
+        return _convert_values(values, dtype, default)
 
     def _parse_data_settings(self):
         """Parse the data of the settings and save it to class variables.
@@ -605,6 +692,71 @@ class ConfigParser:
         self._sett_plot_style = get_value("plot_style", str)
 
 
+def _consecutive_floats(values: Dict[int, Any]) -> np.ndarray:
+    """Convert the values with indices 0, 1, 2, ... to floats until the first invalid.
+
+    :param values: Dictionary with the index as key and the value to convert.
+
+    :return: Numpy array with all values up to the first missing or invalid one.
+    """
+    raw = []
+    while (value := values.get(len(raw))) is not None and value != "":
+        raw.append(value)
+
+    try:
+        return np.array([float(value) for value in raw])
+    except ValueError:  # invalid value somewhere, stop before it
+        pass
+
+    floats = []
+    for value in raw:
+        try:
+            floats.append(float(value))
+        except ValueError:
+            break
+    return np.array(floats)
+
+
+def _scan_step_keys(scheme: Dict) -> Dict[str, Dict[int, Any]]:
+    """Collect all values of keys that end with a step index, e.g., "step_level0".
+
+    :param scheme: The "scheme" dictionary of the json data.
+
+    :return: Dictionary with the key without index, e.g., "step_level", as key and
+        a dictionary that maps the index to the value.
+    """
+    step_values = {}
+    for key, value in scheme.items():
+        name = key.rstrip("0123456789")
+        if name in _STEP_KEYS and name != key:
+            step_values.setdefault(name, {})[int(key[len(name) :])] = value
+    return step_values
+
+
+def _convert_values(values: List, dtype: type, default: Any) -> np.ndarray:
+    """Convert values to an array, invalid values are replaced by the default.
+
+    :param values: Values to convert.
+    :param dtype: Data type to convert the values to, e.g., `float`.
+    :param default: Value for entries that are empty or cannot be converted.
+
+    :return: Numpy array with the converted values.
+    """
+    values = [default if value is None or value == "" else value for value in values]
+    try:
+        return np.array([dtype(value) for value in values], dtype=dtype)
+    except ValueError:  # invalid value somewhere, convert one by one
+        pass
+
+    converted = []
+    for value in values:
+        try:
+            converted.append(dtype(value))
+        except ValueError:
+            converted.append(default)
+    return np.array(converted, dtype=dtype)
+
+
 def json_reader(fin: Path) -> Dict:
     """Read a json file and return a dictionary.
 
@@ -624,8 +776,12 @@ def json_reader(fin: Path) -> Dict:
 
 
 def rttools_error():
-    """Check for rttools and raise an error if not found."""
+    """Import rttools if not done yet and raise an error if not found."""
+    global StringFmt
     if StringFmt is None:
-        raise ImportError(
-            "rttools is not installed. Please install it to use this function."
-        )
+        try:
+            from rttools import StringFmt
+        except ImportError as e:
+            raise ImportError(
+                "rttools is not installed. Please install it to use this function."
+            ) from e
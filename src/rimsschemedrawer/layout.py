@@ -0,0 +1,664 @@
+"""Geometry of a scheme, independent of matplotlib or any other backend.
+
+All positions are in data coordinates: x runs from 0 to 10, y is the energy in
+cm-1 and runs from 0 to `SchemeLayout.ymax`.
+"""
+
+import math
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from rimsschemedrawer.json_parser import ConfigParser
+from rimsschemedrawer import utils as ut
+
+# x-limits of the scheme
+XMAX = 10.0
+# Distance of labels from arrows and from the edges of the scheme
+TEXTPAD = 0.4
+# Distance between low-lying states, in units of the IP
+MANIFOLD_Y_INCREMENT = 0.04
+# x position of the first arrow if low-lying states are present
+FIRST_ARROW_X_MANIFOLD = 1.0
+# Conversion factor from eV to cm-1
+CM_PER_EV = 8065.54429
+# Colors of the background, the main elements, and the shading above the IP,
+# for light (False) and dark mode (True)
+COLORS = {
+    False: {"background": "#ffffff", "main": "#000000", "header": "#adbbff"},
+    True: {"background": "#000000", "main": "#ffffff", "header": "#4b5482"},
+}
+# Tick length and paddings around the axes in points, same as the matplotlib defaults
+TICK_LENGTH = 3.5
+TICK_PAD = 3.5
+LABEL_PAD = 4.0
+TITLE_PAD = 6.0
+FIGURE_PAD = 1.08 * 10.0  # tight layout padding, in units of the default font size
+# Estimated size of the default font, in units of the font size
+TEXT_ASCENT = 0.93
+TEXT_DESCENT = 0.24
+LINE_SPACING = 1.2
+_CHAR_WIDTH = 0.62
+
+# Steps of the tick locator, same as the ones of matplotlib's `AutoLocator`
+_TICK_STEPS = np.array([1.0, 2.0, 2.5, 5.0, 10.0])
+
+
+class Levels(NamedTuple):
+    """Horizontal lines of the levels, one entry per line."""
+
+    y: np.ndarray
+    xmin: np.ndarray
+    xmax: np.ndarray
+    group: np.ndarray  # "steps" or "low_lying"
+    step: np.ndarray  # index of the step that excites the level, -1 for ground state
+
+
+class Arrows(NamedTuple):
+    """Vertical arrows of the transitions, one entry per arrow."""
+
+    x: np.ndarray
+    y: np.ndarray  # tail of the arrow
+    length: np.ndarray
+    color: np.ndarray
+    filled: np.ndarray  # the last step to the IP is not filled
+    forbidden: np.ndarray  # forbidden transitions are crossed out
+    group: np.ndarray
+    step: np.ndarray  # index of the step in the scheme
+
+
+class Labels(NamedTuple):
+    """Texts in the scheme, one entry per label."""
+
+    x: np.ndarray
+    y: np.ndarray
+    text: np.ndarray
+    color: np.ndarray  # None for labels in the main color
+    ha: np.ndarray
+    va: np.ndarray
+    ma: np.ndarray
+    rotation: np.ndarray
+    group: np.ndarray  # "ip", "steps", or "low_lying"
+    kind: np.ndarray  # "ip", "level", or "transition"
+
+
+class AxesFrame(NamedTuple):
+    """Estimated position of the axes in the figure, see `SchemeLayout.axes_frame`.
+
+    Positions are in points from the top left corner of the figure.
+    """
+
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    ticks: List[float]  # ticks of the left axis in cm-1, empty if not shown
+    ticks_ev: List[float]  # ticks of the right axis in eV, empty if not shown
+
+    def ypos(self, val: float, vmax: float) -> float:
+        """Get the position of a value on an axis from 0 to `vmax` in points."""
+        return self.y1 - (self.y1 - self.y0) * val / vmax
+
+
+class Hit(NamedTuple):
+    """Element of the scheme at a given position, see `SchemeLayout.hit_test`."""
+
+    kind: str  # "arrow" or "level"
+    index: int  # index in `SchemeLayout.arrows` or `SchemeLayout.levels`
+    group: str
+    step: int
+
+
+_DTYPES = {
+    Levels: [float, float, float, str, int],
+    Arrows: [float, float, float, str, bool, bool, str, int],
+    Labels: [float, float, object, object, str, str, str, float, str, str],
+}
+
+
+class SchemeLayout:
+    """Positions of all levels, arrows, and labels of a scheme.
+
+    The layout only depends on the scheme, the darkmode setting (for the colors of
+    the arrows), and whether labels are written as plain text. It is calculated with
+    numpy only, such that it can be cached, tested, and shared by different
+    renderers, e.g., to find the arrow or level under the mouse with `hit_test`.
+    All arrays are read-only.
+
+    Get the cached layout of a scheme with `ConfigParser.layout`.
+    """
+
+    def __init__(
+        self,
+        parser: ConfigParser,
+        darkmode: Optional[bool] = None,
+        plain_labels: bool = False,
+    ):
+        """Calculate the layout of a scheme.
+
+        :param parser: Parsed scheme.
+        :param darkmode: Use arrow colors for dark mode, defaults to the setting of
+            the scheme.
+        :param plain_labels: Write labels as plain text with Unicode super- and
+            subscripts instead of mathtext.
+        """
+        if darkmode is None:
+            darkmode = parser.sett_plot_dark
+        self._parser = parser
+        self._darkmode = darkmode
+        self._plain_labels = plain_labels
+
+        if plain_labels:
+            self._unit_wavenumber = "cm\u207b\u00b9"
+            self._unit_cm = f"\u2009{self._unit_wavenumber}"
+            self._unit_nm = "\u2009nm"
+        else:
+            self._unit_wavenumber = "cm$^{-1}$"
+            self._unit_cm = f"$\\,${self._unit_wavenumber}"
+            self._unit_nm = "$\\,$nm"
+
+        self._ip = parser.ip_level
+        self._arrow_width, self._arrow_head_width = parser.sett_arrow_fmt
+        self._arrow_head_length = parser.step_levels[-1] / 30.0
+        if self._ip > parser.step_levels[-1] + parser.gs_level:
+            self._ymax = self._ip + parser.sett_headspace
+        else:
+            self._ymax = (
+                parser.step_levels[-1] + parser.gs_level + parser.sett_headspace
+            )
+
+        self._levels = []
+        self._arrows = []
+        self._labels = []
+        self._layout_ip()
+        self._layout_steps()
+        self._layout_low_lying()
+
+        self._levels = _columns(Levels, self._levels)
+        self._arrows = _columns(Arrows, self._arrows)
+        self._labels = _columns(Labels, self._labels)
+
+    @property
+    def arrows(self) -> Arrows:
+        """Get the arrows of all transitions."""
+        return self._arrows
+
+    @property
+    def arrow_fmt(self) -> tuple:
+        """Get the width, head width, and head length of the arrows."""
+        return self._arrow_width, self._arrow_head_width, self._arrow_head_length
+
+    @property
+    def ip(self) -> float:
+        """Get the IP in cm-1, the region above it is shaded."""
+        return self._ip
+
+    @property
+    def labels(self) -> Labels:
+        """Get all labels in the scheme."""
+        return self._labels
+
+    @property
+    def levels(self) -> Levels:
+        """Get the horizontal lines of all levels."""
+        return self._levels
+
+    @property
+    def unit_wavenumber(self) -> str:
+        """Get the unit of wavenumbers, formatted like the labels."""
+        return self._unit_wavenumber
+
+    @property
+    def xlim(self) -> tuple:
+        """Get the limits of the x-axis."""
+        return 0.0, XMAX
+
+    @property
+    def ylim(self) -> tuple:
+        """Get the limits of the y-axis in cm-1."""
+        return 0.0, self._ymax
+
+    @property
+    def ylim_ev(self) -> tuple:
+        """Get the limits of the y-axis in eV."""
+        return 0.0, self._ymax / CM_PER_EV
+
+    @property
+    def ymax(self) -> float:
+        """Get the upper limit of the y-axis in cm-1, including the headspace."""
+        return self._ymax
+
+    def axes_frame(self) -> AxesFrame:
+        """Estimate the position of the axes in the figure, without measuring texts.
+
+        The axes are fitted into the figure like matplotlib's tight layout, but the
+        sizes of the texts are estimated from their font sizes. This is used by
+        renderers that do not use matplotlib, see `rimsschemedrawer.svg`.
+
+        :return: Position of the axes and ticks of both y-axes.
+        """
+        parser = self._parser
+        fsz_ticks, fsz_axes_labels, _, fsz_title = parser.sett_fontsize
+        show_cm_1_ax, show_ev_ax, _, _ = parser.sett_shows
+        width, height = (72.0 * it for it in parser.sett_fig_size)
+
+        # ticks of both y-axes, the axes are about as high as the figure
+        axes_height = height - 2 * FIGURE_PAD
+        ticks = axis_ticks(self._ymax, axes_height, fsz_ticks) if show_cm_1_ax else []
+        ev_max = self.ylim_ev[1]
+        ticks_ev = axis_ticks(ev_max, axes_height, fsz_ticks) if show_ev_ax else []
+
+        # tick labels at the ends of the axes stick out by half their height
+        half_tick = text_height(fsz_ticks) / 2
+        y0 = FIGURE_PAD
+        if (ticks and math.isclose(ticks[-1], self._ymax)) or (
+            ticks_ev and math.isclose(ticks_ev[-1], ev_max)
+        ):
+            y0 += half_tick
+        if parser.sett_title:
+            y0 = max(y0, FIGURE_PAD + text_height(fsz_title) + TITLE_PAD)
+        y1 = height - FIGURE_PAD
+        if ticks or ticks_ev:
+            y1 -= half_tick
+
+        def margin(tick_strs: List[str]) -> float:
+            """Width of the tick labels and the axis label next to the axes."""
+            if not tick_strs:
+                return FIGURE_PAD
+            size = max(text_width(it, fsz_ticks) for it in tick_strs)
+            return (
+                FIGURE_PAD + size + TICK_PAD + LABEL_PAD + text_height(fsz_axes_labels)
+            )
+
+        x0 = margin([ut.my_formatter_plain(it) for it in ticks])
+        x1 = width - margin(format_ticks(ticks_ev))
+        return AxesFrame(x0, y0, x1, y1, ticks, ticks_ev)
+
+    def arrow_polygons(self) -> np.ndarray:
+        """Get the outlines of all arrows.
+
+        The outlines are the same as the ones of matplotlib's `FancyArrow` with
+        `length_includes_head=True`.
+
+        :return: Array of shape (number of arrows, 8, 2) with the x and y values of
+            the vertices of each arrow, starting at the tip.
+        """
+        width, head_width, head_length = self.arrow_fmt
+        length = self._arrows.length[:, np.newaxis]
+
+        # horizontal arrows pointing to the right with the tip at (0, 0)
+        coords_x = np.tile(
+            [
+                0.0,
+                -head_length,
+                -head_length,
+                0.0,
+                0.0,
+                -head_length,
+                -head_length,
+                0.0,
+            ],
+            (len(length), 1),
+        )
+        coords_x[:, 3:5] = -length
+        coords_y = np.array(
+            [0.0, -head_width, -width, -width, width, width, head_width, -0.0]
+        )
+        coords_y /= 2
+
+        # rotate them to point up or down and move the tips into place
+        direction = np.where(length < 0, -1.0, 1.0)
+        polygons = np.empty((len(length), 8, 2))
+        polygons[..., 0] = self._arrows.x[:, np.newaxis] - direction * coords_y
+        polygons[..., 1] = (self._arrows.y + self._arrows.length)[
+            :, np.newaxis
+        ] + direction * coords_x
+        return polygons
+
+    def hit_test(self, x: float, y: float, tolerance: float = 0.0) -> Optional[Hit]:
+        """Find the arrow or level at a given position.
+
+        Arrows are hit within their head width and take precedence over levels.
+        Levels are hit within the tolerance above and below the line.
+
+        :param x: x value of the position.
+        :param y: y value of the position in cm-1.
+        :param tolerance: Vertical tolerance to hit a level in cm-1.
+
+        :return: The element that was hit, or `None` if no element is there.
+        """
+        arrows = self._arrows
+        ybott = np.minimum(arrows.y, arrows.y + arrows.length)
+        ytop = np.maximum(arrows.y, arrows.y + arrows.length)
+        half_width = max(self._arrow_width, self._arrow_head_width) / 2
+        hits = np.flatnonzero(
+            (np.abs(arrows.x - x) <= half_width) & (ybott <= y) & (y <= ytop)
+        )
+        if len(hits) > 0:
+            ind = hits[np.argmin(np.abs(arrows.x[hits] - x))]
+            return Hit("arrow", int(ind), str(arrows.group[ind]), int(arrows.step[ind]))
+
+        levels = self._levels
+        hits = np.flatnonzero(
+            (np.abs(levels.y - y) <= tolerance)
+            & (levels.xmin <= x)
+            & (x <= levels.xmax)
+        )
+        if len(hits) > 0:
+            ind = hits[np.argmin(np.abs(levels.y[hits] - y))]
+            return Hit("level", int(ind), str(levels.group[ind]), int(levels.step[ind]))
+
+        return None
+
+    def _layout_ip(self):
+        """Place the label of the IP."""
+        parser = self._parser
+        prec_level = parser.sett_prec[1]
+        total = parser.step_levels[-1]
+
+        if parser.sett_ip_label_pos == "Top":
+            ypos = self._ip + 0.01 * total
+            valign = "bottom"
+        else:
+            ypos = self._ip - 0.01 * total
+            valign = "top"
+        label = f"IP, {self._ip:.{prec_level}f}{self._unit_cm}"
+        term = parser.ip_term_plain if self._plain_labels else parser.ip_term
+        if term is not None:
+            label += f"{self._line_break}{term}"
+        self._add_label(TEXTPAD, ypos, label, "left", valign, "ip", "ip")
+
+    def _layout_low_lying(self):
+        """Place the low-lying states, the arrows from them, and their labels."""
+        parser = self._parser
+        prec_lambda, prec_level = parser.sett_prec
+        _, _, show_forbidden, show_strength = parser.sett_shows
+        is_low_lying = parser.is_low_lying
+        steps = np.flatnonzero(is_low_lying)
+        wavenumber_es = parser.step_levels[is_low_lying]
+        lambda_es = parser.step_nm[is_low_lying]
+        forbidden_es = parser.step_forbidden[is_low_lying]
+        strengths_es = parser.transition_strengths[is_low_lying]
+        terms_es = self._step_terms[is_low_lying]
+        colors_es = ut.color_wavelengths(lambda_es, self._darkmode)
+        # arrows from low-lying states have the wavenumber of the first step
+        first_step = ut.nm_to_cm_2(parser.step_nm[~is_low_lying])[0]
+
+        x_spacing = 1.5 if np.sum(strengths_es) == 0 or not show_strength else 2.0
+
+        for it in range(len(wavenumber_es)):
+            yval = MANIFOLD_Y_INCREMENT * self._ip * (1 + it)
+            self._levels.append(
+                (
+                    yval,
+                    x_spacing * it + 2.3,
+                    x_spacing * it + 3.7,
+                    "low_lying",
+                    steps[it],
+                )
+            )
+
+        for it in range(len(wavenumber_es)):  # these are never steps to IP
+            col = colors_es[it]
+            xval = FIRST_ARROW_X_MANIFOLD + x_spacing + it * x_spacing
+            yval = MANIFOLD_Y_INCREMENT * self._ip * (1 + it)
+            wstp = float(first_step) - yval
+
+            if not forbidden_es[it] or show_forbidden == "x-out":
+                self._arrows.append(
+                    (
+                        xval,
+                        yval,
+                        wstp,
+                        col,
+                        True,
+                        forbidden_es[it],
+                        "low_lying",
+                        steps[it],
+                    )
+                )
+
+                lambdastr = f"{lambda_es[it]:.{prec_lambda}f}{self._unit_nm}"
+                if show_strength and (strength := strengths_es[it]) != 0:
+                    lambdastr += f"\nA={self._format_strength(strength)}"
+                self._add_label(
+                    xval + TEXTPAD,
+                    yval + wstp / 2.0,
+                    lambdastr,
+                    "left",
+                    "center",
+                    "low_lying",
+                    "transition",
+                    color=col,
+                    rotation=90,
+                )
+
+            # NO LINEBREAK HERE ON THESE LINES!
+            levelstr = f"{wavenumber_es[it]:.{prec_level}f}{self._unit_cm}"
+            if terms_es[it] is not None:
+                levelstr += f", {terms_es[it]}"
+            self._add_label(
+                xval + 0.5, yval, levelstr, "left", "bottom", "low_lying", "level"
+            )
+
+    def _layout_steps(self):
+        """Place the levels, the arrows of the scheme steps, and their labels."""
+        parser = self._parser
+        prec_lambda, prec_level = parser.sett_prec
+        _, _, show_forbidden, show_strength = parser.sett_shows
+        last_step_to_ip_mode = parser.last_step_to_ip_mode
+        lbreak = self._line_break
+        total = parser.step_levels[-1]
+        wavenumber_gs = parser.gs_level
+
+        is_low_lying = parser.is_low_lying
+        steps = np.flatnonzero(~is_low_lying)
+        transition_steps = parser.step_levels[~is_low_lying]
+        forbidden_steps = parser.step_forbidden[~is_low_lying]
+        lambda_steps = parser.step_nm[~is_low_lying]
+        wavenumber_steps = ut.nm_to_cm_2(lambda_steps)
+        strengths_steps = parser.transition_strengths[~is_low_lying]
+        terms = self._step_terms[~is_low_lying]
+        colors = ut.color_wavelengths(lambda_steps, self._darkmode)
+        has_low_lying = np.any(is_low_lying)
+        num_steps = len(lambda_steps)
+
+        # horizontal lines for every transition except last and for IP,
+        # and for the state we come out of, if not ground state
+        for it, level in enumerate(transition_steps[:-1]):
+            if level < self._ip:
+                self._levels.append((level, 0.0, XMAX, "steps", steps[it]))
+        if wavenumber_gs > 0.0:
+            self._levels.append((wavenumber_gs, 0.0, XMAX, "steps", -1))
+
+        # bottom level
+        levelstr = f"{wavenumber_gs:.{prec_level}f}{self._unit_cm}"
+        term_gs = parser.gs_term_plain if self._plain_labels else parser.gs_term
+        if term_gs is not None:
+            levelstr += f"{lbreak}{term_gs}"
+        self._add_label(
+            XMAX - TEXTPAD, wavenumber_gs, levelstr, "right", "bottom", "steps", "level"
+        )
+
+        deltax = 8.65 / (num_steps + 1.0) - 0.5
+        xval = 0.0
+        yval_bott = wavenumber_gs
+        for it in range(num_steps):
+            col = colors[it]
+            xval += deltax
+            wstp = wavenumber_steps[it]
+            tstp = transition_steps[it]
+            is_last = it == num_steps - 1
+            drawn = not forbidden_steps[it] or show_forbidden == "x-out"
+
+            # the first arrow is moved left of the low-lying states
+            if it == 0 and has_low_lying:
+                xvalplot = FIRST_ARROW_X_MANIFOLD
+            else:
+                xvalplot = xval
+            if drawn:
+                filled = not (last_step_to_ip_mode and is_last)
+                self._arrows.append(
+                    (
+                        xvalplot,
+                        yval_bott,
+                        wstp,
+                        col,
+                        filled,
+                        forbidden_steps[it],
+                        "steps",
+                        steps[it],
+                    )
+                )
+
+            # little solid line for the last/end state
+            if not last_step_to_ip_mode and is_last:
+                self._levels.append((tstp, xval - 0.5, xval + 0.5, "steps", steps[it]))
+
+            # alignment of labels
+            if xval <= 5.0:
+                halignlam = "left"
+                halignlev = "right"
+                xloc_levelstr = XMAX - TEXTPAD
+            else:
+                halignlam = "right"
+                halignlev = "left"
+                xloc_levelstr = TEXTPAD
+
+            if drawn:
+                # wavelength text and transition strength
+                lambdastr = f"{lambda_steps[it]:.{prec_lambda}f}{self._unit_nm}"
+                if last_step_to_ip_mode and is_last:
+                    lambdastr = f"<{lambdastr}"
+                if show_strength and (strength := strengths_steps[it]) != 0:
+                    lambdastr += f"\nA={self._format_strength(strength)}"
+                self._add_label(
+                    xvalplot + TEXTPAD,
+                    tstp - wstp / 2.0,
+                    lambdastr,
+                    halignlam,
+                    "center",
+                    "steps",
+                    "transition",
+                    color=col,
+                    rotation=90,
+                )
+
+            # level text
+            levelstr = f"{tstp:.{prec_level}f}{self._unit_cm}"
+            if terms[it] is not None:
+                levelstr += f"{lbreak}{terms[it]}"
+            if is_last:
+                leveltextypos = tstp
+                leveltextvaalign = "center"
+            else:
+                leveltextypos = tstp - 0.01 * total
+                leveltextvaalign = "top"
+            if not last_step_to_ip_mode or not is_last:
+                self._add_label(
+                    xloc_levelstr,
+                    leveltextypos,
+                    levelstr,
+                    halignlev,
+                    leveltextvaalign,
+                    "steps",
+                    "level",
+                )
+
+            yval_bott = tstp
+
+    def _add_label(
+        self,
+        x: float,
+        y: float,
+        text: str,
+        ha: str,
+        va: str,
+        group: str,
+        kind: str,
+        color: Optional[str] = None,
+        rotation: float = 0,
+    ):
+        """Add a label, rotated labels are centered on multiple lines."""
+        ma = "center" if rotation else ha
+        self._labels.append((x, y, text, color, ha, va, ma, rotation, group, kind))
+
+    def _format_strength(self, value: float) -> str:
+        """Format a transition strength like the other labels."""
+        if self._plain_labels:
+            return f"{ut.my_exp_formatter(value, 1, plain=True)}\u2009s\u207b\u00b9"
+        return f"{ut.my_exp_formatter(value, 1)}$\\,s^{{-1}}$"
+
+    @property
+    def _line_break(self) -> str:
+        """Separator between levels and their terms."""
+        return "\n" if self._parser.sett_line_breaks else ", "
+
+    @property
+    def _step_terms(self) -> np.ndarray:
+        """Terms of all steps, formatted like the labels."""
+        if self._plain_labels:
+            return self._parser.step_terms_plain
+        return self._parser.step_terms
+
+
+def axis_ticks(vmax: float, length: float, size: float) -> List[float]:
+    """Get the ticks of an axis from 0 to `vmax`, like matplotlib's `AutoLocator`.
+
+    :param vmax: Upper limit of the axis.
+    :param length: Length of the axis in points.
+    :param size: Font size of the tick labels in points.
+
+    :return: Tick values within the limits.
+    """
+    nbins = max(min(int(length // (2 * size)), 9), 1)
+    scale = 10 ** math.floor(math.log10(vmax / nbins))
+    steps = _TICK_STEPS * scale
+    step = float(steps[np.argmax(steps >= vmax / nbins)])
+    # allow for rounding errors if the last tick is at the limit
+    return [it * step for it in range(math.floor(vmax / step + 1e-10) + 1)]
+
+
+def format_ticks(ticks: List[float]) -> List[str]:
+    """Format tick labels with the same number of decimals, like matplotlib.
+
+    :param ticks: Equally spaced tick values.
+
+    :return: Formatted tick labels.
+    """
+    if len(ticks) < 2:
+        return [f"{it:g}" for it in ticks]
+    step = f"{ticks[1] - ticks[0]:.10g}"
+    decimals = len(step.partition(".")[2]) if "e" not in step else 10
+    return [f"{it:.{decimals}f}" for it in ticks]
+
+
+def text_height(size: float) -> float:
+    """Estimate the height of a line of text in points."""
+    return (TEXT_ASCENT + TEXT_DESCENT) * size
+
+
+def text_width(text: str, size: float) -> float:
+    """Estimate the width of a line of text in points."""
+    return _CHAR_WIDTH * size * len(text)
+
+
+def _columns(cls: type, rows: list) -> NamedTuple:
+    """Create read-only column arrays from a list of rows.
+
+    :param cls: Named tuple of the columns.
+    :param rows: List of tuples with one value per column.
+
+    :return: Named tuple with one array per column.
+    """
+    columns = zip(*rows) if rows else [[]] * len(cls._fields)
+    arrays = []
+    for values, dtype in zip(columns, _DTYPES[cls]):
+        if dtype is object:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+        else:
+            array = np.array(values, dtype=dtype)
+        array.setflags(write=False)
+        arrays.append(array)
+    return cls(*arrays)
@@ -0,0 +1,586 @@
+"""Fetch ionization potentials from the NIST Atomic Spectra Database.
+
+Raw responses of NIST are cached on disk, such that the IP table can be rebuilt
+without network access. Run `python -m rimsschemedrawer.nist --help` to see how to
+update the packaged IP table.
+
+The NIST database can be found here:
+https://physics.nist.gov/PhysRefData/ASD/levels_form.html
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+from rimsschemedrawer.ip_table import DEFAULT_TABLE, IPTable, get_ip_table
+
+NIST_URL = "https://physics.nist.gov/cgi-bin/ASD/energy1.pl"
+
+# Reference of all values that are taken from NIST
+NIST_REFERENCE_KEY = "nist_asd_2024"
+NIST_REFERENCE = {
+    "author": "NIST ASD",
+    "year": 2024,
+    "url": "https://www.nist.gov/pml/atomic-spectra-database",
+}
+
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30 days
+
+# All elements that are requested from NIST. As of 2024-02-29, there are no IPs for
+# the elements from Mt on.
+ELEMENTS = [
+    "H",
+    "He",
+    "Li",
+    "Be",
+    "B",
+    "C",
+    "N",
+    "O",
+    "F",
+    "Ne",
+    "Na",
+    "Mg",
+    "Al",
+    "Si",
+    "P",
+    "S",
+    "Cl",
+    "Ar",
+    "K",
+    "Ca",
+    "Sc",
+    "Ti",
+    "V",
+    "Cr",
+    "Mn",
+    "Fe",
+    "Co",
+    "Ni",
+    "Cu",
+    "Zn",
+    "Ga",
+    "Ge",
+    "As",
+    "Se",
+    "Br",
+    "Kr",
+    "Rb",
+    "Sr",
+    "Y",
+    "Zr",
+    "Nb",
+    "Mo",
+    "Tc",
+    "Ru",
+    "Rh",
+    "Pd",
+    "Ag",
+    "Cd",
+    "In",
+    "Sn",
+    "Sb",
+    "Te",
+    "I",
+    "Xe",
+    "Cs",
+    "Ba",
+    "La",
+    "Ce",
+    "Pr",
+    "Nd",
+    "Pm",
+    "Sm",
+    "Eu",
+    "Gd",
+    "Tb",
+    "Dy",
+    "Ho",
+    "Er",
+    "Tm",
+    "Yb",
+    "Lu",
+    "Hf",
+    "Ta",
+    "W",
+    "Re",
+    "Os",
+    "Ir",
+    "Pt",
+    "Au",
+    "Hg",
+    "Tl",
+    "Pb",
+    "Bi",
+    "Po",
+    "At",
+    "Rn",
+    "Fr",
+    "Ra",
+    "Ac",
+    "Th",
+    "Pa",
+    "U",
+    "Np",
+    "Pu",
+    "Am",
+    "Cm",
+    "Bk",
+    "Cf",
+    "Es",
+    "Fm",
+    "Md",
+    "No",
+    "Lr",
+    "Rf",
+    "Db",
+    "Sg",
+    "Bh",
+    "Hs",
+    "Mt",
+    "Ds",
+    "Rg",
+    "Cn",
+    "Nh",
+    "Fl",
+    "Mc",
+    "Lv",
+    "Ts",
+    "Og",
+]
+
+# Query of the levels form, the spectrum is added per request
+_QUERY = {
+    "de": "0",
+    "units": "0",
+    "format": "2",
+    "output": "0",
+    "page_size": "15",
+    "multiplet_ordered": "0",
+    "conf_out": "on",
+    "term_out": "on",
+    "level_out": "on",
+    "unc_out": "1",
+    "j_out": "on",
+    "lande_out": "on",
+    "perc_out": "on",
+    "biblio": "on",
+    "temp": "",
+    "submit": "Retrieve Data",
+}
+
+_ROMAN = [
+    (100, "C"),
+    (90, "XC"),
+    (50, "L"),
+    (40, "XL"),
+    (10, "X"),
+    (9, "IX"),
+    (5, "V"),
+    (4, "IV"),
+    (1, "I"),
+]
+
+
+class NistFetcher:
+    """Fetch energy levels from NIST with an on-disk cache of the raw responses.
+
+    Cached responses younger than `max_age` are used without network access. Older
+    ones are refreshed with a conditional request, such that unchanged responses
+    are not transferred again. If NIST cannot be reached, stale responses are used.
+    In offline mode, only cached responses are used.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        url: str = NIST_URL,
+        max_age: float = DEFAULT_MAX_AGE,
+        offline: bool = False,
+        retries: int = 3,
+        retry_delay: float = 1.0,
+        timeout: float = 30.0,
+    ):
+        """Initialize the fetcher.
+
+        :param cache_dir: Folder to cache the raw responses in, created if necessary.
+        :param url: URL of the NIST levels form.
+        :param max_age: Maximum age of cached responses in seconds before they are
+            refreshed.
+        :param offline: If True, only cached responses are used.
+        :param retries: Number of retries if a request fails.
+        :param retry_delay: Delay before the first retry in seconds, doubled for
+            every further retry.
+        :param timeout: Timeout of a single request in seconds.
+        """
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.url = url
+        self.max_age = max_age
+        self.offline = offline
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def fetch(self, element: str, charge: int = 0) -> str:
+        """Get the raw csv response of NIST for an element in a charge state.
+
+        :param element: Element symbol.
+        :param charge: Charge state, 0 for the neutral atom.
+
+        :return: Raw csv response.
+
+        :raises FileNotFoundError: Offline mode and the response is not cached.
+        :raises urllib.error.URLError: NIST cannot be reached and the response is
+            not cached.
+        """
+        fcsv, fmeta = self._cache_files(element, charge)
+        meta = _read_json(fmeta) if fcsv.exists() else None
+
+        if meta is not None and (
+            self.offline or time.time() - meta["fetched"] < self.max_age
+        ):
+            return fcsv.read_text(encoding="utf-8")
+        if self.offline:
+            raise FileNotFoundError(f"{element} {_roman(charge + 1)} is not cached.")
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            status, text, response_headers = self._request(
+                self.query_url(element, charge), headers
+            )
+        except (urllib.error.URLError, TimeoutError):
+            if meta is None:
+                raise
+            return fcsv.read_text(encoding="utf-8")  # stale, but better than nothing
+
+        if status == 304:
+            text = fcsv.read_text(encoding="utf-8")
+            response_headers = meta
+        else:
+            _write_atomic(fcsv, text)
+
+        meta = {
+            "etag": response_headers.get("etag"),
+            "last_modified": response_headers.get("last_modified"),
+            "fetched": time.time(),
+        }
+        _write_atomic(fmeta, json.dumps(meta))
+        return text
+
+    def fetch_ips(
+        self, keys: Iterable[Tuple[str, int]], jobs: int = 8
+    ) -> Tuple[Dict[Tuple[str, int], Tuple[float, float]], Dict[Tuple[str, int], str]]:
+        """Fetch and parse the IPs of many elements and charge states concurrently.
+
+        :param keys: Tuples of element symbol and charge state.
+        :param jobs: Maximum number of concurrent requests.
+
+        :return: Dictionary with IP and uncertainty in cm-1 per key, and dictionary
+            with an error message per key that could not be fetched or parsed.
+            Both dictionaries are in the order of the given keys.
+        """
+        keys = list(keys)
+
+        def fetch_ip(key):
+            return parse_limit(self.fetch(*key))
+
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = {pool.submit(fetch_ip, key): key for key in keys}
+            for future in concurrent.futures.as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as err:
+                    results[key] = f"{type(err).__name__}: {err}"
+
+        ips = {}
+        errors = {}
+        for key in keys:
+            if results[key] is None:
+                errors[key] = "No ionization limit found."
+            elif isinstance(results[key], str):
+                errors[key] = results[key]
+            else:
+                ips[key] = results[key]
+        return ips, errors
+
+    def query_url(self, element: str, charge: int = 0) -> str:
+        """Get the URL of the NIST levels form for an element in a charge state.
+
+        :param element: Element symbol.
+        :param charge: Charge state, 0 for the neutral atom.
+
+        :return: URL that returns the levels as csv.
+        """
+        query = {"spectrum": f"{element} {_roman(charge + 1)}", **_QUERY}
+        return f"{self.url}?{urllib.parse.urlencode(query)}"
+
+    def _cache_files(self, element: str, charge: int) -> Tuple[Path, Path]:
+        """Get the cached response and its metadata file for an element."""
+        fname = self.cache_dir.joinpath(f"{element}_{charge}")
+        return fname.with_suffix(".csv"), fname.with_suffix(".json")
+
+    def _request(self, url: str, headers: Dict[str, str]) -> Tuple[int, str, Dict]:
+        """Send a GET request and retry on connection and server errors.
+
+        :return: Status code, decoded body, and the cache headers of the response.
+        """
+        request = urllib.request.Request(url, headers=headers)
+        for attempt in range(self.retries + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                    text = resp.read().decode("utf-8", errors="replace")
+                    cache_headers = {
+                        "etag": resp.headers.get("ETag"),
+                        "last_modified": resp.headers.get("Last-Modified"),
+                    }
+                    return resp.status, text, cache_headers
+            except urllib.error.HTTPError as err:
+                if err.code == 304:
+                    return 304, "", {}
+                if err.code < 500 or attempt == self.retries:
+                    raise
+            except (urllib.error.URLError, TimeoutError):
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.retry_delay * 2**attempt)
+
+
+def parse_limit(text: str) -> Optional[Tuple[float, float]]:
+    """Parse the ionization limit from a csv response of NIST.
+
+    Values are exported as `="..."` to keep spreadsheet programs from converting
+    them. Estimated values are given in brackets.
+
+    :param text: Raw csv response.
+
+    :return: IP and its uncertainty in cm-1, `nan` if the uncertainty is not given.
+        `None` if no limit is given.
+    """
+    rows = [
+        [cell.lstrip("=").strip('"').strip() for cell in row]
+        for row in csv.reader(text.splitlines())
+    ]
+    if not rows:
+        return None
+
+    header = rows[0]
+    level_col = next(
+        (it for it, col in enumerate(header) if col.startswith("Level")), 4
+    )
+    unc_col = next(
+        (it for it, col in enumerate(header) if col.startswith("Uncertainty")), None
+    )
+
+    for row in rows[1:]:
+        if not any("Limit" in cell for cell in row):
+            continue
+
+        # the level might be preceded by a column with a bracket for estimated values
+        ip = None
+        for cell in row[level_col : level_col + 2]:
+            if (ip := _to_float(cell)) is not None:
+                break
+        if ip is None:
+            return None
+
+        unc = np.nan
+        if unc_col is not None and unc_col < len(row):
+            if (val := _to_float(row[unc_col])) is not None:
+                unc = val
+        return ip, unc
+
+    return None
+
+
+def update_ip_table(
+    table: IPTable, ips: Dict[Tuple[str, int], Tuple[float, float]]
+) -> IPTable:
+    """Update the IPs from NIST in a table.
+
+    Rows with references other than NIST are kept as they are. New rows are added
+    after the existing ones, sorted by charge state and then in the order of
+    `ELEMENTS`, such that the same input always creates the same table.
+
+    :param table: Table to update.
+    :param ips: IP and uncertainty in cm-1 per element and charge state, see
+        `NistFetcher.fetch_ips`.
+
+    :return: Updated table.
+    """
+    references = {**table.references, NIST_REFERENCE_KEY: NIST_REFERENCE}
+    columns = {
+        "element": table.element.tolist(),
+        "charge": table.charge.tolist(),
+        "ip": table.ip.tolist(),
+        "uncertainty": table.uncertainty.tolist(),
+        "reference": table.reference.tolist(),
+    }
+
+    order = {ele: it for it, ele in enumerate(ELEMENTS)}
+    new_keys = sorted(
+        (key for key in ips if key not in table),
+        key=lambda key: (key[1], order.get(key[0], len(order)), key[0]),
+    )
+    for ele, chg in new_keys:
+        columns["element"].append(ele)
+        columns["charge"].append(chg)
+        columns["ip"].append(np.nan)
+        columns["uncertainty"].append(np.nan)
+        columns["reference"].append(NIST_REFERENCE_KEY)
+
+    for row, key in enumerate(zip(columns["element"], columns["charge"])):
+        is_nist = references[columns["reference"][row]]["author"] == "NIST ASD"
+        if key in ips and is_nist:
+            columns["ip"][row], columns["uncertainty"][row] = ips[key]
+            columns["reference"][row] = NIST_REFERENCE_KEY
+
+    used = set(columns["reference"])
+    references = {key: val for key, val in references.items() if key in used}
+    return IPTable(references=references, **columns)
+
+
+def write_ip_json(ips: Dict[Tuple[str, int], Tuple[float, float]], fout: Path):
+    """Write the first IPs to a json file with the element symbols as keys.
+
+    :param ips: IP and uncertainty in cm-1 per element and charge state, see
+        `NistFetcher.fetch_ips`.
+    :param fout: File to write to.
+    """
+    first_ips = {ele: ips[(ele, 0)][0] for ele in ELEMENTS if (ele, 0) in ips}
+    with open(fout, "w", encoding="utf-8") as fobj:
+        json.dump(first_ips, fobj, indent=4)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Fetch the IPs from NIST and update the IP table.
+
+    :param argv: Command line arguments, defaults to `sys.argv[1:]`.
+
+    :return: Exit code, 0 if the IPs of all elements were found.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m rimsschemedrawer.nist",
+        description="Fetch ionization potentials from the NIST ASD.",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=Path("nist_cache"),
+        help="Folder of the cache of raw responses (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only use cached responses, do not connect to NIST.",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE / (24 * 3600),
+        help="Refresh cached responses older than this, in days (default: "
+        "%(default).0f).",
+    )
+    parser.add_argument(
+        "--charges",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="Charge states to fetch, 0 for the first IP (default: 0).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent requests (default: %(default)s).",
+    )
+    parser.add_argument("--url", default=NIST_URL, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--table",
+        type=Path,
+        default=DEFAULT_TABLE,
+        help="IP table to update (default: the packaged table).",
+    )
+    parser.add_argument(
+        "--json",
+        type=Path,
+        default=None,
+        help="Also write the first IPs to this json file, e.g., ip_nist.json.",
+    )
+
+    args = parser.parse_args(argv)
+
+    fetcher = NistFetcher(
+        args.cache, url=args.url, max_age=args.max_age * 24 * 3600, offline=args.offline
+    )
+    keys = [(ele, chg) for chg in args.charges for ele in ELEMENTS]
+    ips, errors = fetcher.fetch_ips(keys, jobs=args.jobs)
+
+    for (ele, chg), err in errors.items():
+        print(f"{ele} {_roman(chg + 1)}: {err}", file=sys.stderr)
+
+    table = update_ip_table(IPTable.from_file(args.table), ips)
+    table.save(args.table)
+    get_ip_table.cache_clear()
+    if args.json is not None:
+        write_ip_json(ips, args.json)
+
+    print(f"Found {len(ips)} of {len(keys)} IPs.")
+    return 1 if errors else 0
+
+
+def _read_json(fin: Path) -> Optional[dict]:
+    """Read a json file, `None` if it does not exist or is broken."""
+    try:
+        return json.loads(fin.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _roman(num: int) -> str:
+    """Convert a positive integer to a roman numeral, e.g., for spectra names."""
+    ret = ""
+    for val, sym in _ROMAN:
+        cnt, num = divmod(num, val)
+        ret += sym * cnt
+    return ret
+
+
+def _to_float(value: str) -> Optional[float]:
+    """Convert a cell to a float, ignoring brackets. `None` if not a number."""
+    try:
+        return float(value.strip("[]()?+ "))
+    except ValueError:
+        return None
+
+
+def _write_atomic(fname: Path, content: str):
+    """Write a file such that concurrent readers never see a partial file."""
+    ftmp = fname.with_suffix(f"{fname.suffix}.{os.getpid()}.{id(content)}.tmp")
+    ftmp.write_text(content, encoding="utf-8")
+    os.replace(ftmp, fname)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
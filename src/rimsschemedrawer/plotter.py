@@ -1,27 +1,250 @@
 """Plotting functions and class for the rims scheme drawer."""
 
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
+import io
+import os
+from pathlib import Path
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import warnings
 
 import matplotlib
-import matplotlib.pyplot as plt
+import matplotlib.image
+from matplotlib.axes import Axes
+from matplotlib.axis import Axis
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_svg import RendererSVG
+from matplotlib.cbook import is_math_text
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.mathtext import MathTextParser
+from matplotlib.text import Text
+from matplotlib.textpath import text_to_path
+from matplotlib.ticker import AutoLocator
 import numpy as np
 
 from rimsschemedrawer.json_parser import ConfigParser
+from rimsschemedrawer.layout import COLORS
 from rimsschemedrawer import utils as ut
 
+# matplotlib's mathtext parser is not thread-safe. Only parsing new mathtext is
+# serialized, figures are built, drawn, and saved in parallel.
+_MATHTEXT_LOCK = threading.RLock()
+
+# Number of parsed mathtext strings that are shared between all standalone figures
+MATHTEXT_CACHE_SIZE = 2048
+
+# Available layouts of the axes within the figure, see `Plotter`
+LAYOUTS = ["tight", "analytic"]
+
+# Salt of the ids in svg files, fixed such that saved files are reproducible
+SVG_HASHSALT = "rimsschemedrawer"
+
+# Metadata that holds the time of saving, removed from saved files
+_TIME_METADATA = {"pdf": "CreationDate", "svg": "Date"}
+
+# matplotlib's mathtext parsers of each thread, see `_parse_mathtext`
+_THREAD_PARSERS = threading.local()
+
+# Arguments of `MathTextParser` for the output types of matplotlib's parsers
+_MATHTEXT_OUTPUTS = {"vector": "path", "raster": "agg"}
+
+# Comment with the time of saving in ps and eps files, which have no metadata for it
+_PS_CREATION_DATE_RE = re.compile(rb"^%%CreationDate: [^\n]*\n", re.MULTILINE)
+
+
+class _SharedMathTextParser(MathTextParser):
+    """Mathtext parser with a larger cache that is shared between figures.
+
+    matplotlib creates a parser per renderer, and thus per figure, with a cache of
+    only 50 strings. Rendering many schemes parses the same labels over and over.
+    Parsed strings are cached in `_parse_mathtext` instead. Only the public
+    `parse` method of matplotlib's parser is used.
+    """
+
+    def __init__(self, output: str):
+        """Initialize the parser.
+
+        :param output: Output of the parser, "path" for vector or "agg" for raster
+            renderers.
+        """
+        super().__init__(output)
+        self.output = output
+
+    def parse(self, s: str, dpi: float = 72, prop=None, **kwargs):
+        # vector output refers to the fonts it was parsed with, which matplotlib
+        # loads per thread, such that it must not be used from other threads
+        thread_id = threading.get_ident() if self.output == "path" else None
+        return _parse_mathtext(
+            self.output,
+            thread_id,
+            s,
+            dpi,
+            None if prop is None else prop.copy(),
+            tuple(sorted(kwargs.items())),
+            (
+                matplotlib.rcParams["text.hinting"],
+                matplotlib.rcParams["text.antialiased"],
+            ),
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_mathtext_parser(output: str) -> _SharedMathTextParser:
+    """Get the shared parser for "path" or "agg" output."""
+    return _SharedMathTextParser(output)
+
+
+def _shared_parser_like(parser) -> Optional[_SharedMathTextParser]:
+    """Get the shared parser with the same output as the parser of a renderer.
+
+    The output type of a renderer's parser depends on the matplotlib version and is
+    only stored in a private attribute.
+
+    :param parser: Parser of a renderer.
+
+    :return: Shared parser, `None` if the output of the parser is not known.
+    """
+    output_type = getattr(parser, "_output_type", None)
+    if output_type not in _MATHTEXT_OUTPUTS:
+        return None
+    return _shared_mathtext_parser(_MATHTEXT_OUTPUTS[output_type])
+
+
+@functools.lru_cache(maxsize=MATHTEXT_CACHE_SIZE)
+def _parse_mathtext(
+    output: str,
+    thread_id: Optional[int],
+    s: str,
+    dpi: float,
+    prop: Optional[FontProperties],
+    kwargs: tuple,
+    rc: tuple,
+):
+    """Parse mathtext with matplotlib's parser, cached for all figures.
+
+    Cached strings are looked up without locking, only parsing holds the lock.
+
+    :param output: Output of the parser, see `_SharedMathTextParser`.
+    :param thread_id: Thread that uses vector output, `None` for raster output.
+    :param s: Mathtext to parse.
+    :param dpi: Resolution of the renderer.
+    :param prop: Font properties.
+    :param kwargs: Further keyword arguments of `MathTextParser.parse` as tuple of
+        items.
+    :param rc: Hinting and antialiasing rc parameters, which are used by the parser.
+
+    :return: Parsed mathtext as returned by `MathTextParser.parse`.
+    """
+    with _MATHTEXT_LOCK:
+        # matplotlib's parsers have their own cache, which must not return vector
+        # output of other threads
+        parsers = vars(_THREAD_PARSERS).setdefault("parsers", {})
+        if output not in parsers:
+            parsers[output] = MathTextParser(output)
+        return parsers[output].parse(s, dpi, prop, **dict(kwargs))
+
+
+def _clear_mathtext_caches():
+    """Clear the caches of parsed mathtext and text extents.
+
+    Parsed mathtext refers to the fonts it was created with. Forked processes share
+    the file positions of these fonts with their parent, such that reading glyphs
+    from several processes fails. matplotlib clears its font cache after forks for
+    the same reason.
+    """
+    _parse_mathtext.cache_clear()
+    vars(_THREAD_PARSERS).clear()
+    _text_extent.cache_clear()
+
+
+class _CanvasAgg(FigureCanvasAgg):
+    """Agg canvas whose renderers use the shared mathtext parser.
+
+    If the parser of the renderer is not known, see `_shared_parser_like`, the
+    renderer keeps it.
+    """
+
+    def get_renderer(self, *args, **kwargs):
+        renderer = super().get_renderer(*args, **kwargs)
+        parser = getattr(renderer, "mathtext_parser", None)
+        if not isinstance(parser, _SharedMathTextParser) and (
+            shared := _shared_parser_like(parser)
+        ):
+            renderer.mathtext_parser = shared
+        return renderer
+
+
+class _Figure(Figure):
+    """Figure whose vector renderers use the shared mathtext parser.
+
+    The renderers of vector formats, e.g., pdf and svg, are created for every saved
+    file and lay out mathtext with their own parser. Sharing it means that saving a
+    figure in several vector formats only parses each label once.
+
+    Ids in svg files are derived from `SVG_HASHSALT` instead of a random salt,
+    unless the `svg.hashsalt` rc parameter is set.
+
+    Both rely on private attributes of matplotlib's renderers. If a matplotlib
+    version does not have them, the renderers keep their own parser and ids.
+    """
+
+    def draw(self, renderer):
+        # vector renderers are wrapped into a `MixedModeRenderer`
+        base_renderer = getattr(renderer, "_renderer", renderer)
+        text2path = getattr(base_renderer, "_text2path", None)
+        parser = getattr(text2path, "mathtext_parser", None)
+        if not isinstance(parser, _SharedMathTextParser) and (
+            shared := _shared_parser_like(parser)
+        ):
+            text2path.mathtext_parser = shared
+        if (
+            isinstance(base_renderer, RendererSVG)
+            and hasattr(base_renderer, "_make_id")
+            and matplotlib.rcParams["svg.hashsalt"] is None
+        ):  # only for this renderer, i.e., this file
+            base_renderer._make_id = _make_svg_id
+        super().draw(renderer)
+
 
 class Plotter:
     def __init__(self, data: dict, **kwargs):
         """Initialize the plotting class.
 
+        The plotter does not change any global matplotlib settings. All colors and
+        font sizes are set directly on the figure and its artists. If `pyplot=False`
+        is given, a standalone figure is created that is not registered with pyplot,
+        such that many schemes can be rendered in parallel threads, one plotter per
+        thread. Only parsing mathtext labels that were not parsed before is
+        serialized between threads. A single plotter is drawn by one thread at a
+        time, see `savefig`, `export`, and `to_rgba`.
+
         :param data: Dictionary with the data to plot, directly from json file.
         :param kwargs: Additional keyword arguments.
             - number_of_steps: How many scheme steps to consider, default is 7.
                 This number can be higher than the number of available steps!
             - fig_ax: Tuple of matplotlib figure and axes to plot on. Defaults to
                 creating new ones.
+            - pyplot: Create the figure with pyplot, default is True. If False, a
+                standalone figure with an Agg canvas is created. Ignored if `fig_ax`
+                is given.
             - darkmode: Overwrite the darkmode settings from the config file.
             - transparent: Overwrite the transparency settings from the config file.
+            - plain_labels: Write all labels as plain text with Unicode super- and
+                subscripts, e.g., "cm⁻¹", instead of mathtext, default is False.
+                This is faster, e.g., for previews or rendering many schemes, but
+                does not look exactly the same.
+            - layout: How to fit the axes into the figure, see `LAYOUTS`. "tight"
+                (default) uses matplotlib's tight layout, which draws the figure to
+                measure all labels. "analytic" calculates the margins from font
+                metrics of the labels without drawing, which is faster and does not
+                depend on the renderer, but can differ slightly from "tight".
         """
         self.config_parser = ConfigParser(data)
 
@@ -35,432 +258,749 @@ class Plotter:
             )
 
         # set kwargs
+        self._kwargs = kwargs
+        self._lock = threading.RLock()  # draws of this figure, see `to_rgba`
         self.number_of_steps = kwargs.get("number_of_steps", 7)
 
-        # matplotlib parameters
-        # tick size
-        fsz_axes = self.config_parser.sett_fontsize[0]
-        matplotlib.rc("xtick", labelsize=fsz_axes, direction="in")
-        matplotlib.rc("ytick", labelsize=fsz_axes, direction="in")
-
-        darkmode = kwargs.get("darkmode", self.config_parser.sett_plot_dark)
+        self._set_colors(kwargs.get("darkmode", self.config_parser.sett_plot_dark))
         self.transparent = kwargs.get(
             "transparent", self.config_parser.sett_plot_transparent
         )
 
         # figure stuff
-        if darkmode:
-            plt.style.use("dark_background")
-        else:
-            plt.style.use("default")
+        if "fig_ax" in kwargs:
+            self._figure, self._axes = kwargs["fig_ax"]
+        elif kwargs.get("pyplot", True):
+            import matplotlib.pyplot as plt
 
-        self._figure, self._axes = kwargs.get("fig_ax", plt.subplots(1, 1))
-
-        # Colors for headspace and main
-        if darkmode:
-            self.colmain = "#ffffff"
-            self.colhdr = "#4b5482"  # header color
+            self._figure, self._axes = plt.subplots(1, 1, FigureClass=_Figure)
         else:
-            self.colmain = "#000000"
-            self.colhdr = "#adbbff"  # header color
+            self._figure = _Figure()
+            _CanvasAgg(self._figure)
+            self._axes = self._figure.add_subplot(1, 1, 1)
+        self._twin_axes = self._axes.twinx()
 
-        self.darkmode = darkmode
+        # artists and their input values per group, see `_plotit`
+        self._artists = {}
+        self._keys = {}
 
         # now plot the scheme
         self._plotit()
 
     @property
-    def axes(self) -> plt.Axes:
+    def axes(self) -> Axes:
         """Return the axes."""
         return self._axes
 
     @property
-    def figure(self) -> plt.Figure:
+    def figure(self) -> Figure:
         """Return the figure."""
-        if self.transparent:
-            self._figure.patch.set_alpha(0.0)
-            self._figure.axes[0].patch.set_alpha(0.0)
+        alpha = 0.0 if self.transparent else None
+        self._figure.patch.set_alpha(alpha)
+        self._axes.patch.set_alpha(alpha)
         return self._figure
 
-    def savefig(self, fout: str):
+    def savefig(self, fout: str, **kwargs):
         """Save the figure to a file.
 
+        Saved files are reproducible: the same scheme gives byte-identical files
+        with the same versions of this package and matplotlib. Creation dates are
+        removed from the metadata and ids in svg files are derived from
+        `SVG_HASHSALT`, unless given otherwise in `metadata` or the rc parameters.
+
         :param fout: File name to save the plot to. The file extension determines
             the file type.
+        :param kwargs: Additional keyword arguments passed on to
+            `matplotlib.figure.Figure.savefig`, e.g., `dpi` or `format`.
         """
-        self._figure.savefig(fout)
+        with self._lock:
+            _savefig(self.figure, fout, **kwargs)
+
+    def export(
+        self,
+        fout: Union[str, Path],
+        formats: Sequence[str] = ("pdf", "svg", "png"),
+        dpi: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """Save the figure in several formats at once.
+
+        The figure is laid out once and drawn once per format, where the vector
+        formats share the parsed mathtext labels. Files are reproducible, see
+        `savefig`. A png is encoded from the drawn pixels in a background thread,
+        while the other formats are drawn.
+
+        :param fout: File name, the extension is replaced by the one of each format.
+        :param formats: Formats to save, e.g., "pdf", "svg", or "png".
+        :param dpi: Resolution of the figure, defaults to the matplotlib setting.
+
+        :return: Time in seconds it took to save each format.
+        """
+        fout = Path(fout)
+        formats = [it.lower().lstrip(".") for it in formats]
+        timings = {}
+
+        with self._lock, ThreadPoolExecutor(max_workers=1) as executor:
+            png = None
+            if "png" in formats:
+                start = time.perf_counter()
+                # same resolution as `savefig`, copy before the buffer is redrawn
+                png_dpi = matplotlib.rcParams["savefig.dpi"] if dpi is None else dpi
+                if png_dpi == "figure":
+                    png_dpi = self.figure.dpi
+                rgba = self.to_rgba(dpi=png_dpi).copy()
+                timings["png"] = time.perf_counter() - start
+                png = executor.submit(
+                    _timed,
+                    matplotlib.image.imsave,
+                    fout.with_suffix(".png"),
+                    rgba,
+                    format="png",
+                    origin="upper",
+                    dpi=png_dpi,
+                )
 
-    def _plotit(self):
-        # textpad
-        textpad = 0.4
-        # percentage to increase for manifold
-        mfld_yinc = 0.04  # in # of ipvalue
-        firstarrowxmfl = 1.0
+            for fmt in formats:
+                if fmt == "png":
+                    continue
+                start = time.perf_counter()
+                _savefig(self.figure, fout.with_suffix(f".{fmt}"), format=fmt, dpi=dpi)
+                timings[fmt] = time.perf_counter() - start
 
-        # get formatting settings
-        _, fsz_axes_labels, fsz_labels, fsz_title = self.config_parser.sett_fontsize
-        sett_headspace = self.config_parser.sett_headspace
-        sett_arr, sett_arr_head = self.config_parser.sett_arrow_fmt
-        prec_lambda, prec_level = self.config_parser.sett_prec
-        title_entry = self.config_parser.sett_title
-        (
-            show_cm_1_ax,
-            show_ev_ax,
-            show_forbidden_trans,
-            show_trans_strength,
-        ) = self.config_parser.sett_shows
-        if self.config_parser.sett_line_breaks:
-            lbreak = "\n"
-        else:
-            lbreak = ", "
-
-        # ground state, IP, total wavenumber
-        wavenumber_gs = self.config_parser.gs_level
-        ipvalue = self.config_parser.ip_level
-        totwavenumber_photons = self.config_parser.step_levels[-1]
-        term_symb_ip = self.config_parser.ip_term
-        term_symb_gs = self.config_parser.gs_term
-
-        # get data for actual steps, low-lying excluded
-        transition_strengths_steps = self.config_parser.transition_strengths[
-            ~self.config_parser.is_low_lying
-        ]
+            if png is not None:
+                timings["png"] += png.result()
 
-        transition_steps = self.config_parser.step_levels[
-            ~self.config_parser.is_low_lying
-        ]
-        forbidden_steps = self.config_parser.step_forbidden[
-            ~self.config_parser.is_low_lying
-        ]
-        lambda_steps = self.config_parser.step_nm[~self.config_parser.is_low_lying]
-        wavenumber_steps = ut.nm_to_cm_2(lambda_steps)
-        term_symb = self.config_parser.step_terms[~self.config_parser.is_low_lying]
-
-        # get low-lying information
-        wavenumber_es = self.config_parser.step_levels[self.config_parser.is_low_lying]
-        lambda_step_es = self.config_parser.step_nm[self.config_parser.is_low_lying]
-        transition_strengths_es = self.config_parser.transition_strengths[
-            self.config_parser.is_low_lying
-        ]
-        forbidden_es = self.config_parser.step_forbidden[
-            self.config_parser.is_low_lying
-        ]
-        term_symb_es_formatted = self.config_parser.step_terms[
-            self.config_parser.is_low_lying
-        ]
+        return {fmt: timings[fmt] for fmt in formats}
 
-        # ymax:
-        if ipvalue > totwavenumber_photons + wavenumber_gs:
-            ymax = ipvalue + sett_headspace
-        else:
-            ymax = totwavenumber_photons + wavenumber_gs + sett_headspace
+    def to_rgba(
+        self, dpi: Optional[float] = None, size: Optional[Tuple[float, float]] = None
+    ) -> np.ndarray:
+        """Render the figure into an RGBA array, without encoding it to a file.
 
-        # ### CREATE FIGURE ###
-        a2 = self._axes.twinx()
-        self._figure.set_size_inches(*self.config_parser.sett_fig_size, forward=True)
+        The figure is drawn on an Agg canvas and the array is a view of the canvas
+        buffer, i.e., no copy is made. The buffer is overwritten by the next draw of
+        the figure, so copy the array if you want to keep it.
+        Figures with a canvas other than Agg, e.g., of the pdf backend, are drawn
+        on a temporary Agg canvas.
 
-        # shade the level above the IP
-        xshade = [0.0, 10.0]  # x-axis of the shade (which is never displayed)
-        self._axes.fill_between(
-            xshade, ipvalue, ymax * 10.0, facecolor=self.colhdr, alpha=0.5
-        )
+        :param dpi: Resolution of the image, defaults to the dpi of the figure.
+        :param size: Width and height of the figure in inches, defaults to the size
+            of the scheme. The layout of the axes is fitted to the new size.
+            Figure size and layout are restored afterwards.
 
-        # label the IP
-        if self.config_parser.sett_ip_label_pos == "Top":
-            iplabelypos = ipvalue + 0.01 * totwavenumber_photons
-            iplabelyalign = "bottom"
-        else:
-            iplabelypos = ipvalue - 0.01 * totwavenumber_photons
-            iplabelyalign = "top"
-        iplabelstr = f"IP, {ipvalue:.{prec_level}f}$\\,$cm$^{{-1}}$"
-        if term_symb_ip is not None:
-            iplabelstr += f"{lbreak}{term_symb_ip}"
-        # ip above or below
-        self._axes.text(
-            textpad,
-            iplabelypos,
-            iplabelstr,
-            color=self.colmain,
-            ha="left",
-            va=iplabelyalign,
-            size=fsz_labels,
+        :return: Array of shape (height, width, 4) with dtype uint8.
+        """
+        figure = self.figure
+        canvas = figure.canvas
+        orig_dpi = figure.dpi
+        orig_size = figure.get_size_inches()
+        orig_subplotpars = {
+            key: getattr(figure.subplotpars, key)
+            for key in ("left", "right", "bottom", "top", "wspace", "hspace")
+        }
+
+        with self._lock:
+            try:
+                if not isinstance(canvas, FigureCanvasAgg):
+                    _CanvasAgg(figure)  # sets itself as canvas of the figure
+                if dpi is not None:
+                    figure.set_dpi(dpi)
+                if size is not None:
+                    figure.set_size_inches(*size, forward=False)
+                    self._fit_layout()
+                figure.canvas.draw()
+                buffer = np.asarray(figure.canvas.buffer_rgba())
+            finally:
+                figure.set_canvas(canvas)
+                figure.set_dpi(orig_dpi)
+                if size is not None:
+                    figure.set_size_inches(*orig_size, forward=False)
+                    figure.subplots_adjust(**orig_subplotpars)
+
+        return buffer
+
+    def resize(self, size: Tuple[float, float]):
+        """Change the size of the figure in place and fit the axes to it.
+
+        The artists are kept, only the layout of the axes is recalculated. The size
+        of the scheme is restored by the next `update` that redraws the axes.
+
+        :param size: Width and height of the figure in inches.
+        """
+        self._figure.set_size_inches(*size, forward=True)
+        # start from the default positions, like a new figure of this size
+        self._figure.subplots_adjust(
+            **{
+                key: matplotlib.rcParams[f"figure.subplot.{key}"]
+                for key in ("left", "right", "bottom", "top")
+            }
         )
+        self._fit_layout()
+        if tuple(size) == tuple(self.config_parser.sett_fig_size):
+            self._keys["axes"] = self._group_keys(self._scheme_values())["axes"]
+        else:
+            self._keys["axes"] = None  # figure does not match the scheme anymore
 
-        # Draw the horizontal lines for every transition except last and for IP
-        for it in transition_steps[:-1]:
-            if it < ipvalue:
-                self._axes.hlines(it, xmin=0, xmax=10, color=self.colmain)
-
-        # draw the state we come out of, if not ground state
-        if wavenumber_gs > 0.0:
-            self._axes.hlines(wavenumber_gs, xmin=0, xmax=10, color=self.colmain)
-
-        # draw the arrows and cross them out if forbidden
-        deltax = 8.65 / (len(lambda_steps) + 1.0) - 0.5
-        xval = 0.0
-        yval_bott = wavenumber_gs
-        # put in bottom level
-        levelstr = f"{wavenumber_gs:.{prec_level}f}$\\,$cm$^{{-1}}$"
-        if term_symb_gs is not None:
-            levelstr += f"{lbreak}{term_symb_gs}"
-        self._axes.text(
-            10.0 - textpad,
-            wavenumber_gs,
-            levelstr,
-            color=self.colmain,
-            ha="right",
-            va="bottom",
-            size=fsz_labels,
-        )
+    def restyle(
+        self, darkmode: Optional[bool] = None, transparent: Optional[bool] = None
+    ):
+        """Change the colors of the figure in place, without drawing it again.
 
-        # draw the arrows for the steps
-        for it in range(len(lambda_steps)):
-            col = ut.color_wavelength(lambda_steps[it], self.darkmode)
-            # xvalue for arrow
-            xval += deltax
-            wstp = wavenumber_steps[it]
-            tstp = transition_steps[it]
-            # check if transition is forbidden and no show is activated for the arrow
-            if not forbidden_steps[it] or show_forbidden_trans == "x-out":
-                # look for where to plot the array
-                if it == 0 and len(wavenumber_es) > 0:
-                    xvalplot = firstarrowxmfl
-                else:
-                    xvalplot = xval
-                # face color for arrow
-                fc_col = col
-                if (
-                    self.config_parser.last_step_to_ip_mode
-                    and it == len(lambda_steps) - 1
-                ):
-                    fc_col = "None"
-                # now plot the arrow
-                self._axes.arrow(
-                    xvalplot,
-                    yval_bott,
-                    0,
-                    wstp,
-                    width=sett_arr,
-                    fc=fc_col,
-                    ec=col,
-                    length_includes_head=True,
-                    head_width=sett_arr_head,
-                    head_length=totwavenumber_photons / 30.0,
-                )
+        Background, main elements, the shade above the IP, and the arrows and their
+        labels are recolored. The new settings are kept for later updates, like
+        the keyword arguments of `update`.
 
-                # x-out forbidden arrow
-                if forbidden_steps[it]:
-                    yval_cross = yval_bott + wstp / 2.0
-                    self._axes.plot(
-                        xvalplot,
-                        yval_cross,
-                        "x",
-                        color="r",
-                        markersize=20,
-                        markeredgewidth=5.0,
+        :param darkmode: Use colors for dark mode, defaults to the current setting.
+        :param transparent: Use a transparent background, defaults to the current
+            setting.
+        """
+        if transparent is not None:
+            self._kwargs["transparent"] = self.transparent = transparent
+        if darkmode is None or darkmode == self.darkmode:
+            return
+        self._kwargs["darkmode"] = darkmode
+        self._set_colors(darkmode)
+
+        vals = self._scheme_values()
+        layout = vals.layout
+        a2 = self._twin_axes
+
+        self._figure.patch.set_facecolor(self.colbg)
+        self._figure.patch.set_edgecolor(self.colbg)
+        self._style_axes(self._axes)
+        self._style_axes(a2)
+        for text in (self._axes.title, self._axes.yaxis.label, a2.yaxis.label):
+            text.set_color(self.colmain)
+
+        for group in ("ip", "steps", "low_lying"):
+            texts = (it for it in self._artists[group] if isinstance(it, Text))
+            for text, it in zip(texts, np.flatnonzero(layout.labels.group == group)):
+                text.set_color(layout.labels.color[it] or self.colmain)
+            sel = layout.arrows.group == group
+            for artist in self._artists[group]:
+                if isinstance(artist, LineCollection):  # levels
+                    artist.set_color(self.colmain)
+                elif group == "ip" and isinstance(artist, PolyCollection):  # shade
+                    artist.set_facecolor(self.colhdr)
+                elif isinstance(artist, PolyCollection):  # arrows
+                    colors = layout.arrows.color[sel]
+                    artist.set_facecolors(
+                        np.where(layout.arrows.filled[sel], colors, "None")
                     )
+                    artist.set_edgecolors(colors)
 
-            # draw a little solid line for the last/end state
-            if not self.config_parser.last_step_to_ip_mode:
-                if it == len(lambda_steps) - 1:
-                    self._axes.hlines(
-                        tstp,
-                        xmin=xval - 0.5,
-                        xmax=xval + 0.5,
-                        linestyle="solid",
-                        color=self.colmain,
-                    )
+        self._keys.update(
+            (group, key)
+            for group, key in self._group_keys(vals).items()
+            if self._keys.get(group) is not None
+        )
 
-            # alignment of labels
-            if xval <= 5.0:
-                halignlam = "left"
-                halignlev = "right"
-                xloc_levelstr = 10.0 - textpad
-            else:
-                halignlam = "right"
-                halignlev = "left"
-                xloc_levelstr = textpad
-
-            if not forbidden_steps[it] or show_forbidden_trans == "x-out":
-                # wavelength text and transition strength
-                lambdastr = f"{lambda_steps[it]:.{prec_lambda}f}$\\,$nm"
-                if (
-                    self.config_parser.last_step_to_ip_mode
-                    and it == len(lambda_steps) - 1
-                ):
-                    lambdastr = f"<{lambdastr}"
-                if (
-                    show_trans_strength
-                    and (tmp_strength := transition_strengths_steps[it]) != 0
-                ):
-                    lambdastr += (
-                        f"\nA={ut.my_exp_formatter(tmp_strength, 1)}$\\,s^{{-1}}$"
-                    )
-                if it == 0 and len(wavenumber_es) > 0:
-                    self._axes.text(
-                        firstarrowxmfl + textpad,
-                        tstp - wstp / 2.0,
-                        lambdastr,
-                        color=col,
-                        ha=halignlam,
-                        va="center",
-                        ma="center",
-                        rotation=90,
-                        size=fsz_labels,
-                    )
-                else:
-                    self._axes.text(
-                        xval + textpad,
-                        tstp - wstp / 2.0,
-                        lambdastr,
-                        color=col,
-                        ha=halignlam,
-                        va="center",
-                        ma="center",
-                        rotation=90,
-                        size=fsz_labels,
-                    )
+    def update(self, data: dict, **kwargs) -> List[str]:
+        """Update the plot with new data, only redrawing what has changed.
 
-            # level text
-            # fixme: only do this if we are not in the last step to IP mode
-            levelstr = f"{tstp:.{prec_level}f}$\\,$cm$^{{-1}}$"
-            if term_symb[it] is not None:
-                levelstr += f"{lbreak}{term_symb[it]}"
-            if it == len(lambda_steps) - 1:
-                leveltextypos = tstp
-                leveltextvaalign = "center"
-            else:
-                leveltextypos = tstp - 0.01 * totwavenumber_photons
-                leveltextvaalign = "top"
-
-            if (
-                not self.config_parser.last_step_to_ip_mode
-                or it != len(lambda_steps) - 1
-            ):
-                self._axes.text(
-                    xloc_levelstr,
-                    leveltextypos,
-                    levelstr,
-                    color=self.colmain,
-                    ha=halignlev,
-                    va=leveltextvaalign,
-                    size=fsz_labels,
-                )
+        The new data is parsed and compared to the currently plotted scheme. Only the
+        artists of groups whose input changed are removed and drawn again, while the
+        figure and axes are reused. The layout of the figure is only recalculated
+        if the axes changed, e.g., the axis limits, labels, or font sizes.
+        Darkmode and transparency settings that were given when creating the plotter
+        are kept, unless they are overwritten here.
 
-            # update yval_bott
-            yval_bott = transition_steps[it]
+        :param data: Dictionary with the data to plot, directly from json file.
+        :param kwargs: Overwrite the `darkmode`, `transparent`, `plain_labels`, and/or
+            `layout` keyword arguments that were given when creating the plotter.
 
-        # now go through low-lying excited states
-        x_spacing_es = (
-            1.5
-            if np.sum(transition_strengths_es) == 0 or not show_trans_strength
-            else 2.0
+        :return: Names of the groups that were redrawn, a subset of
+            "ip", "steps", "low_lying", and "axes".
+        """
+        self.config_parser = ConfigParser(data)
+        self._kwargs.update(kwargs)
+        self._set_colors(
+            self._kwargs.get("darkmode", self.config_parser.sett_plot_dark)
+        )
+        self.transparent = self._kwargs.get(
+            "transparent", self.config_parser.sett_plot_transparent
         )
 
-        # Lines for manifold ground states
-        for it in range(np.sum(self.config_parser.is_low_lying)):
-            self._axes.hlines(
-                mfld_yinc * ipvalue * (1 + it),
-                xmin=x_spacing_es * it + 2.3,
-                xmax=x_spacing_es * it + 3.7,
-                linestyle="solid",
-                color=self.colmain,
-            )
+        return self._plotit()
 
-        for it in range(len(wavenumber_es)):  # these are never steps to IP
-            col = ut.color_wavelength(lambda_step_es[it], self.darkmode)
-            # values for spacing and distance
-            xval = firstarrowxmfl + x_spacing_es + it * x_spacing_es
-            yval = mfld_yinc * ipvalue * (1 + it)
-            wstp = float(wavenumber_steps[0]) - yval
-
-            if not forbidden_es[it] or show_forbidden_trans == "x-out":
-                # xvalue for arrow
-                self._axes.arrow(
-                    xval,
-                    yval,
-                    0,
-                    wstp,
-                    width=sett_arr,
-                    fc=col,
-                    ec=col,
-                    length_includes_head=True,
-                    head_width=sett_arr_head,
-                    head_length=totwavenumber_photons / 30.0,
-                )
+    def _plotit(self) -> List[str]:
+        """Draw all groups of artists whose input changed.
 
-                # print cross out if necessary
-                if forbidden_es[it]:
-                    yval_cross = yval + wstp / 2.0
-                    self._axes.plot(
-                        xval,
-                        yval_cross,
-                        "x",
-                        color="r",
-                        markersize=20,
-                        markeredgewidth=5.0,
-                    )
+        :return: Names of the groups that were redrawn.
 
-                # wavelength text
-                lambdastr = f"{lambda_step_es[it]:.{prec_lambda}f}$\\,$nm"
-                if (
-                    show_trans_strength
-                    and (tmp_strength := transition_strengths_es[it]) != 0
-                ):
-                    lambdastr += (
-                        f"\nA={ut.my_exp_formatter(tmp_strength, 1)}$\\,s^{{-1}}$"
+        :raises ValueError: Unknown layout.
+        """
+        if (layout := self._kwargs.get("layout", LAYOUTS[0])) not in LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r}, use one of {LAYOUTS}.")
+
+        vals = self._scheme_values()
+        keys = self._group_keys(vals)
+
+        draw_functions = {
+            "ip": self._plot_ip,
+            "steps": self._plot_steps,
+            "low_lying": self._plot_low_lying,
+            "axes": self._plot_axes,
+        }
+
+        redrawn = []
+        for group, draw in draw_functions.items():
+            if self._keys.get(group) == keys[group]:
+                continue
+            for artist in self._artists.pop(group, []):
+                artist.remove()
+            self._artists[group] = draw(vals)
+            self._keys[group] = keys[group]
+            redrawn.append(group)
+
+        # layout of figure, texts within the axes do not change it
+        if "axes" in redrawn:
+            self._fit_layout()
+
+        return redrawn
+
+    def variants(
+        self,
+        styles: Sequence[str] = tuple(ut.PLOT_STYLES),
+        sizes: Optional[Sequence[Tuple[float, float]]] = None,
+    ) -> Iterator[Tuple[str, Tuple[float, float]]]:
+        """Iterate over styles and sizes of the figure, e.g., to save all variants.
+
+        The figure is restyled and resized in place for every variant, see
+        `restyle` and `resize`, instead of creating a new plotter. Style and size
+        of the plotter are restored when the iteration ends.
+
+        :param styles: Plot styles, see `utils.PLOT_STYLES`.
+        :param sizes: Width and height of the figure in inches, defaults to the size
+            of the scheme.
+
+        :return: Iterator over the style and size of each variant, the figure is
+            set up for the variant while it is the current item.
+        """
+        darkmode, transparent = self.darkmode, self.transparent
+        if sizes is None:
+            sizes = [self.config_parser.sett_fig_size]
+        orig_size = tuple(self._figure.get_size_inches())
+        try:
+            for size in sizes:
+                self.resize(size)
+                for style in styles:
+                    self.restyle(
+                        darkmode="dark" in style, transparent="transparent" in style
                     )
-                self._axes.text(
-                    xval + textpad,
-                    yval + wstp / 2.0,
-                    lambdastr,
-                    color=col,
-                    ha="left",
-                    va="center",
-                    ma="center",
-                    rotation=90,
-                    size=fsz_labels,
-                )
+                    yield style, tuple(size)
+        finally:
+            self.restyle(darkmode=darkmode, transparent=transparent)
+            self.resize(orig_size)
+
+    def _fit_layout(self):
+        """Fit the axes into the figure with the selected layout."""
+        if self._kwargs.get("layout", LAYOUTS[0]) == "analytic":
+            self._analytic_layout()
+        else:
+            self._figure.tight_layout()
 
-            # level text
-            levelstr = f"{wavenumber_es[it]:.{prec_level}f}$\\,$cm$^{{-1}}$"
-            if term_symb_es_formatted[it] is not None:
-                # NO LINEBREAK HERE ON THESE LINES!
-                levelstr += f", {term_symb_es_formatted[it]}"
-            self._axes.text(
-                xval + 0.5,
-                yval,
-                levelstr,
-                color=self.colmain,
-                ha="left",
-                va="bottom",
-                size=fsz_labels,
-            )
+    def _analytic_layout(self):
+        """Fit the axes into the figure by calculating the margins around them.
+
+        The margins are the same as the ones of `tight_layout`: the tick labels, axis
+        labels, and title plus padding. Their sizes are calculated from font metrics
+        of the label strings, such that the figure does not have to be drawn.
+        """
+        rc = matplotlib.rcParams
+        pad = 1.08 * FontProperties().get_size_in_points()
+        label_size = self.config_parser.sett_fontsize[1]
+        fig_width, fig_height = self._figure.get_size_inches() * 72  # in points
+
+        def margin(axis: Axis) -> Tuple[float, float, float]:
+            """Get the width and the overhang below and above of an axis' labels."""
+            width = below = above = 0.0
+            vmin, vmax = axis.get_view_interval()
+            locs = [it for it in axis.get_majorticklocs() if vmin <= it <= vmax]
+            labels = axis.get_major_formatter().format_ticks(locs)
+            extents = [
+                _text_extent(label, self.config_parser.sett_fontsize[0])
+                for label in labels
+                if label
+            ]
+            if extents:
+                width = max(it[0] for it in extents) + rc["ytick.major.pad"]
+                half_height = max(it[1] for it in extents) / 2
+                below = half_height if np.isclose(locs[0], vmin) else 0.0
+                above = half_height if np.isclose(locs[-1], vmax) else 0.0
+            if label := axis.get_label_text():
+                width += rc["axes.labelpad"] + _text_extent(label, label_size)[1]
+            return width, below, above
+
+        left, below_left, above_left = margin(self._axes.yaxis)
+        right, below_right, above_right = margin(self._twin_axes.yaxis)
+        top = max(above_left, above_right)
+        if title := self._axes.get_title():
+            title_height = _text_extent(title, self.config_parser.sett_fontsize[3])[1]
+            top = max(top, title_height + rc["axes.titlepad"])
+        bottom = max(below_left, below_right)
+
+        self._figure.subplots_adjust(
+            left=(pad + left) / fig_width,
+            right=1 - (pad + right) / fig_width,
+            bottom=(pad + bottom) / fig_height,
+            top=1 - (pad + top) / fig_height,
+        )
+
+    def _group_keys(self, vals: SimpleNamespace) -> Dict[str, tuple]:
+        """Get the input values of each group of artists.
+
+        If the key of a group did not change, its artists do not need to be redrawn.
+        The keys of the groups in the scheme contain their whole layout.
+
+        :param vals: Values of the scheme, see `_scheme_values`.
+
+        :return: Dictionary with the group names as keys and their input values.
+        """
+        layout = vals.layout
+        common = (self.colmain, vals.fsz_labels, layout.arrow_fmt)
+        keys = {
+            "ip": (
+                self.colmain,
+                self.colhdr,
+                vals.fsz_labels,
+                layout.ip,
+                layout.ymax,
+                _layout_rows(layout.labels, "ip"),
+            ),
+            "steps": common
+            + _layout_rows(layout.levels, "steps")
+            + _layout_rows(layout.arrows, "steps")
+            + _layout_rows(layout.labels, "steps"),
+            "low_lying": common
+            + _layout_rows(layout.levels, "low_lying")
+            + _layout_rows(layout.arrows, "low_lying")
+            + _layout_rows(layout.labels, "low_lying"),
+            "axes": (
+                vals.plain_labels,
+                self._kwargs.get("layout", LAYOUTS[0]),
+                self.colbg,
+                self.colmain,
+                self.config_parser.sett_fig_size,
+                self.config_parser.sett_fontsize,
+                vals.title_entry,
+                vals.show_cm_1_ax,
+                vals.show_ev_ax,
+                layout.ymax,
+            ),
+        }
+        return keys
+
+    def _plot_axes(self, vals: SimpleNamespace) -> list:
+        """Set up the figure and the axes: size, colors, labels, title, and limits.
+
+        :param vals: Values of the scheme, see `_scheme_values`.
+
+        :return: Empty list, since the existing figure and axes are modified.
+        """
+        a2 = self._twin_axes
+        layout = vals.layout
+
+        self._figure.set_size_inches(*self.config_parser.sett_fig_size, forward=True)
+        self._figure.patch.set_facecolor(self.colbg)
+        self._figure.patch.set_edgecolor(self.colbg)
+        self._style_axes(self._axes)
+        self._style_axes(a2)
 
         # Title:
-        if title_entry != "":
-            self._axes.set_title(title_entry, size=fsz_title)
+        if vals.title_entry != "" or self._axes.get_title() != "":
+            self._axes.set_title(
+                vals.title_entry, size=vals.fsz_title, color=self.colmain
+            )
 
         # ylabel
-        self._axes.yaxis.set_major_formatter(ut.my_formatter)  # scientific labels
-        if show_cm_1_ax:
-            self._axes.set_ylabel("Wavenumber (cm$^{-1}$)", size=fsz_axes_labels)
+        # scientific labels
+        if vals.plain_labels:
+            self._axes.yaxis.set_major_formatter(ut.my_formatter_plain)
         else:
-            self._axes._axes.get_yaxis().set_ticks([])
+            self._axes.yaxis.set_major_formatter(ut.my_formatter)
+        if vals.show_cm_1_ax:
+            self._axes.yaxis.set_major_locator(AutoLocator())
+            self._axes.set_ylabel(
+                f"Wavenumber ({layout.unit_wavenumber})",
+                size=vals.fsz_axes_labels,
+                color=self.colmain,
+            )
+        else:
+            self._axes.set_ylabel("")
+            self._axes.yaxis.set_ticks([])
 
         # axis limits
-        self._axes.set_xlim([0.0, 10.0])
-        self._axes.set_ylim([0.0, ymax])
+        self._axes.set_xlim(list(layout.xlim))
+        self._axes.set_ylim(list(layout.ylim))
 
         # eV axis on the right
-        if show_ev_ax:
-            a2.set_ylabel("Energy (eV)", size=fsz_axes_labels)
+        if vals.show_ev_ax:
+            a2.yaxis.set_major_locator(AutoLocator())
+            a2.set_ylabel("Energy (eV)", size=vals.fsz_axes_labels, color=self.colmain)
         else:
-            a2._axes.get_yaxis().set_ticks([])
-        a2.set_ylim([0.0, ymax / 8065.54429])
+            a2.set_ylabel("")
+            a2.yaxis.set_ticks([])
+        a2.set_ylim(list(layout.ylim_ev))
 
         # remove x ticks
-        self._axes._axes.get_xaxis().set_ticks([])
+        self._axes.xaxis.set_ticks([])
+
+        return []
+
+    def _plot_ip(self, vals: SimpleNamespace) -> list:
+        """Shade the region above the IP and label the IP.
+
+        :param vals: Values of the scheme, see `_scheme_values`.
+
+        :return: List of artists that were created.
+        """
+        layout = vals.layout
+
+        # shade the level above the IP, always draw it below all other artists
+        xshade = list(layout.xlim)  # x-axis of the shade (which is never displayed)
+        artists = [
+            self._axes.fill_between(
+                xshade,
+                layout.ip,
+                layout.ymax * 10.0,
+                facecolor=self.colhdr,
+                alpha=0.5,
+                zorder=0.5,
+            )
+        ]
+
+        return artists + self._plot_labels(vals, "ip")
+
+    def _plot_low_lying(self, vals: SimpleNamespace) -> list:
+        """Draw the low-lying states, the arrows from them, and their labels.
+
+        :param vals: Values of the scheme, see `_scheme_values`.
+
+        :return: List of artists that were created.
+        """
+        return self._plot_group(vals, "low_lying")
+
+    def _plot_steps(self, vals: SimpleNamespace) -> list:
+        """Draw the levels, the arrows of the scheme steps, and their labels.
+
+        :param vals: Values of the scheme, see `_scheme_values`.
+
+        :return: List of artists that were created.
+        """
+        return self._plot_group(vals, "steps")
+
+    def _plot_group(self, vals: SimpleNamespace, group: str) -> list:
+        """Draw the levels, arrows, crosses, and labels of a group in the layout.
+
+        Levels, arrows, and crosses are each drawn as one artist.
+
+        :param vals: Values of the scheme, see `_scheme_values`.
+        :param group: Name of the group in the layout.
+
+        :return: List of artists that were created.
+        """
+        artists = []
+        layout = vals.layout
+
+        levels = layout.levels
+        sel = levels.group == group
+        if np.any(sel):
+            artists.append(
+                self._axes.hlines(
+                    levels.y[sel],
+                    xmin=levels.xmin[sel],
+                    xmax=levels.xmax[sel],
+                    linestyle="solid",
+                    color=self.colmain,
+                )
+            )
+
+        arrows = layout.arrows
+        sel = arrows.group == group
+        if np.any(sel):
+            collection = PolyCollection(
+                layout.arrow_polygons()[sel],
+                facecolors=np.where(arrows.filled[sel], arrows.color[sel], "None"),
+                edgecolors=arrows.color[sel],
+                joinstyle="miter",
+                zorder=1,
+            )
+            artists.append(self._axes.add_collection(collection, autolim=False))
+
+        # cross out forbidden transitions
+        sel &= arrows.forbidden
+        if np.any(sel):
+            artists += self._axes.plot(
+                arrows.x[sel],
+                arrows.y[sel] + arrows.length[sel] / 2.0,
+                "x",
+                color="r",
+                markersize=20,
+                markeredgewidth=5.0,
+            )
+
+        return artists + self._plot_labels(vals, group)
+
+    def _plot_labels(self, vals: SimpleNamespace, group: str) -> list:
+        """Write the labels of a group in the layout.
+
+        :param vals: Values of the scheme, see `_scheme_values`.
+        :param group: Name of the group in the layout.
+
+        :return: List of the created texts.
+        """
+        labels = vals.layout.labels
+        return [
+            self._axes.text(
+                labels.x[it],
+                labels.y[it],
+                labels.text[it],
+                color=labels.color[it] or self.colmain,
+                ha=labels.ha[it],
+                va=labels.va[it],
+                ma=labels.ma[it],
+                rotation=labels.rotation[it],
+                size=vals.fsz_labels,
+            )
+            for it in np.flatnonzero(labels.group == group)
+        ]
+
+    def _scheme_values(self) -> SimpleNamespace:
+        """Collect all values from the config parser that are required for plotting.
+
+        Positions of all elements in the scheme are taken from its layout, see
+        `ConfigParser.layout`.
+
+        :return: Namespace with the values.
+        """
+        vals = SimpleNamespace()
+
+        # get formatting settings
+        (
+            _,
+            vals.fsz_axes_labels,
+            vals.fsz_labels,
+            vals.fsz_title,
+        ) = self.config_parser.sett_fontsize
+        vals.title_entry = self.config_parser.sett_title
+        vals.show_cm_1_ax, vals.show_ev_ax, _, _ = self.config_parser.sett_shows
+
+        vals.plain_labels = self._kwargs.get("plain_labels", False)
+        vals.layout = self.config_parser.layout(self.darkmode, vals.plain_labels)
+
+        return vals
+
+    def _set_colors(self, darkmode: bool):
+        """Set the colors for background, headspace, and main elements.
+
+        :param darkmode: Use colors for dark mode?
+        """
+        colors = COLORS[bool(darkmode)]
+        self.colbg = colors["background"]
+        self.colmain = colors["main"]
+        self.colhdr = colors["header"]  # header color
+
+        self.darkmode = darkmode
+
+    def _style_axes(self, axes: Axes):
+        """Set colors and tick formatting of the given axes.
+
+        This replaces setting a global matplotlib style, such that no global state is
+        modified when plotting.
+
+        :param axes: Axes to style.
+        """
+        axes.set_facecolor(self.colbg)
+        for spine in axes.spines.values():
+            spine.set_edgecolor(self.colmain)
+        axes.tick_params(
+            which="both",
+            direction="in",
+            colors=self.colmain,
+            labelsize=self.config_parser.sett_fontsize[0],
+        )
+
+
+@functools.lru_cache(maxsize=1024)
+def _text_extent(text: str, size: float) -> Tuple[float, float]:
+    """Get the width and height of a text in points from font metrics.
+
+    The text is measured with the default font without drawing it. Lines of
+    multi-line texts are stacked with matplotlib's default line spacing.
+
+    :param text: Text to measure, can contain mathtext.
+    :param size: Font size in points.
+
+    :return: Width and height in points.
+    """
+    prop = FontProperties(size=size)
+    lines = text.split("\n")
+    with _MATHTEXT_LOCK:  # matplotlib's parser of `text_to_path` is shared
+        extents = [
+            text_to_path.get_text_width_height_descent(line, prop, is_math_text(line))
+            for line in lines
+        ]
+    width = max(it[0] for it in extents)
+    height = sum(it[1] for it in extents) + 0.2 * size * (len(lines) - 1)
+    return width, height
+
+
+def _make_svg_id(type: str, content) -> str:
+    """Create an id in an svg file like `RendererSVG`, but with `SVG_HASHSALT`."""
+    digest = hashlib.sha256(SVG_HASHSALT.encode("utf8"))
+    digest.update(str(content).encode("utf8"))
+    return f"{type}{digest.hexdigest()[:10]}"
+
+
+def _savefig(figure: Figure, fout, **kwargs):
+    """Save a figure such that the same figure always gives the same bytes.
+
+    The time of saving is removed from the metadata of pdf and svg files. ps and
+    eps files have no such metadata entry, their creation date comment is removed
+    from the saved file instead. Ids in svg files are fixed by `_Figure`.
+
+    :param figure: Figure to save.
+    :param fout: File name or binary buffer.
+    :param kwargs: Keyword arguments for `matplotlib.figure.Figure.savefig`.
+    """
+    fmt = kwargs.get("format")
+    if fmt is None and isinstance(fout, (str, os.PathLike)):
+        fmt = Path(fout).suffix[1:]
+    fmt = (fmt or matplotlib.rcParams["savefig.format"]).lower()
+
+    if key := _TIME_METADATA.get(fmt):
+        kwargs["metadata"] = {key: None, **(kwargs.get("metadata") or {})}
+
+    if fmt not in ("ps", "eps"):
+        figure.savefig(fout, **kwargs)
+    elif isinstance(fout, (str, os.PathLike)):
+        figure.savefig(fout, **kwargs)
+        fout = Path(fout)
+        fout.write_bytes(_PS_CREATION_DATE_RE.sub(b"", fout.read_bytes(), 1))
+    else:
+        buffer = io.BytesIO()
+        figure.savefig(buffer, **kwargs)
+        fout.write(_PS_CREATION_DATE_RE.sub(b"", buffer.getvalue(), 1))
+
+
+def _timed(func: Callable, *args, **kwargs) -> float:
+    """Call a function and return how long it took in seconds."""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _layout_rows(columns: tuple, group: str) -> tuple:
+    """Get all values of the elements of one group in the layout.
+
+    :param columns: Named tuple of column arrays in the layout with a `group` column.
+    :param group: Name of the group.
+
+    :return: Tuple with the values of the group in each column.
+    """
+    sel = columns.group == group
+    return tuple(tuple(it[sel].tolist()) for it in columns)
+
 
-        # tight layout of figure
-        self._figure.tight_layout()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_clear_mathtext_caches)
@@ -0,0 +1,259 @@
+"""Parse many schemes at once into columnar arrays."""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from rimsschemedrawer.json_parser import ConfigParser, json_reader
+
+# Columns with one value per scheme
+_SCHEME_COLUMNS = [
+    "names",
+    "element",
+    "charge",
+    "gs_level",
+    "ip_level",
+    "last_step_to_ip_mode",
+    "number_of_steps",
+]
+# Columns with one value per step and the value used to pad them
+_STEP_COLUMNS = {
+    "step_levels": np.nan,
+    "step_nm": np.nan,
+    "step_forbidden": False,
+    "is_low_lying": False,
+    "transition_strengths": 0.0,
+}
+
+
+class SchemeBatch:
+    """Columnar representation of many schemes.
+
+    Every scheme is one row. Values per scheme, e.g., the element, the charge state,
+    or the IP, are one-dimensional arrays. Values per step, e.g., the levels or
+    wavelengths, are two-dimensional arrays of shape (number of schemes, maximum
+    number of steps), padded at the end of each row. Use `mask` to select the
+    entries that are actual steps. Padding values are `np.nan` for levels and wavelengths, `False` for the
+    forbidden and low-lying flags, and `0` for the transition strengths.
+
+    Statistics over a whole library can thus be calculated with numpy, e.g., all
+    wavelengths that are used: `batch.step_nm[batch.mask]`.
+
+    Create a batch with `SchemeBatch.from_dicts`, `SchemeBatch.from_files`, or
+    `SchemeBatch.load_npz`.
+    """
+
+    def __init__(
+        self, columns: Dict[str, np.ndarray], errors: Optional[Dict[str, str]] = None
+    ):
+        """Initialize the batch from its columns.
+
+        :param columns: Dictionary with all columns of the batch.
+        :param errors: Dictionary with the names of schemes that could not be parsed
+            as keys and the error messages as values.
+        """
+        missing = set(_SCHEME_COLUMNS + list(_STEP_COLUMNS)) - set(columns)
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        self._columns = columns
+        self._errors = errors if errors is not None else {}
+
+    def __len__(self) -> int:
+        """Return the number of schemes in the batch."""
+        return len(self._columns["names"])
+
+    @classmethod
+    def from_dicts(
+        cls,
+        schemes: Iterable[Dict],
+        names: Optional[Iterable[str]] = None,
+        skip_invalid: bool = False,
+    ) -> "SchemeBatch":
+        """Parse schemes with the `ConfigParser` and create a batch.
+
+        :param schemes: Dictionaries with the schemes, directly from json files.
+        :param names: Names of the schemes, defaults to their index.
+        :param skip_invalid: If True, schemes that cannot be parsed are skipped and
+            reported in `errors`. Otherwise, the error is raised.
+
+        :return: Batch with all parsed schemes.
+        """
+        schemes = list(schemes)
+        if names is None:
+            names = [str(it) for it in range(len(schemes))]
+        else:
+            names = [str(it) for it in names]
+        if len(names) != len(schemes):
+            raise ValueError("Number of names does not match the number of schemes.")
+
+        parsers = []
+        parsed_names = []
+        errors = {}
+        for name, data in zip(names, schemes):
+            try:
+                parsers.append(ConfigParser(data))
+            except Exception as err:
+                if not skip_invalid:
+                    raise
+                errors[name] = f"{type(err).__name__}: {err}"
+                continue
+            parsed_names.append(name)
+
+        # the step arrays include the step to the IP in last step to IP mode
+        num_steps = np.array([len(it.step_levels) for it in parsers], dtype=int)
+        max_steps = num_steps.max() if len(parsers) > 0 else 0
+        mask = np.arange(max_steps) < num_steps[:, np.newaxis]
+
+        columns = {
+            "names": np.array(parsed_names, dtype=str),
+            "element": np.array([it.element for it in parsers], dtype=str),
+            "charge": np.array([it.charge for it in parsers], dtype=int),
+            "gs_level": np.array([it.gs_level for it in parsers], dtype=float),
+            "ip_level": np.array([it.ip_level for it in parsers], dtype=float),
+            "last_step_to_ip_mode": np.array(
+                [it.last_step_to_ip_mode for it in parsers], dtype=bool
+            ),
+            "number_of_steps": num_steps,
+        }
+        for key, fill_value in _STEP_COLUMNS.items():
+            column = np.full(mask.shape, fill_value, dtype=type(fill_value))
+            if len(parsers) > 0:
+                column[mask] = np.concatenate([getattr(it, key) for it in parsers])
+            columns[key] = column
+
+        return cls(columns, errors)
+
+    @classmethod
+    def from_files(
+        cls, files: Iterable[Union[str, Path]], skip_invalid: bool = False
+    ) -> "SchemeBatch":
+        """Read json files and create a batch, named by the file names.
+
+        :param files: Json files to read.
+        :param skip_invalid: If True, files that cannot be read or parsed are skipped
+            and reported in `errors`. Otherwise, the error is raised.
+
+        :return: Batch with all parsed schemes.
+        """
+        schemes = []
+        names = []
+        errors = {}
+        for fin in files:
+            fin = Path(fin)
+            try:
+                schemes.append(json_reader(fin))
+            except Exception as err:
+                if not skip_invalid:
+                    raise
+                errors[str(fin)] = f"{type(err).__name__}: {err}"
+                continue
+            names.append(str(fin))
+
+        batch = cls.from_dicts(schemes, names=names, skip_invalid=skip_invalid)
+        batch._errors = {**errors, **batch.errors}
+        return batch
+
+    @classmethod
+    def load_npz(cls, fin: Union[str, Path]) -> "SchemeBatch":
+        """Load a batch that was saved with `save_npz`.
+
+        :param fin: File to load the batch from.
+
+        :return: Loaded batch.
+        """
+        with np.load(fin, allow_pickle=False) as npz:
+            columns = {key: npz[key] for key in npz.files}
+        return cls(columns)
+
+    def save_npz(self, fout: Union[str, Path]):
+        """Save all columns of the batch to an uncompressed `.npz` file.
+
+        Errors of schemes that could not be parsed are not saved.
+
+        :param fout: File to save the batch to.
+        """
+        np.savez(fout, **self._columns)
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        """Get the schemes that could not be parsed and their error messages."""
+        return self._errors
+
+    @property
+    def charge(self) -> np.ndarray:
+        """Get the charge state of the ionized atom of each scheme, 0 for the first IP.
+
+        Together with the element, the charge state tells which IP `ip_level` is.
+        """
+        return self._columns["charge"]
+
+    @property
+    def columns(self) -> List[str]:
+        """Get the names of all columns."""
+        return list(self._columns)
+
+    @property
+    def element(self) -> np.ndarray:
+        """Get the element of each scheme."""
+        return self._columns["element"]
+
+    @property
+    def gs_level(self) -> np.ndarray:
+        """Get the ground state level of each scheme in cm-1."""
+        return self._columns["gs_level"]
+
+    @property
+    def ip_level(self) -> np.ndarray:
+        """Get the ionization potential of each scheme in cm-1."""
+        return self._columns["ip_level"]
+
+    @property
+    def is_low_lying(self) -> np.ndarray:
+        """Get if a level is a low-lying state, per scheme and step."""
+        return self._columns["is_low_lying"]
+
+    @property
+    def last_step_to_ip_mode(self) -> np.ndarray:
+        """Get if the last step of each scheme is drawn to the IP."""
+        return self._columns["last_step_to_ip_mode"]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Get a boolean array that is True for entries that are actual steps."""
+        max_steps = self._columns["step_levels"].shape[1]
+        return np.arange(max_steps) < self.number_of_steps[:, np.newaxis]
+
+    @property
+    def names(self) -> np.ndarray:
+        """Get the names of the schemes, e.g., their file names."""
+        return self._columns["names"]
+
+    @property
+    def number_of_steps(self) -> np.ndarray:
+        """Get the number of steps of each scheme.
+
+        In last step to IP mode, the step to the IP is included.
+        """
+        return self._columns["number_of_steps"]
+
+    @property
+    def step_forbidden(self) -> np.ndarray:
+        """Get if a transition is forbidden, per scheme and step."""
+        return self._columns["step_forbidden"]
+
+    @property
+    def step_levels(self) -> np.ndarray:
+        """Get the levels in cm-1, per scheme and step."""
+        return self._columns["step_levels"]
+
+    @property
+    def step_nm(self) -> np.ndarray:
+        """Get the wavelengths of the steps in nm, per scheme and step."""
+        return self._columns["step_nm"]
+
+    @property
+    def transition_strengths(self) -> np.ndarray:
+        """Get the transition strengths in s-1, per scheme and step."""
+        return self._columns["transition_strengths"]
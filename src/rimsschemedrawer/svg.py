@@ -0,0 +1,317 @@
+"""Write schemes directly to SVG, without matplotlib.
+
+The SVG writer draws the same layout as the `Plotter`, see
+`rimsschemedrawer.layout`, with plain text labels. Texts are not measured, but
+their sizes are estimated from the font size. The margins around the axes can
+therefore differ slightly from the ones of the `Plotter`.
+"""
+
+from pathlib import Path
+from typing import IO, Iterator, Union
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from rimsschemedrawer.json_parser import ConfigParser
+from rimsschemedrawer.layout import (
+    COLORS,
+    FIGURE_PAD,
+    LINE_SPACING,
+    TEXT_ASCENT,
+    TICK_LENGTH,
+    TICK_PAD,
+    TITLE_PAD,
+    format_ticks,
+    text_height,
+)
+from rimsschemedrawer import utils as ut
+
+# Same font and line widths as the matplotlib defaults
+FONT_FAMILY = "DejaVu Sans,Bitstream Vera Sans,Arial,Helvetica,sans-serif"
+LINE_WIDTH_LEVELS = 1.5
+LINE_WIDTH_ARROWS = 1.0
+LINE_WIDTH_AXES = 0.8
+
+
+class SVGWriter:
+    """Write a scheme as SVG, with the same look as the `Plotter`.
+
+    The SVG is built from strings only, such that thousands of schemes can be
+    written per second. Use `write` to stream it to a file or a text buffer, or
+    `to_string` to get it as a string.
+    """
+
+    def __init__(self, data: dict, **kwargs):
+        """Initialize the writer.
+
+        :param data: Dictionary with the data to plot, directly from json file.
+        :param kwargs: Additional keyword arguments.
+            - darkmode: Overwrite the darkmode settings from the config file.
+            - transparent: Overwrite the transparency settings from the config file.
+        """
+        self.config_parser = ConfigParser(data)
+        self.darkmode = kwargs.get("darkmode", self.config_parser.sett_plot_dark)
+        self.transparent = kwargs.get(
+            "transparent", self.config_parser.sett_plot_transparent
+        )
+
+    def to_string(self) -> str:
+        """Get the SVG of the scheme.
+
+        :return: SVG document.
+        """
+        return "".join(self._elements())
+
+    def write(self, fout: Union[str, Path, IO[str]]):
+        """Write the SVG of the scheme to a file or a text buffer.
+
+        :param fout: File name or text buffer, e.g., an open file or `io.StringIO`.
+        """
+        if isinstance(fout, (str, Path)):
+            with open(fout, "w", encoding="utf-8") as fobj:
+                fobj.writelines(self._elements())
+        else:
+            fout.writelines(self._elements())
+
+    def _elements(self) -> Iterator[str]:
+        """Create the elements of the SVG document one by one.
+
+        :return: Iterator over the parts of the SVG document.
+        """
+        parser = self.config_parser
+        layout = parser.layout(self.darkmode, plain_labels=True)
+        colors = COLORS[bool(self.darkmode)]
+        main = colors["main"]
+        fsz_ticks, fsz_axes_labels, fsz_labels, fsz_title = parser.sett_fontsize
+        width, height = (72.0 * it for it in parser.sett_fig_size)
+
+        frame = layout.axes_frame()
+        x0, y0, x1, y1, left_ticks, right_ticks = frame
+        left_strs = [ut.my_formatter_plain(it) for it in left_ticks]
+        right_strs = format_ticks(right_ticks)
+        xscale = (x1 - x0) / layout.xlim[1]
+        yscale = (y1 - y0) / layout.ymax
+
+        def xpos(val):
+            return x0 + xscale * val
+
+        def ypos(val):
+            return y1 - yscale * val
+
+        yield (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(width)}pt" '
+            f'height="{_num(height)}pt" viewBox="0 0 {_num(width)} {_num(height)}" '
+            f'font-family="{FONT_FAMILY}">'
+        )
+        if not self.transparent:
+            yield f'<rect width="100%" height="100%" fill="{colors["background"]}"/>'
+        yield (
+            f'<defs><clipPath id="axes"><rect x="{_num(x0)}" y="{_num(y0)}" '
+            f'width="{_num(x1 - x0)}" height="{_num(y1 - y0)}"/></clipPath></defs>'
+            '<g clip-path="url(#axes)">'
+        )
+
+        # shade above the IP
+        yield (
+            f'<rect x="{_num(x0)}" y="{_num(y0)}" width="{_num(x1 - x0)}" '
+            f'height="{_num(ypos(layout.ip) - y0)}" fill="{colors["header"]}" '
+            'fill-opacity="0.5"/>'
+        )
+
+        # arrows
+        arrows = layout.arrows
+        polygons = layout.arrow_polygons()
+        xvals = xpos(polygons[..., 0]).tolist()
+        yvals = ypos(polygons[..., 1]).tolist()
+        for it in range(len(polygons)):
+            points = " ".join(
+                f"{xval:.6g},{yval:.6g}" for xval, yval in zip(xvals[it], yvals[it])
+            )
+            fill = arrows.color[it] if arrows.filled[it] else "none"
+            yield (
+                f'<polygon points="{points}" fill="{fill}" stroke="{arrows.color[it]}" '
+                f'stroke-width="{_num(LINE_WIDTH_ARROWS)}"/>'
+            )
+
+        # levels
+        levels = layout.levels
+        if len(levels.y) > 0:
+            path = "".join(
+                f"M{xmin:.6g} {yval:.6g}H{xmax:.6g}"
+                for yval, xmin, xmax in zip(
+                    ypos(levels.y).tolist(),
+                    xpos(levels.xmin).tolist(),
+                    xpos(levels.xmax).tolist(),
+                )
+            )
+            yield (
+                f'<path d="{path}" stroke="{main}" '
+                f'stroke-width="{_num(LINE_WIDTH_LEVELS)}"/>'
+            )
+
+        # crosses over forbidden transitions, same as matplotlib's "x" markers
+        forbidden = np.flatnonzero(arrows.forbidden)
+        if len(forbidden) > 0:
+            path = "".join(
+                f"M{_num(xpos(arrows.x[it]) - 10)} {_num(ypos(yval) - 10)}l20 20"
+                f"m0 -20l-20 20"
+                for it, yval in zip(
+                    forbidden, arrows.y[forbidden] + arrows.length[forbidden] / 2
+                )
+            )
+            yield f'<path d="{path}" stroke="#ff0000" stroke-width="5"/>'
+        yield "</g>"
+
+        # frame and ticks
+        tick_path = "".join(
+            f"M{_num(x0)} {_num(ypos(it))}h{_num(TICK_LENGTH)}" for it in left_ticks
+        ) + "".join(
+            f"M{_num(x1)} {_num(frame.ypos(it, layout.ylim_ev[1]))}"
+            f"h{_num(-TICK_LENGTH)}"
+            for it in right_ticks
+        )
+        yield (
+            f'<g stroke="{main}" stroke-width="{_num(LINE_WIDTH_AXES)}" fill="none">'
+            f'<rect x="{_num(x0)}" y="{_num(y0)}" width="{_num(x1 - x0)}" '
+            f'height="{_num(y1 - y0)}"/>'
+        )
+        if tick_path:
+            yield f'<path d="{tick_path}"/>'
+        yield "</g>"
+
+        # labels in the scheme
+        labels = layout.labels
+        for it in range(len(labels.x)):
+            yield _text(
+                xpos(labels.x[it]),
+                ypos(labels.y[it]),
+                labels.text[it],
+                fsz_labels,
+                labels.color[it] or main,
+                labels.ha[it],
+                labels.va[it],
+                labels.rotation[it],
+            )
+
+        # tick labels, axis labels, and title
+        for tick, tick_str in zip(left_ticks, left_strs):
+            yield _text(
+                x0 - TICK_PAD, ypos(tick), tick_str, fsz_ticks, main, "right", "center"
+            )
+        for tick, tick_str in zip(right_ticks, right_strs):
+            yield _text(
+                x1 + TICK_PAD,
+                frame.ypos(tick, layout.ylim_ev[1]),
+                tick_str,
+                fsz_ticks,
+                main,
+                "left",
+                "center",
+            )
+        yaxis = (y0 + y1) / 2
+        if left_ticks:
+            yield _text(
+                FIGURE_PAD,
+                yaxis,
+                f"Wavenumber ({layout.unit_wavenumber})",
+                fsz_axes_labels,
+                main,
+                "left",
+                "center",
+                90,
+            )
+        if right_ticks:
+            yield _text(
+                width - FIGURE_PAD,
+                yaxis,
+                "Energy (eV)",
+                fsz_axes_labels,
+                main,
+                "right",
+                "center",
+                90,
+            )
+        if parser.sett_title:
+            yield _text(
+                (x0 + x1) / 2,
+                y0 - TITLE_PAD,
+                parser.sett_title,
+                fsz_title,
+                main,
+                "center",
+                "bottom",
+            )
+
+        yield "</svg>\n"
+
+
+def write_svg(data: dict, fout: Union[str, Path, IO[str]], **kwargs):
+    """Write a scheme as SVG to a file or a text buffer.
+
+    :param data: Dictionary with the data to plot, directly from json file.
+    :param fout: File name or text buffer.
+    :param kwargs: Keyword arguments for the `SVGWriter`.
+    """
+    SVGWriter(data, **kwargs).write(fout)
+
+
+def _num(val: float) -> str:
+    """Format a coordinate compactly, with a precision of about 0.01 pt."""
+    return f"{val:.6g}"
+
+
+def _text(
+    x: float,
+    y: float,
+    text: str,
+    size: float,
+    color: str,
+    ha: str,
+    va: str,
+    rotation: float = 0,
+) -> str:
+    """Create a text element, aligned like matplotlib texts.
+
+    Multi-line texts are centered if rotated and aligned like `ha` otherwise.
+
+    :param x: x position in points.
+    :param y: y position in points.
+    :param text: Text, lines are separated by newlines.
+    :param size: Font size in points.
+    :param color: Color of the text.
+    :param ha: Horizontal alignment: "left", "center", or "right".
+    :param va: Vertical alignment: "top", "center", "bottom", or "baseline".
+    :param rotation: Rotation in degrees, 0 or 90.
+
+    :return: SVG text element.
+    """
+    lines = text.split("\n")
+    height = text_height(size) + (len(lines) - 1) * LINE_SPACING * size
+
+    if rotation:
+        # alignments of the rotated bounding box: lines run upwards, stacked to the
+        # right, such that `ha` aligns the stack and `va` the lines
+        anchor = "middle"
+        shift = {"left": 0.0, "center": height / 2, "right": height}[ha]
+        first = TEXT_ASCENT * size - shift
+        transform = f' transform="translate({_num(x)} {_num(y)}) rotate(-90)"'
+        xval = yval = 0.0
+    else:
+        anchor = {"left": "start", "center": "middle", "right": "end"}[ha]
+        if va == "baseline":
+            first = -(len(lines) - 1) * LINE_SPACING * size
+        else:
+            shift = {"top": 0.0, "center": height / 2, "bottom": height}[va]
+            first = TEXT_ASCENT * size - shift
+        transform = ""
+        xval, yval = x, y
+
+    tspans = "".join(
+        f'<tspan x="{_num(xval)}" y="{_num(yval + first + it * LINE_SPACING * size)}">'
+        f"{escape(line)}</tspan>"
+        for it, line in enumerate(lines)
+    )
+    return (
+        f'<text{transform} font-size="{_num(size)}" fill="{color}" '
+        f'text-anchor="{anchor}">{tspans}</text>'
+    )
@@ -0,0 +1,396 @@
+"""Write schemes as TikZ pictures for LaTeX documents, without matplotlib.
+
+The TikZ writer draws the same layout as the `Plotter`, see
+`rimsschemedrawer.layout`. Labels are written with the same LaTeX code as the
+mathtext labels of the figures, such that they are typeset in the font of the
+document. Like for the `rimsschemedrawer.svg` writer, the margins around the axes
+are estimated from the font sizes.
+
+Include the picture in your document with `\\input{scheme.tikz}`, the `tikz`
+package has to be loaded in the preamble.
+"""
+
+from pathlib import Path
+import re
+from typing import IO, Iterator, Union
+
+import numpy as np
+
+from rimsschemedrawer.json_parser import ConfigParser
+from rimsschemedrawer.layout import (
+    COLORS,
+    FIGURE_PAD,
+    LINE_SPACING,
+    TICK_LENGTH,
+    TICK_PAD,
+    TITLE_PAD,
+    format_ticks,
+)
+from rimsschemedrawer import utils as ut
+
+# Same line widths as the matplotlib defaults, in points
+LINE_WIDTH_LEVELS = 1.5
+LINE_WIDTH_ARROWS = 1.0
+LINE_WIDTH_AXES = 0.8
+
+# Anchors of nodes for matplotlib's alignments, for unrotated and rotated texts
+_ANCHORS_HA = {
+    0: {"left": "west", "center": "", "right": "east"},
+    90: {"left": "north", "center": "", "right": "south"},
+}
+_ANCHORS_VA = {
+    0: {"top": "north", "center": "", "bottom": "south", "baseline": "base"},
+    90: {"top": "east", "center": "", "bottom": "west", "baseline": "west"},
+}
+
+# Characters that have to be escaped outside of math mode
+_ESCAPES = str.maketrans(
+    {
+        "\\": "\\textbackslash{}",
+        "{": "\\{",
+        "}": "\\}",
+        "$": "\\$",
+        "#": "\\#",
+        "%": "\\%",
+        "&": "\\&",
+        "_": "\\_",
+        "^": "\\textasciicircum{}",
+        "~": "\\textasciitilde{}",
+        "<": "\\textless{}",
+        ">": "\\textgreater{}",
+    }
+)
+# Dollar signs that start or end math mode, i.e., not escaped as `\$`
+_MATH_SHIFT_RE = re.compile(r"(?<!\\)\$")
+
+
+class TikZWriter:
+    """Write a scheme as TikZ picture, with the same look as the `Plotter`.
+
+    The picture is built from strings only and uses absolute coordinates in
+    points, such that the figures in a document can be regenerated on every build.
+    Use `write` to stream it to a file or a text buffer, or `to_string` to get it
+    as a string.
+    """
+
+    def __init__(self, data: dict, **kwargs):
+        """Initialize the writer.
+
+        :param data: Dictionary with the data to plot, directly from json file.
+        :param kwargs: Additional keyword arguments.
+            - darkmode: Overwrite the darkmode settings from the config file.
+            - transparent: Overwrite the transparency settings from the config file.
+            - standalone: Wrap the picture into a standalone LaTeX document.
+                Defaults to `False`.
+        """
+        self.config_parser = ConfigParser(data)
+        self.darkmode = kwargs.get("darkmode", self.config_parser.sett_plot_dark)
+        self.transparent = kwargs.get(
+            "transparent", self.config_parser.sett_plot_transparent
+        )
+        self.standalone = kwargs.get("standalone", False)
+
+    def to_string(self) -> str:
+        """Get the TikZ code of the scheme.
+
+        :return: TikZ picture or LaTeX document.
+        """
+        return "".join(self._lines())
+
+    def write(self, fout: Union[str, Path, IO[str]]):
+        """Write the TikZ code of the scheme to a file or a text buffer.
+
+        :param fout: File name or text buffer, e.g., an open file or `io.StringIO`.
+        """
+        if isinstance(fout, (str, Path)):
+            with open(fout, "w", encoding="utf-8") as fobj:
+                fobj.writelines(self._lines())
+        else:
+            fout.writelines(self._lines())
+
+    def _lines(self) -> Iterator[str]:
+        """Create the lines of the TikZ code one by one.
+
+        :return: Iterator over the lines, including line breaks.
+        """
+        parser = self.config_parser
+        layout = parser.layout(self.darkmode)
+        colors = COLORS[bool(self.darkmode)]
+        fsz_ticks, fsz_axes_labels, fsz_labels, fsz_title = parser.sett_fontsize
+        width, height = (72.0 * it for it in parser.sett_fig_size)
+
+        # y-positions are counted from the bottom in TikZ
+        frame = layout.axes_frame()
+        x0, x1 = frame.x0, frame.x1
+        y0, y1 = height - frame.y1, height - frame.y0
+        xscale = (x1 - x0) / layout.xlim[1]
+        yscale = (y1 - y0) / layout.ymax
+
+        def xpos(val):
+            return x0 + xscale * val
+
+        def ypos(val):
+            return y0 + yscale * val
+
+        def ypos_ev(val):
+            return y0 + (y1 - y0) * val / layout.ylim_ev[1]
+
+        # one color per wavelength, named in the order of the arrows
+        arrows = layout.arrows
+        names = {}
+        for color in arrows.color.tolist():
+            names.setdefault(color, f"rsd{len(names)}")
+
+        if self.standalone:
+            yield "\\documentclass{standalone}\n\\usepackage{tikz}\n"
+            yield "\\begin{document}\n"
+        yield (
+            "\\begin{tikzpicture}[x=1pt, y=1pt, "
+            "every node/.style={inner sep=0pt, outer sep=0pt, text=rsdmain}, "
+            f"rsd labels/.style={{font={_font(fsz_labels)}}}, "
+            f"rsd ticks/.style={{font={_font(fsz_ticks)}}}, "
+            f"rsd axis labels/.style={{font={_font(fsz_axes_labels)}}}, "
+            f"rsd title/.style={{font={_font(fsz_title)}}}]\n"
+        )
+        for name, color in (
+            ("rsdmain", colors["main"]),
+            ("rsdbackground", colors["background"]),
+            ("rsdheader", colors["header"]),
+        ):
+            yield _define_color(name, color)
+        for color, name in names.items():
+            yield _define_color(name, color)
+
+        yield f"\\useasboundingbox (0,0) rectangle ({_num(width)},{_num(height)});\n"
+        if not self.transparent:
+            yield (
+                f"\\fill[rsdbackground] (0,0) rectangle "
+                f"({_num(width)},{_num(height)});\n"
+            )
+
+        yield "\\begin{scope}\n"
+        yield f"\\clip {_rectangle(x0, y0, x1, y1)};\n"
+
+        # shade above the IP
+        yield (
+            f"\\fill[rsdheader, fill opacity=0.5] "
+            f"{_rectangle(x0, ypos(layout.ip), x1, y1)};\n"
+        )
+
+        # arrows
+        polygons = layout.arrow_polygons()
+        xvals = xpos(polygons[..., 0]).tolist()
+        yvals = ypos(polygons[..., 1]).tolist()
+        for it in range(len(polygons)):
+            name = names[arrows.color[it]]
+            points = " -- ".join(
+                f"({xval:.2f},{yval:.2f})" for xval, yval in zip(xvals[it], yvals[it])
+            )
+            command = "filldraw" if arrows.filled[it] else "draw"
+            yield (
+                f"\\{command}[{name}, line width={_num(LINE_WIDTH_ARROWS)}pt, "
+                f"miter join] {points} -- cycle;\n"
+            )
+
+        # levels
+        levels = layout.levels
+        if len(levels.y) > 0:
+            path = " ".join(
+                f"({xmin:.2f},{yval:.2f}) -- ({xmax:.2f},{yval:.2f})"
+                for yval, xmin, xmax in zip(
+                    ypos(levels.y).tolist(),
+                    xpos(levels.xmin).tolist(),
+                    xpos(levels.xmax).tolist(),
+                )
+            )
+            yield f"\\draw[rsdmain, line width={_num(LINE_WIDTH_LEVELS)}pt] {path};\n"
+
+        # crosses over forbidden transitions, same as matplotlib's "x" markers
+        forbidden = np.flatnonzero(arrows.forbidden)
+        if len(forbidden) > 0:
+            path = " ".join(
+                f"({_num(xval - 10)},{_num(yval - 10)}) -- ++(20,20) "
+                f"({_num(xval - 10)},{_num(yval + 10)}) -- ++(20,-20)"
+                for xval, yval in zip(
+                    xpos(arrows.x[forbidden]).tolist(),
+                    ypos(arrows.y[forbidden] + arrows.length[forbidden] / 2).tolist(),
+                )
+            )
+            yield f"\\draw[red, line width=5pt] {path};\n"
+        yield "\\end{scope}\n"
+
+        # frame and ticks
+        yield (
+            f"\\draw[rsdmain, line width={_num(LINE_WIDTH_AXES)}pt] "
+            f"{_rectangle(x0, y0, x1, y1)}"
+        )
+        for tick in frame.ticks:
+            yield f" ({_num(x0)},{_num(ypos(tick))}) -- ++({_num(TICK_LENGTH)},0)"
+        for tick in frame.ticks_ev:
+            yield f" ({_num(x1)},{_num(ypos_ev(tick))}) -- ++({_num(-TICK_LENGTH)},0)"
+        yield ";\n"
+
+        # labels in the scheme
+        labels = layout.labels
+        for it in range(len(labels.x)):
+            color = labels.color[it]
+            yield _node(
+                xpos(labels.x[it]),
+                ypos(labels.y[it]),
+                labels.text[it],
+                "rsd labels" if color is None else f"rsd labels, text={names[color]}",
+                labels.ha[it],
+                labels.va[it],
+                labels.ma[it],
+                labels.rotation[it],
+            )
+
+        # tick labels, axis labels, and title
+        for tick in frame.ticks:
+            yield _node(
+                x0 - TICK_PAD,
+                ypos(tick),
+                _format_tick(tick),
+                "rsd ticks",
+                "right",
+                "center",
+            )
+        for tick, tick_str in zip(frame.ticks_ev, format_ticks(frame.ticks_ev)):
+            yield _node(
+                x1 + TICK_PAD, ypos_ev(tick), tick_str, "rsd ticks", "left", "center"
+            )
+        yaxis = (y0 + y1) / 2
+        if frame.ticks:
+            yield _node(
+                FIGURE_PAD,
+                yaxis,
+                f"Wavenumber ({layout.unit_wavenumber})",
+                "rsd axis labels",
+                "left",
+                "center",
+                rotation=90,
+            )
+        if frame.ticks_ev:
+            yield _node(
+                width - FIGURE_PAD,
+                yaxis,
+                "Energy (eV)",
+                "rsd axis labels",
+                "right",
+                "center",
+                rotation=90,
+            )
+        if parser.sett_title:
+            yield _node(
+                (x0 + x1) / 2,
+                y1 + TITLE_PAD,
+                parser.sett_title,
+                "rsd title",
+                "center",
+                "bottom",
+            )
+
+        yield "\\end{tikzpicture}\n"
+        if self.standalone:
+            yield "\\end{document}\n"
+
+
+def write_tikz(data: dict, fout: Union[str, Path, IO[str]], **kwargs):
+    """Write a scheme as TikZ picture to a file or a text buffer.
+
+    :param data: Dictionary with the data to plot, directly from json file.
+    :param fout: File name or text buffer.
+    :param kwargs: Keyword arguments for the `TikZWriter`.
+    """
+    TikZWriter(data, **kwargs).write(fout)
+
+
+def _define_color(name: str, color: str) -> str:
+    """Define a color from a hex string like "#0012a0"."""
+    return f"\\definecolor{{{name}}}{{HTML}}{{{color.lstrip('#').upper()}}}\n"
+
+
+def _escape(text: str) -> str:
+    """Escape special characters outside of math mode and break lines.
+
+    Text in math mode, i.e., between `$` signs, is left unchanged, such that the
+    mathtext of the labels is typeset by LaTeX. Like in matplotlib, the text only
+    contains math if it has an even number of `$` signs that are not escaped as
+    `\\$`. Otherwise, all of it is plain text.
+
+    :param text: Text of a label, lines are separated by newlines.
+
+    :return: LaTeX code of the text.
+    """
+    parts = _MATH_SHIFT_RE.split(text)
+    if len(parts) % 2 == 0:  # unbalanced, no math
+        parts = [text]
+    parts[::2] = (it.replace("\\$", "$").translate(_ESCAPES) for it in parts[::2])
+    return "$".join(parts).replace("\n", "\\\\")
+
+
+def _font(size: float) -> str:
+    """Select a font size with the same line spacing as matplotlib."""
+    return f"\\fontsize{{{_num(size)}}}{{{_num(LINE_SPACING * size)}}}\\selectfont"
+
+
+def _format_tick(val: float) -> str:
+    """Format a tick label of the cm-1 axis like `utils.my_formatter`.
+
+    :param val: Value to format, must be >= 0.
+
+    :return: LaTeX code of the tick label.
+    """
+    if val <= 1e-9:
+        return "$0$"
+    significand, sig_str, exp = ut.tick_parts(val)
+    if exp == 0:
+        return f"${sig_str}$"
+    if significand == 1:
+        return f"$10^{{{exp}}}$"
+    return f"${sig_str} \\times 10^{{{exp}}}$"
+
+
+def _node(
+    x: float,
+    y: float,
+    text: str,
+    style: str,
+    ha: str,
+    va: str,
+    ma: str = "center",
+    rotation: float = 0,
+) -> str:
+    """Create a text node, aligned like matplotlib texts.
+
+    :param x: x position in points.
+    :param y: y position in points.
+    :param text: Text, lines are separated by newlines.
+    :param style: Style of the node, e.g., "rsd labels".
+    :param ha: Horizontal alignment: "left", "center", or "right".
+    :param va: Vertical alignment: "top", "center", "bottom", or "baseline".
+    :param ma: Alignment of multiple lines: "left", "center", or "right".
+    :param rotation: Rotation in degrees, 0 or 90.
+
+    :return: TikZ node.
+    """
+    rotation = int(rotation)
+    anchor = f"{_ANCHORS_VA[rotation][va]} {_ANCHORS_HA[rotation][ha]}"
+    if rotation:  # anchors of rotated nodes are named north/south first
+        anchor = f"{_ANCHORS_HA[rotation][ha]} {_ANCHORS_VA[rotation][va]}"
+    options = f"{style}, anchor={anchor.strip() or 'center'}"
+    if "\n" in text:
+        options += f", align={ma}"
+    if rotation:
+        options += f", rotate={rotation}"
+    return f"\\node[{options}] at ({_num(x)},{_num(y)}) {{{_escape(text)}}};\n"
+
+
+def _num(val: float) -> str:
+    """Format a coordinate compactly, with a precision of 0.01 pt."""
+    return f"{val:.2f}".rstrip("0").rstrip(".")
+
+
+def _rectangle(x0: float, y0: float, x1: float, y1: float) -> str:
+    """Create a rectangle path from the lower left to the upper right corner."""
+    return f"({_num(x0)},{_num(y0)}) rectangle ({_num(x1)},{_num(y1)})"
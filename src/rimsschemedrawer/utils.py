@@ -1,10 +1,15 @@
 # Utility functions for the rims scheme drawer
 
-from typing import Union
+import bisect
+import functools
+import math
+import re
+from typing import List, NamedTuple, Optional, Tuple, Union
 
-import matplotlib
 import numpy as np
 
+from rimsschemedrawer.ip_table import get_ip_table
+
 DEFAULT_SETTINGS = {
     "settings": {
         "plot_title": "",
@@ -28,199 +33,154 @@ DEFAULT_SETTINGS = {
         "plot_style": "light",
     },
     "scheme": {
+        "charge": 0,
         "gs_term": "",
         "ip_term": "",
         "last_step_to_ip": False,
     },
 }
 
-IP_DICTIONARY = {
-    "H": 109678.77174307,
-    "He": 198310.66637,
-    "Li": 43487.1142,
-    "Be": 75192.64,
-    "B": 66928.04,
-    "C": 90820.348,
-    "N": 117225.7,
-    "O": 109837.02,
-    "F": 140524.5,
-    "Ne": 173929.75,
-    "Na": 41449.451,
-    "Mg": 61671.05,
-    "Al": 48278.48,
-    "Si": 65747.76,
-    "P": 84580.83,
-    "S": 83559.1,
-    "Cl": 104591.01,
-    "Ar": 127109.842,
-    "K": 35009.814,
-    "Ca": 49305.924,
-    "Sc": 52922.0,
-    "Ti": 55072.5,
-    "V": 54411.67,
-    "Cr": 54575.6,
-    "Mn": 59959.56,
-    "Fe": 63737.704,
-    "Co": 63564.6,
-    "Ni": 61619.77,
-    "Cu": 62317.46,
-    "Zn": 75769.31,
-    "Ga": 48387.634,
-    "Ge": 63713.24,
-    "As": 78950.0,
-    "Se": 78658.15,
-    "Br": 95284.8,
-    "Kr": 112914.433,
-    "Rb": 33690.81,
-    "Sr": 45932.2036,
-    "Y": 50145.6,
-    "Zr": 53507.832,
-    "Nb": 54513.8,
-    "Mo": 57204.3,
-    "Tc": 57421.68,
-    "Ru": 59366.4,
-    "Rh": 60160.1,
-    "Pd": 67241.14,
-    "Ag": 61106.45,
-    "Cd": 72540.05,
-    "In": 46670.107,
-    "Sn": 59232.69,
-    "Sb": 69431.34,
-    "Te": 72669.006,
-    "I": 84294.9,
-    "Xe": 97833.787,
-    "Cs": 31406.4677325,
-    "Ba": 42034.91,
-    "La": 44981.0,
-    "Ce": 44672.0,
-    "Pr": 44120.0,
-    "Nd": 44562.0,
-    "Pm": 45020.8,
-    "Sm": 45519.69,
-    "Eu": 45734.74,
-    "Gd": 49601.45,
-    "Tb": 47295.0,
-    "Dy": 47901.76,
-    "Ho": 48567.0,
-    "Er": 49262.0,
-    "Tm": 49880.57,
-    "Yb": 50443.2,
-    "Lu": 43762.6,
-    "Hf": 55047.9,
-    "Ta": 60891.4,
-    "W": 63427.7,
-    "Re": 63181.6,
-    "Os": 68058.9,
-    "Ir": 72323.9,
-    "Pt": 72257.8,
-    "Au": 74409.11,
-    "Hg": 84184.15,
-    "Tl": 49266.66,
-    "Pb": 59819.558,
-    "Bi": 58761.65,
-    "Po": 67896.31,
-    "At": 75150.8,
-    "Rn": 86692.5,
-    "Fr": 32848.872,
-    "Ra": 42573.36,
-    "Ac": 43394.52,
-    "Th": 50867.0,
-    "Pa": 49034.0,
-    "U": 49958.4,
-    "Np": 50535.0,
-    "Pu": 48601.0,
-    "Am": 48182.0,
-    "Cm": 48330.68,
-    "Bk": 49989.0,
-    "Cf": 50666.76,
-    "Es": 51364.58,
-    "Fm": 52422.5,
-    "Md": 53230.0,
-    "No": 53444.0,
-    "Lr": 40005.0,
-    "Rf": 48580.0,
-    "Db": 55000.0,
-    "Sg": 63000.0,
-    "Bh": 62000.0,
-    "Hs": 61000.0,
-}
-
-IP_REFERENCES_NON_NIST = {
-    "Pa": {
-        "author": "Naubereit",
-        "year": 2020,
-        "url": "http://doi.org/10.25358/openscience-5183",
-    },
-    "Fm": {
-        "author": "Grotrian",
-        "year": 2024,
-        "url": "http://grotrian.nsu.ru/en/element/54354",
-    },
-    "Md": {
-        "author": "Grotrian",
-        "year": 2024,
-        "url": "http://grotrian.nsu.ru/en/element/54355",
-    },
-}
-
 LASERS = ["Ti:Sa", "Dye", "Ti:Sa and Dye"]  # default is first entry - Ti:Sa
 
 PLOT_STYLES = ["light", "dark", "light transparent", "dark transparent"]
 
 
+def __getattr__(name: str):
+    """Create the dictionaries of the IP table for backwards compatibility.
+
+    `IP_DICTIONARY` holds the first IP of each element in cm-1,
+    `IP_REFERENCES_NON_NIST` the references of all IPs that are not from NIST.
+    Use `get_ip` and `get_ip_reference` or the `IPTable` instead.
+    """
+    table = get_ip_table()
+    neutral = table.charge == 0
+    if name == "IP_DICTIONARY":
+        return dict(zip(table.element[neutral].tolist(), table.ip[neutral].tolist()))
+    if name == "IP_REFERENCES_NON_NIST":
+        return {
+            ele: table.references[ref]
+            for ele, ref in zip(
+                table.element[neutral].tolist(), table.reference[neutral].tolist()
+            )
+            if table.references[ref]["author"] != "NIST ASD"
+        }
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class IPGuess(NamedTuple):
+    """Elements guessed from ionization potentials, see `guess_elements_from_ip`."""
+
+    element: np.ndarray
+    """Element with the closest IP."""
+    deviation: np.ndarray
+    """Given IP minus the IP of the guessed element in cm-1."""
+    runner_up: np.ndarray
+    """Element with the second closest IP."""
+    runner_up_deviation: np.ndarray
+    """Given IP minus the IP of the runner-up in cm-1."""
+    ambiguous: np.ndarray
+    """True if the runner-up's IP is within the tolerance of the given IP."""
+
+
+class Term(NamedTuple):
+    """Term symbol of a state, see `parse_term`."""
+
+    multiplicity: Optional[int]
+    """Spin multiplicity 2S+1, e.g., 3 for "3F2"."""
+    L: Optional[str]
+    """Letter of the orbital angular momentum, e.g., "F" for "3F2"."""
+    J: Optional[str]
+    """Total angular momentum as given, e.g., "2" for "3F2" or "9/2" for "4F9/2"."""
+    parity: Optional[str]
+    """"odd" if marked with "o" or "*" after the letter, otherwise not known."""
+    latex: Optional[str]
+    """LaTeX enabled string for matplotlib, `None` for an empty term."""
+    unicode: Optional[str]
+    """Plain string with Unicode super- and subscripts, `None` for an empty term."""
+    raw: str
+    """Term symbol as given."""
+
+
+# discrete colors for wavelengths, starting at the lower edges (in nm) of deep blue,
+# light blue, green, yellow, orange, red, and infrared (> 700 nm)
+_COLOR_EDGES = np.array([450, 484, 500, 565, 590, 625, np.nextafter(700, np.inf)])
+_COLORS_LIGHT = np.array(
+    [
+        "#5f00a0",  # violet
+        "#0012a0",  # deep blue
+        "#0098ff",  # light blue
+        "#0aa000",  # green
+        "#c09e00",  # yellow
+        "#d75700",  # orange
+        "#b70000",  # red
+        "#500000",  # infrared
+    ]
+)
+_COLORS_DARK = np.array(
+    [
+        "#9e85af",  # violet
+        "#8c96df",  # deep blue
+        "#82b1d1",  # light blue
+        "#60a55b",  # green
+        "#f4e67c",  # yellow
+        "#ffa669",  # orange
+        "#d27878",  # red
+        "#b98989",  # infrared
+    ]
+)
+_LATEX_CHARACTERS = ["{", "}", "^", "_"]
+_LATEX_SCRIPT_RE = re.compile(r"([\^_])(?:\{([^{}]*)\}|(.))")
+_NON_DIGIT_RE = re.compile(r"\D")
+_ODD_PARITY_MARKERS = ["o", "*"]
+_SPECIAL_TERMS = ["IP", "AI", "Rydberg", "Ryd"]
+_SPECTRUM_NM = np.arange(380, 781)  # wavelengths of the continuous color table
+_SUBSCRIPTS = str.maketrans("0123456789+-=()o", "₀₁₂₃₄₅₆₇₈₉₊₋₌₍₎ₒ")
+_SUPERSCRIPTS = str.maketrans("0123456789+-=()no", "⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾ⁿᵒ")
+
+
 def color_wavelength(lmb: float, darkmode: bool = False) -> str:
     """Color the wavelength according to the wavelength.
 
     When darkmode is turned on, pastel colors are used. Definitions of colors are
     taken from here:
     https://sciencenotes.org/visible-light-spectrum-wavelengths-and-colors/
+    See `color_wavelengths` to color many wavelengths at once.
 
     :param lmb: Wavelength in nm.
 
     :return: Color string.
     """
-    dict_light = {
-        "ir": "#500000",
-        "red": "#b70000",
-        "orange": "#d75700",
-        "yellow": "#c09e00",
-        "green": "#0aa000",
-        "light_blue": "#0098ff",
-        "deep_blue": "#0012a0",
-        "violet": "#5f00a0",
-    }
-    dict_dark = {
-        "ir": "#b98989",
-        "red": "#d27878",
-        "orange": "#ffa669",
-        "yellow": "#f4e67c",
-        "green": "#60a55b",
-        "light_blue": "#82b1d1",
-        "deep_blue": "#8c96df",
-        "violet": "#9e85af",
-    }
+    return str(color_wavelengths(lmb, darkmode)[0])
 
-    if darkmode:
-        dict_use = dict_dark
-    else:
-        dict_use = dict_light
-
-    if lmb > 700:  # infrared
-        return dict_use["ir"]
-    elif lmb >= 625:  # red
-        return dict_use["red"]
-    elif lmb >= 590:  # orange
-        return dict_use["orange"]
-    elif lmb >= 565:  # yellow
-        return dict_use["yellow"]
-    elif lmb >= 500:  # green
-        return dict_use["green"]
-    elif lmb >= 484:  # light blue
-        return dict_use["light_blue"]
-    elif lmb >= 450:  # deep blue
-        return dict_use["deep_blue"]
-    else:  # violet
-        return dict_use["violet"]
+
+def color_wavelengths(
+    lmb: Union[float, np.ndarray], darkmode: bool = False, continuous: bool = False
+) -> np.ndarray:
+    """Color many wavelengths at once.
+
+    By default, the discrete colors of `color_wavelength` are used: violet below
+    450 nm (including the UV), then deep blue, light blue, green, yellow, orange,
+    red, and infrared above 700 nm. If `continuous` is True, the colors follow the
+    visible spectrum as perceived by the CIE 1931 standard observer instead.
+    Wavelengths outside 380 nm to 780 nm then get the color at the closest edge.
+    Undefined wavelengths (NaN) are colored like the shortest ones, i.e., violet.
+
+    :param lmb: Wavelength(s) in nm.
+    :param darkmode: Use pastel colors for a dark background?
+    :param continuous: Use a continuous spectrum instead of discrete colors?
+
+    :return: Array with one color string per wavelength.
+    """
+    lmb = np.atleast_1d(np.asarray(lmb, dtype=float))
+    # NaN would be sorted behind all edges and can't be cast to an index
+    lmb = np.where(np.isnan(lmb), -np.inf, lmb)
+
+    if continuous:
+        idx = np.rint(np.clip(lmb, _SPECTRUM_NM[0], _SPECTRUM_NM[-1]) - _SPECTRUM_NM[0])
+        return _spectrum_colors(darkmode)[idx.astype(int)]
+
+    colors = _COLORS_DARK if darkmode else _COLORS_LIGHT
+    return colors[np.searchsorted(_COLOR_EDGES, lmb, side="right")]
 
 
 def cm_2_to_nm(cm: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
@@ -234,38 +194,30 @@ def cm_2_to_nm(cm: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
 
 def get_elements() -> list:
     """Get a list of all elements."""
-    return list(IP_DICTIONARY.keys())
+    return list(get_ip_table().elements)
 
 
-def get_ip(ele: str) -> float:
+def get_ip(ele: str, charge: int = 0) -> float:
     """Get the ionization potential for a given element.
 
     :param ele: Element symbol, not case sensitive.
+    :param charge: Charge state, 0 for the first IP of the neutral atom.
 
     :return: Ionization potential in cm-1.
     """
 
-    return IP_DICTIONARY[ele.capitalize()]
+    return get_ip_table().get_ip(ele.capitalize(), charge)
 
 
-def get_ip_reference(ele: str) -> dict:
+def get_ip_reference(ele: str, charge: int = 0) -> dict:
     """Get a reference for the ionization potential.
 
-    If element is in `IP_REFERENCES_NON_NIST`, return the reference dictionary.
-    Otherwise, return a dictionary with "NIST" entries.
+    :param ele: Element symbol, not case sensitive.
+    :param charge: Charge state, 0 for the first IP of the neutral atom.
 
     :return: Dictionary with "author", "year", and "url" entries.
     """
-    nist_dict = {
-        "author": "NIST ASD",
-        "year": 2024,
-        "url": "https://www.nist.gov/pml/atomic-spectra-database",
-    }
-
-    if ele in IP_REFERENCES_NON_NIST.keys():
-        return IP_REFERENCES_NON_NIST[ele]
-    else:
-        return nist_dict
+    return get_ip_table().entry(ele.capitalize(), charge).reference
 
 
 def guess_element_from_ip(ip: float) -> str:
@@ -273,40 +225,118 @@ def guess_element_from_ip(ip: float) -> str:
 
     This routine is mainly provided for backwards compatibility with older
     RIMSSchemeDrawer instances, where the user used to define the IP manually.
+    See `guess_elements_from_ip` to guess many elements at once.
 
     :param ip: Ionization potential in cm-1.
     :return: Element symbol (best guess).
     """
-    eles, values = list(IP_DICTIONARY.keys()), list(IP_DICTIONARY.values())
-    values = np.array(values)
-    diff = np.abs(values - ip)
-    ind = np.argmin(diff)
-    return eles[ind]
+    values, elements, order = _ip_index_lists()
+
+    # neighbors in the sorted index, for equal IPs use the first in the table
+    idx = bisect.bisect_left(values, ip)
+    candidates = [
+        bisect.bisect_left(values, values[it])
+        for it in (idx - 1, idx)
+        if 0 <= it < len(values)
+    ]
+    best = min(candidates, key=lambda it: (abs(ip - values[it]), order[it]))
+    return elements[best]
 
 
-def my_exp_formatter(val: float, prec: int) -> str:
-    """Format a value with a given precision to LaTeX output."""
+def guess_elements_from_ip(
+    ips: Union[float, np.ndarray], tolerance: float = 10.0
+) -> IPGuess:
+    """Guess the elements for many ionization potentials at once.
+
+    The element with the closest IP is guessed. The element with the second closest
+    IP is reported as runner-up. If the IP of the runner-up is within the tolerance
+    of the given IP as well, the guess is marked as ambiguous.
+
+    :param ips: Ionization potential(s) in cm-1.
+    :param tolerance: Maximum deviation in cm-1 of the runner-up's IP from the
+        given IP for the guess to be ambiguous.
+
+    :return: Guessed elements, runner-ups, and their deviations, one entry per IP.
+    """
+    ips = np.atleast_1d(np.asarray(ips, dtype=float))
+    values, elements, order = _ip_index()
+
+    num = len(values)
+
+    # neighbors in the sorted index, the closer one is the guess. For equal IPs, use
+    # the first element in the table like `np.argmin` would.
+    idx_right = np.clip(np.searchsorted(values, ips), 1, num - 1)
+    idx_right = np.searchsorted(values, values[idx_right])
+    idx_left = np.searchsorted(values, values[np.clip(idx_right - 1, 0, num - 1)])
+
+    dev_left = np.abs(ips - values[idx_left])
+    dev_right = np.abs(ips - values[idx_right])
+    left_closer = (dev_left < dev_right) | (
+        (dev_left == dev_right) & (order[idx_left] < order[idx_right])
+    )
+    idx_best = np.where(left_closer, idx_left, idx_right)
+
+    # the runner-up is a neighbor of the guess in the sorted index
+    idx_lower = np.searchsorted(values, values[np.clip(idx_best - 1, 0, num - 1)])
+    idx_upper = np.clip(idx_best + 1, 0, num - 1)
+    lower_closer = (idx_best > 0) & (
+        (idx_best == num - 1)
+        | (np.abs(ips - values[idx_lower]) <= np.abs(ips - values[idx_upper]))
+    )
+    idx_second = np.where(lower_closer, idx_lower, idx_upper)
+
+    dev_second = ips - values[idx_second]
+    return IPGuess(
+        element=elements[idx_best],
+        deviation=ips - values[idx_best],
+        runner_up=elements[idx_second],
+        runner_up_deviation=dev_second,
+        ambiguous=np.abs(dev_second) <= tolerance,
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def my_exp_formatter(val: float, prec: int, plain: bool = False) -> str:
+    """Format a value with a given precision to LaTeX output.
+
+    :param val: Value to format.
+    :param prec: Number of digits after the decimal point.
+    :param plain: Return a plain string with Unicode superscripts instead, e.g.,
+        "1.2×10⁸".
+
+    :return: Formatted string.
+    """
     value_str = f"{val:.{prec}e}"
     numb, exp = value_str.split("e")
+    if plain:
+        return f"{numb}×10{str(int(exp)).translate(_SUPERSCRIPTS)}"
     return f"${numb} \\times 10^{{{int(exp)}}}$"
 
 
 def my_formatter(val: float, *args) -> str:
     """Format the axis labels for the left y-axis in scientific notation.
 
+    Labels are cached, such that repeated tick values are only formatted once.
+
     :param val: Value to format, must be >= 0.
     :param args: Additional arguments - will be ignored.
 
     :return: Properly formatted string.
     """
-    fform = matplotlib.ticker.ScalarFormatter(useOffset=False, useMathText=True)
-    fform.set_scientific((0, 0))
-    if val <= 1e-9:  # some reasonable cutoff
-        val_ret = "$0$"
-    else:
-        val_ret = f"${fform.format_data(val)}$"
+    return _format_tick(float(val), False)
+
+
+def my_formatter_plain(val: float, *args) -> str:
+    """Format the axis labels like `my_formatter`, but without mathtext.
+
+    Exponents are written with Unicode superscripts, e.g., "2×10⁴".
 
-    return val_ret
+    :param val: Value to format, must be >= 0.
+    :param args: Additional arguments - will be ignored.
+
+    :return: Properly formatted string.
+    """
+    return _format_tick(float(val), True)
 
 
 def nm_to_cm_2(nm: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
@@ -318,62 +348,221 @@ def nm_to_cm_2(nm: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
     return 1e7 / nm
 
 
+@functools.lru_cache(maxsize=4096)
+def parse_term(tstr: str) -> Term:
+    """Parse a term symbol and format it as a LaTeX enabled string.
+
+    Term symbols are given as, e.g., "3F2" or "4F9/2": multiplicity, orbital angular
+    momentum letter, and J. Odd parity can be indicated by an "o" or a "*" right
+    after the letter, e.g., "3Fo2". If only J is known, the term can be given as
+    "J=3". Strings that contain LaTeX characters are only wrapped in `$`, and
+    special states like "IP", "AI", "Rydberg", and "Ryd" are returned unchanged.
+
+    Besides the LaTeX string for matplotlib's mathtext, a plain string with Unicode
+    super- and subscripts is created, e.g., "³F₂" for "3F2" and "³F°₂" for "3Fo2".
+
+    Results are cached, such that repeated terms only cost a dictionary lookup.
+
+    :param tstr: Term symbol to parse.
+
+    :return: Parsed term symbol. Parts that could not be determined are `None`.
+    """
+    if tstr == "":
+        return Term(None, None, None, None, None, None, tstr)
+
+    if any(lch in tstr for lch in _LATEX_CHARACTERS):
+        latex = "$" + tstr.replace(" ", "\\,") + "$"
+        return Term(None, None, None, None, latex, _latex_to_unicode(tstr), tstr)
+
+    # some exceptions like AI and IP and terms where only J is given, e.g., J=3
+    if tstr in _SPECIAL_TERMS:
+        return Term(None, None, None, None, tstr, tstr, tstr)
+    if "=" in tstr:
+        key, _, value = tstr.partition("=")
+        j_value = value.strip() if key.strip() == "J" else None
+        return Term(None, None, j_value, None, tstr, tstr, tstr)
+
+    # the letter is the first non-digit after the first slash, or before the slash
+    letter = _NON_DIGIT_RE.search(tstr, tstr.find("/") + 1) or _NON_DIGIT_RE.search(
+        tstr
+    )
+    if letter is None:
+        return Term(None, None, None, None, tstr, tstr, tstr)
+
+    letterind = letter.start()
+    mult_str = tstr[:letterind]
+    j_str = tstr[letterind + 1 :]
+
+    # set up the three parts for the latex string
+    latex = f"$^{{{mult_str}}}${tstr[letterind]}$_{{{j_str}}}$"
+
+    parity = None
+    if j_str[:1] in _ODD_PARITY_MARKERS:
+        parity = "odd"
+        j_str = j_str[1:]
+
+    # odd parity is written as a degree sign in plain text
+    unicode = (
+        mult_str.translate(_SUPERSCRIPTS)
+        + tstr[letterind]
+        + ("°" if parity else "")
+        + j_str.translate(_SUBSCRIPTS)
+    )
+
+    return Term(
+        int(mult_str) if mult_str.isdecimal() else None,
+        tstr[letterind],
+        j_str if j_str else None,
+        parity,
+        latex,
+        unicode,
+        tstr,
+    )
+
+
 def term_to_string(tstr: str):
     """Convert term symbol to LaTeX enabled string.
 
     Converts a term symbol string to a LaTeX enabled matplotlib string
-    If already a LaTeX string, just return it.
+    If already a LaTeX string, just return it. See `parse_term` for details.
     :param tstr:   Input string to convert
     :return:       Output string LaTeX enabled for Matplotlib
     """
-    if tstr == "":
-        return None
-
-    latex_characters = ["{", "}", "^", "_"]
-    for lch in latex_characters:
-        if lch in tstr:
-            tstr = tstr.replace(" ", "\\,")
-            return f"${tstr}$"
-
-    # some exceptionslike AI and IP
-    if tstr == "IP":
-        return "IP"
-    if tstr == "AI":
-        return "AI"
-    if tstr == "Rydberg":
-        return "Rydberg"
-    if tstr == "Ryd":
-        return "Ryd"
-
-    # if there is an equal sign in there, leave it as is
-    if tstr.find("=") != -1:
-        return tstr
-
-    # find the first slash and start looking for the letter after that
-    start = tstr.find("/") + 1
-    letterind = -1
-    for it in range(start, len(tstr)):
-        try:
-            float(tstr[it])
-        except ValueError:
-            letterind = it
-            break
-    # if / comes after the letter:
-    if letterind == -1:
-        start = 0
-        letterind = -1
-        for it in range(start, len(tstr)):
-            try:
-                float(tstr[it])
-            except ValueError:
-                letterind = it
-                break
-    if letterind == -1:
-        return tstr
+    return parse_term(tstr).latex
 
-    # set up the three parts for the latex string
-    tmp1 = "$^{" + tstr[0:letterind] + "}$"
-    tmp2 = tstr[letterind]
-    tmp3 = "$_{" + tstr[letterind + 1 :] + "}$"
 
-    return tmp1 + tmp2 + tmp3
+def tick_parts(val: float) -> Tuple[float, str, int]:
+    """Split a tick value into significand and exponent, see `my_formatter`.
+
+    Uses the same notation as matplotlib's ScalarFormatter with mathtext, such that
+    other writers, e.g., `rimsschemedrawer.tikz`, can format ticks like the figures.
+
+    :param val: Value to split, must be > 0.
+
+    :return: Significand, formatted significand, and exponent.
+    """
+    exp = math.floor(math.log10(val))
+    significand = round(val / 10**exp, 10)
+    sig_str = "%d" % significand if significand % 1 == 0 else f"{significand:.10g}"
+    return significand, sig_str, exp
+
+
+@functools.lru_cache(maxsize=2)
+def _spectrum_colors(darkmode: bool) -> np.ndarray:
+    """Create the table of continuous colors for `_SPECTRUM_NM`.
+
+    The CIE 1931 color matching functions are approximated with the multi-lobe fit
+    of Wyman, Sloan, and Shirley, JCGT 2, 1 (2013), converted to sRGB, clipped to
+    the sRGB gamut, and scaled to full brightness. Colors are darkened for light
+    mode and mixed with white for dark mode, like the discrete colors.
+
+    :param darkmode: Create the table for dark mode?
+
+    :return: Array with the hex color strings.
+    """
+
+    # the fit is not accurate in the tails, where the hue does not change anymore
+    lmb = np.clip(_SPECTRUM_NM, 400, 650)
+
+    def gauss(mu: float, sigma_low: float, sigma_high: float) -> np.ndarray:
+        sigma = np.where(lmb < mu, sigma_low, sigma_high)
+        return np.exp(-0.5 * ((lmb - mu) / sigma) ** 2)
+
+    xyz = np.array(
+        [
+            1.056 * gauss(599.8, 37.9, 31.0)
+            + 0.362 * gauss(442.0, 16.0, 26.7)
+            - 0.065 * gauss(501.1, 20.4, 26.2),
+            0.821 * gauss(568.8, 46.9, 40.5) + 0.286 * gauss(530.9, 16.3, 31.1),
+            1.217 * gauss(437.0, 11.8, 36.0) + 0.681 * gauss(459.0, 26.0, 13.8),
+        ]
+    )
+    xyz_to_srgb = np.array(
+        [
+            [3.2406, -1.5372, -0.4986],
+            [-0.9689, 1.8758, 0.0415],
+            [0.0557, -0.2040, 1.0570],
+        ]
+    )
+    # spectral colors are outside of sRGB: clip negative channels
+    rgb = np.clip(xyz_to_srgb @ xyz, 0, None).T
+    rgb /= rgb.max(axis=1, keepdims=True)
+    rgb = np.where(
+        rgb <= 0.0031308, 12.92 * rgb, 1.055 * rgb ** (1 / 2.4) - 0.055
+    )  # gamma correction
+
+    if darkmode:
+        rgb = 0.55 * rgb + 0.45
+    else:
+        rgb = 0.75 * rgb
+
+    rgb = np.rint(rgb * 255).astype(int)
+    return np.array([f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb])
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_tick(val: float, plain: bool) -> str:
+    """Format a tick label in scientific notation, see `my_formatter`.
+
+    :param val: Value to format, must be >= 0.
+    :param plain: Format with Unicode superscripts instead of mathtext.
+
+    :return: Formatted tick label.
+    """
+    if val <= 1e-9:  # some reasonable cutoff
+        return "0" if plain else "$0$"
+
+    if plain:
+        significand, sig_str, exp = tick_parts(val)
+        if exp == 0:
+            return sig_str
+        exp_str = f"10{str(exp).translate(_SUPERSCRIPTS)}"
+        return exp_str if significand == 1 else f"{sig_str}×{exp_str}"
+
+    from matplotlib.ticker import ScalarFormatter  # only needed for plotting
+
+    fform = ScalarFormatter(useOffset=False, useMathText=True)
+    fform.set_scientific((0, 0))
+    return f"${fform.format_data(val)}$"
+
+
+@functools.lru_cache(maxsize=1)
+def _ip_index() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Create the index of all IPs, sorted by value.
+
+    :return: Sorted IPs, their elements, and their position in the IP table.
+    """
+    table = get_ip_table()
+    neutral = table.charge == 0
+    elements = table.element[neutral]
+    values = table.ip[neutral]
+    order = np.argsort(values, kind="stable")
+    return values[order], elements[order], order
+
+
+@functools.lru_cache(maxsize=1)
+def _ip_index_lists() -> Tuple[List[float], List[str], List[int]]:
+    """Get the index of all IPs as lists for fast lookups of single values.
+
+    :return: Sorted IPs, their elements, and their position in the IP table.
+    """
+    return tuple(it.tolist() for it in _ip_index())
+
+
+def _latex_to_unicode(tstr: str) -> str:
+    """Convert super- and subscripts of a LaTeX string to Unicode characters.
+
+    Characters without a Unicode super- or subscript are kept as they are.
+
+    :param tstr: LaTeX string, e.g., "^{3}F_{2}".
+
+    :return: Plain string, e.g., "³F₂".
+    """
+
+    def script(match: re.Match) -> str:
+        content = match.group(2) if match.group(2) is not None else match.group(3)
+        table = _SUPERSCRIPTS if match.group(1) == "^" else _SUBSCRIPTS
+        return content.translate(table)
+
+    tstr = _LATEX_SCRIPT_RE.sub(script, tstr.replace("$", ""))
+    return tstr.replace("\\,", "\u2009").replace("{", "").replace("}", "")
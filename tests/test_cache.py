@@ -0,0 +1,81 @@
+# Test the render cache
+
+import os
+
+import pytest
+
+from rimsschemedrawer import cache as rc
+import rimsschemedrawer.json_parser
+
+
+@pytest.fixture
+def data(data_path) -> dict:
+    """Provide the Ti scheme as a dictionary."""
+    return rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+
+
+def test_key_normalized(tmp_path, data):
+    """Equivalent schemes share the same key."""
+    cache = rc.RenderCache(tmp_path)
+    data_equiv = {"scheme": dict(data["scheme"]), "settings": dict(data["settings"])}
+    data_equiv["scheme"]["gs_level"] = "0.0"
+    data_equiv["settings"]["fig_width"] = "5.0"
+
+    assert cache.key(data) == cache.key(data_equiv)
+
+
+def test_key_render_settings(tmp_path, data):
+    """Keys differ for different formats, resolutions, and plotter arguments."""
+    cache = rc.RenderCache(tmp_path)
+    keys = {
+        cache.key(data, "pdf"),
+        cache.key(data, "png"),
+        cache.key(data, "png", dpi=300),
+        cache.key(data, "pdf", darkmode=True),
+    }
+
+    assert len(keys) == 4
+
+
+def test_render_cached(tmp_path, data, monkeypatch):
+    """Return the cached figure without rendering it again."""
+    cache = rc.RenderCache(tmp_path)
+    fout = tmp_path.joinpath("out/ti.png")
+    fout.parent.mkdir()
+
+    content = cache.render(data, "png")
+    monkeypatch.setattr(
+        "rimsschemedrawer.plotter.Plotter", lambda *args, **kwargs: 1 / 0
+    )
+    cache.savefig(data, fout)
+
+    assert content.startswith(b"\x89PNG")
+    assert fout.read_bytes() == content
+    assert cache.size == len(content)
+
+
+def test_evict_lru(tmp_path):
+    """Evict the least recently used entries when the cache is full."""
+    cache = rc.RenderCache(tmp_path, max_size=25)
+    cache.put("a", b"0" * 10)
+    cache.put("b", b"0" * 10)
+    os.utime(tmp_path.joinpath("a"), (0, 0))
+    os.utime(tmp_path.joinpath("b"), (1, 1))
+    assert cache.get("a") is not None  # a is now the most recently used entry
+
+    cache.put("c", b"0" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.size == 20
+
+
+def test_clear(tmp_path):
+    """Remove all entries from the cache."""
+    cache = rc.RenderCache(tmp_path)
+    cache.put("a", b"0")
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert cache.size == 0
@@ -0,0 +1,162 @@
+# Test the command line interface
+
+import pytest
+
+from rimsschemedrawer import cli
+
+
+def test_collect_files(data_path):
+    """Collect files from directories, files, and glob patterns without duplicates."""
+    fin = data_path.joinpath("ti.json")
+    files_dir = cli.collect_files([str(data_path)])
+    files_all = cli.collect_files(
+        [str(data_path), str(fin), str(data_path.joinpath("ti*.json"))]
+    )
+
+    assert fin in files_dir
+    assert files_all == files_dir
+    assert all(it.suffix == ".json" for it in files_dir)
+
+
+def test_collect_files_none(tmp_path):
+    """Return an empty list if nothing is found."""
+    assert cli.collect_files([str(tmp_path), str(tmp_path.joinpath("*.json"))]) == []
+
+
+def test_output_file(tmp_path):
+    """Create output file names next to the input or in the output directory."""
+    fin = tmp_path.joinpath("scheme.json")
+    assert cli.output_file(fin, "png") == tmp_path.joinpath("scheme.png")
+    assert cli.output_file(fin, "svg", tmp_path.joinpath("out")) == tmp_path.joinpath(
+        "out/scheme.svg"
+    )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_main_render(data_path, tmp_path, capsys, jobs):
+    """Render files to the output directory and report errors per file."""
+    broken = tmp_path.joinpath("broken.json")
+    broken.write_text("{}")
+
+    ret = cli.main(
+        [
+            "render",
+            str(data_path.joinpath("ti.json")),
+            str(data_path.joinpath("w_nm.json")),
+            str(broken),
+            "-o",
+            str(tmp_path.joinpath("out")),
+            "-f",
+            "png",
+            "-j",
+            str(jobs),
+        ]
+    )
+    out, err = capsys.readouterr()
+
+    assert ret == 1
+    assert tmp_path.joinpath("out/ti.png").exists()
+    assert tmp_path.joinpath("out/w_nm.png").exists()
+    assert not tmp_path.joinpath("out/broken.png").exists()
+    assert "broken.json" in err
+    assert "Rendered 2 of 3 files." in out
+
+
+def test_main_no_files(tmp_path, capsys):
+    """Return an error code if no files are found."""
+    ret = cli.main(["render", str(tmp_path)])
+    _, err = capsys.readouterr()
+
+    assert ret == 1
+    assert "No json files found" in err
+
+
+def test_main_render_cache(data_path, tmp_path):
+    """Render files through the render cache."""
+    args = [
+        "render",
+        str(data_path.joinpath("ti.json")),
+        "-o",
+        str(tmp_path.joinpath("out")),
+        "--cache",
+        str(tmp_path.joinpath("cache")),
+        "-j",
+        "1",
+    ]
+    assert cli.main(args) == 0
+    assert cli.main(args) == 0
+
+    assert tmp_path.joinpath("out/ti.pdf").exists()
+    assert len(list(tmp_path.joinpath("cache").iterdir())) == 1
+
+
+def test_main_render_plain_labels(data_path, tmp_path):
+    """Render files with plain text labels."""
+    args = [
+        "render",
+        str(data_path.joinpath("ti.json")),
+        "-o",
+        str(tmp_path),
+        "-f",
+        "png",
+        "-j",
+        "1",
+        "--plain-labels",
+    ]
+    assert cli.main(args) == 0
+    assert tmp_path.joinpath("ti.png").exists()
+
+
+def test_main_render_native_svg(data_path, tmp_path):
+    """Write svg files without matplotlib."""
+    args = [
+        "render",
+        str(data_path.joinpath("ti.json")),
+        "-o",
+        str(tmp_path),
+        "-j",
+        "1",
+        "--native-svg",
+    ]
+    assert cli.main(args) == 0
+    assert tmp_path.joinpath("ti.svg").read_text(encoding="utf-8").startswith("<svg")
+
+
+def test_main_render_tikz(data_path, tmp_path):
+    """Write TikZ pictures without matplotlib."""
+    args = ["render", str(data_path.joinpath("ti.json")), "-o", str(tmp_path)]
+    assert cli.main(args + ["-f", "tikz", "-j", "1"]) == 0
+    tikz = tmp_path.joinpath("ti.tikz").read_text(encoding="utf-8")
+    assert tikz.startswith("\\begin{tikzpicture}")
+
+
+def test_main_render_native_svg_format(data_path, tmp_path):
+    """Refuse to write other formats than svg with --native-svg."""
+    args = ["render", str(data_path.joinpath("ti.json")), "-o", str(tmp_path)]
+    with pytest.raises(SystemExit):
+        cli.main(args + ["--native-svg", "-f", "pdf"])
+    assert cli.main(args + ["--native-svg", "-f", "svg", "-j", "1"]) == 0
+
+
+def test_main_render_same_names(data_path, tmp_path, capsys):
+    """Do not overwrite outputs of files with the same name from different folders."""
+    other = tmp_path.joinpath("other")
+    other.mkdir()
+    other.joinpath("ti.json").write_text(data_path.joinpath("ti.json").read_text())
+
+    ret = cli.main(
+        [
+            "render",
+            str(data_path.joinpath("ti.json")),
+            str(other.joinpath("ti.json")),
+            "-o",
+            str(tmp_path.joinpath("out")),
+            "-f",
+            "tikz",
+        ]
+    )
+    _, err = capsys.readouterr()
+
+    assert ret == 1
+    assert "overwrite" in err
+    assert not tmp_path.joinpath("out/ti.tikz").exists()
@@ -0,0 +1,85 @@
+# Test that importing the package stays lightweight
+
+import subprocess
+import sys
+
+import pytest
+
+import rimsschemedrawer
+
+# generous budget for importing the package, matplotlib alone takes longer on most
+# machines
+IMPORT_TIME_BUDGET = 1.0  # seconds
+
+
+def run_python(code: str) -> str:
+    """Run python code in a fresh interpreter and return its output."""
+    ret = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    return ret.stdout.strip()
+
+
+def test_import_no_matplotlib(data_path):
+    """Parse a scheme without importing matplotlib."""
+    fin = data_path.joinpath("ti.json")
+    code = (
+        "import sys\n"
+        "import rimsschemedrawer\n"
+        f"data = rimsschemedrawer.json_reader({str(fin)!r})\n"
+        "rimsschemedrawer.ConfigParser(data)\n"
+        "print('matplotlib' in sys.modules)\n"
+    )
+    assert run_python(code) == "False"
+
+
+def test_svg_no_matplotlib(data_path):
+    """Write a scheme to SVG and TikZ without importing matplotlib."""
+    fin = data_path.joinpath("ti.json")
+    code = (
+        "import sys\n"
+        "import rimsschemedrawer\n"
+        "from rimsschemedrawer.svg import SVGWriter\n"
+        "from rimsschemedrawer.tikz import TikZWriter\n"
+        f"data = rimsschemedrawer.json_reader({str(fin)!r})\n"
+        "SVGWriter(data).to_string()\n"
+        "TikZWriter(data).to_string()\n"
+        "print('matplotlib' in sys.modules)\n"
+    )
+    assert run_python(code) == "False"
+
+
+@pytest.mark.parametrize("options", [["--native-svg"], ["-f", "tikz"]])
+def test_cli_no_matplotlib(data_path, tmp_path, options):
+    """Write svg files and TikZ pictures from the command line without matplotlib."""
+    args = [str(data_path.joinpath("ti.json")), "-o", str(tmp_path), "-j", "1"]
+    code = (
+        "import sys\n"
+        "from rimsschemedrawer import cli\n"
+        f"cli.main(['render', *{args + options!r}])\n"
+        "print('matplotlib' in sys.modules)\n"
+    )
+    assert run_python(code).splitlines()[-1] == "False"
+
+
+def test_import_time():
+    """Importing the package stays within the time budget."""
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import rimsschemedrawer\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    assert float(run_python(code)) < IMPORT_TIME_BUDGET
+
+
+def test_lazy_attributes():
+    """Load the plotter and submodules on first access."""
+    from rimsschemedrawer.plotter import Plotter
+
+    assert rimsschemedrawer.Plotter is Plotter
+    assert rimsschemedrawer.cache.RenderCache is not None
+    assert "Plotter" in dir(rimsschemedrawer)
+
+    with pytest.raises(AttributeError):
+        _ = rimsschemedrawer.does_not_exist
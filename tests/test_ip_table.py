@@ -0,0 +1,100 @@
+# Test the table of ionization potentials
+
+import numpy as np
+import pytest
+
+from rimsschemedrawer import utils as ut
+from rimsschemedrawer.ip_table import IPTable, get_ip_table
+
+
+def test_get_ip_table():
+    """Load the packaged table once with the first three IPs."""
+    table = get_ip_table()
+
+    assert get_ip_table() is table
+    assert table.elements == ut.get_elements()
+    assert len(table) > len(table.elements)
+    assert table.get_ip("Ti") == 55072.5
+    assert ("Ti", 0) in table
+    assert ("Ti", 9) not in table
+    assert table.charges("Ti") == [0, 1, 2]
+    assert ("H", 1) not in table
+
+
+def test_get_ip_table_second_ip():
+    """Look up the second IP of the packaged table with its uncertainty."""
+    entry = get_ip_table().entry("Ca", 1)
+
+    assert entry.ip == 95751.87
+    assert entry.uncertainty == 0.032
+    assert entry.reference["author"] == "NIST ASD"
+    assert get_ip_table().get_ip("Ti", 1) > get_ip_table().get_ip("Ti")
+
+
+def test_ip_table_uncertainty():
+    """Get uncertainties of the first IPs, unknown for references other than NIST."""
+    table = get_ip_table()
+    nist = (table.charge == 0) & (table.reference == "nist_asd_2024")
+
+    assert table.get_uncertainty("Ti") == 0.097
+    assert table.get_uncertainty("Ca", 1) == 0.032
+    assert np.isnan(table.get_uncertainty("Pa"))
+    assert np.isnan(table.get_uncertainty("Rn"))
+    assert table.element[nist & np.isnan(table.uncertainty)].tolist() == ["Rn"]
+
+
+def test_ip_table_entry():
+    """Get the full row of an element with its reference."""
+    entry = get_ip_table().entry("Pa")
+
+    assert entry.ip == ut.get_ip("Pa")
+    assert entry.reference["author"] == "Naubereit"
+    assert np.isnan(entry.uncertainty)
+
+    with pytest.raises(KeyError):
+        get_ip_table().entry("Ti", 9)
+
+
+def test_ip_table_charge_states(tmp_path):
+    """Look up higher charge states and save and load the table."""
+    references = {"ref": {"author": "Test", "year": 2024, "url": ""}}
+    table = IPTable(
+        element=["Ca", "Ca", "Sr"],
+        charge=[1, 0, 0],
+        ip=[95751.87, 49305.924, 45932.2036],
+        uncertainty=[0.03, np.nan, 0.0002],
+        reference=["ref", "ref", "ref"],
+        references=references,
+    )
+
+    assert table.elements == ["Ca", "Sr"]
+    assert table.charges("Ca") == [0, 1]
+    assert table.get_ip("Ca", 1) == 95751.87
+    assert table.entry("Ca", 1).uncertainty == 0.03
+
+    fout = tmp_path.joinpath("table.json")
+    table.save(fout)
+    loaded = IPTable.from_file(fout)
+
+    assert loaded.get_ip("Ca", 1) == 95751.87
+    np.testing.assert_equal(loaded.uncertainty, table.uncertainty)
+    assert loaded.references == references
+    assert get_ip_table(fout).get_ip("Sr") == 45932.2036
+
+
+def test_ip_table_invalid():
+    """Raise an error for duplicate rows and missing references."""
+    with pytest.raises(ValueError, match="not unique"):
+        IPTable(["H", "H"], [0, 0], [1.0, 2.0], [np.nan] * 2, ["a", "a"], {"a": {}})
+    with pytest.raises(ValueError, match="Missing references"):
+        IPTable(["H"], [0], [1.0], [np.nan], ["b"], {"a": {}})
+
+
+def test_ip_dictionaries():
+    """Create the old dictionaries from the table for backwards compatibility."""
+    assert ut.IP_DICTIONARY["N"] == 117225.7
+    assert list(ut.IP_DICTIONARY) == ut.get_elements()
+    assert set(ut.IP_REFERENCES_NON_NIST) == {"Pa", "Fm", "Md"}
+
+    with pytest.raises(AttributeError):
+        ut.NOT_AN_ATTRIBUTE
@@ -79,6 +79,59 @@ def test_config_parser_nm(data_path, params):
     np.testing.assert_almost_equal(parser._steps_nm, nm_exp, decimal=3)
 
 
+def test_config_parser_invalid_values(data_path):
+    """Stop at the first empty level and replace invalid values with defaults."""
+    data = jp.json_reader(data_path.joinpath("w_nm.json"))
+    data["scheme"]["step_level3"] = ""
+    data["scheme"]["step_level4"] = "12345"  # after an empty level: ignored
+    data["scheme"]["trans_strength0"] = "1e6"
+    data["scheme"]["trans_strength1"] = "abc"
+    data["scheme"]["trans_strength2"] = ""
+    data["scheme"].pop("step_term1", None)
+
+    parser = jp.ConfigParser(data)
+
+    assert parser.number_of_levels == 3
+    np.testing.assert_equal(parser.transition_strengths, [1e6, 0.0, 0.0])
+    assert parser.step_terms_no_formatting[1] == ""
+
+
+def test_config_parser_non_numeric_values(data_path):
+    """Stop at the first non-numeric level and use defaults for invalid values."""
+    data = jp.json_reader(data_path.joinpath("w_nm.json"))
+    data["scheme"]["step_level2"] = "abc"
+    data["scheme"]["trans_strength0"] = "1e6"
+    data["scheme"]["trans_strength1"] = "1,5e6"
+
+    parser = jp.ConfigParser(data)
+
+    assert parser.number_of_levels == 2
+    np.testing.assert_equal(parser.transition_strengths, [1e6, 0.0])
+    np.testing.assert_equal(parser._parse_data_key("trans_strength", int, -1), [-1, -1])
+
+
+@pytest.mark.parametrize("unit", ["nm", "cm<sup>-1</sup>"])
+def test_config_parser_many_steps(unit):
+    """Parse schemes with many steps, levels are cumulative if given in nm."""
+    num_steps = 100
+    scheme = {"unit": unit, "gs_level": "100", "gs_term": "", "ip_term": ""}
+    scheme["element"] = "Ti"
+    for it in range(num_steps):
+        scheme[f"step_level{it}"] = str(1000.0 + it)
+        scheme[f"step_lowlying{it}"] = it == 0
+
+    parser = jp.ConfigParser({"scheme": scheme, "settings": {}})
+
+    assert parser.number_of_levels == num_steps
+    levels = 1000.0 + np.arange(num_steps)
+    if unit == "nm":
+        levels[1:] = np.cumsum(1e7 / levels[1:]) + 100
+    np.testing.assert_allclose(parser.step_levels, levels)
+    np.testing.assert_allclose(
+        parser.step_nm[1:], 1e7 / np.diff(levels[1:], prepend=100)
+    )
+
+
 def test_config_parser_fmt_terms(data_path):
     """Ensure formatted and unformatted term symbols are available."""
     fin = data_path.joinpath("ti.json")
@@ -96,6 +149,40 @@ def test_config_parser_fmt_terms(data_path):
     assert (parser.step_terms == step_terms_fmt_exp).all()
 
 
+def test_config_parser_cache(data_path):
+    """Cache formatted terms until new data is assigned."""
+    data = jp.json_reader(data_path.joinpath("ti.json"))
+    parser = jp.ConfigParser(data)
+
+    step_terms = parser.step_terms
+    assert parser.step_terms is step_terms
+    assert not step_terms.flags.writeable
+
+    data["scheme"]["gs_term"] = "3F3"
+    assert parser.gs_term != ut.term_to_string("3F3")  # not parsed yet
+
+    parser.data = data
+    assert parser.gs_term == ut.term_to_string("3F3")
+    assert parser.step_terms is not step_terms
+
+
+def test_config_parser_charge(data_path):
+    """Use the IP of the charge state given in the scheme."""
+    data = jp.json_reader(data_path.joinpath("ti.json"))
+    parser = jp.ConfigParser(data)
+    assert parser.charge == 0
+    assert parser.ip_level == ut.get_ip("Ti")
+
+    data["scheme"]["charge"] = 1
+    parser.data = data
+    assert parser.charge == 1
+    assert parser.ip_level == ut.get_ip("Ti", 1)
+
+    data["scheme"]["charge"] = 9
+    with pytest.raises(ValueError, match="charge state 9"):
+        jp.ConfigParser(data)
+
+
 def test_json_reader(data_path):
     """Check that a valid json file is returned."""
     fin = data_path.joinpath("ti.json")
@@ -0,0 +1,134 @@
+# Test the layout of schemes without matplotlib
+
+import numpy as np
+import pytest
+
+import rimsschemedrawer.json_parser
+from rimsschemedrawer.layout import SchemeLayout, axis_ticks, format_ticks
+
+
+@pytest.fixture
+def parser(data_path):
+    """Parser of a scheme with low-lying states."""
+    data = rimsschemedrawer.json_parser.json_reader(
+        data_path.joinpath("raised_ground_low_lying_cm.json")
+    )
+    return rimsschemedrawer.json_parser.ConfigParser(data)
+
+
+def test_layout(parser):
+    """Place all levels, arrows, and labels of the scheme."""
+    layout = parser.layout()
+
+    assert layout.ylim == (0.0, layout.ymax)
+    assert layout.ymax > parser.step_levels[-1]
+    np.testing.assert_array_equal(layout.arrows.step, [2, 3, 4, 0, 1])
+    assert layout.arrows.group.tolist() == ["steps"] * 3 + ["low_lying"] * 2
+    assert layout.levels.step.tolist() == [2, 3, -1, 4, 0, 1]
+    assert (layout.labels.kind == "transition").sum() == 5
+    assert layout.labels.text[0].startswith("IP, 55072")
+
+    # arrows of the low-lying states end at the wavenumber of the first step
+    low_lying = layout.arrows.group == "low_lying"
+    tips = layout.arrows.y + layout.arrows.length
+    np.testing.assert_allclose(tips[low_lying], layout.arrows.length[0])
+
+    with pytest.raises(ValueError):
+        layout.arrows.x[0] = 0
+
+
+def test_layout_cached(parser, data_path):
+    """Cache the layout until new data is assigned."""
+    layout = parser.layout()
+
+    assert parser.layout() is layout
+    assert parser.layout(plain_labels=True) is not layout
+    assert "cm⁻¹" in parser.layout(plain_labels=True).labels.text[0]
+
+    parser.data = rimsschemedrawer.json_parser.json_reader(
+        data_path.joinpath("ti.json")
+    )
+    assert parser.layout() is not layout
+
+
+def test_layout_arrow_polygons(parser):
+    """Create the same arrow outlines as matplotlib."""
+    from matplotlib.patches import FancyArrow
+
+    layout = parser.layout()
+    width, head_width, head_length = layout.arrow_fmt
+    polygons = layout.arrow_polygons()
+
+    assert polygons.shape == (5, 8, 2)
+    for it, (xval, yval, length) in enumerate(
+        zip(layout.arrows.x, layout.arrows.y, layout.arrows.length)
+    ):
+        arrow = FancyArrow(
+            xval,
+            yval,
+            0,
+            length,
+            width=width,
+            head_width=head_width,
+            head_length=head_length,
+            length_includes_head=True,
+        )
+        np.testing.assert_array_equal(polygons[it], arrow.get_xy())
+
+
+def test_layout_hit_test(parser):
+    """Find arrows and levels at a position."""
+    layout = parser.layout()
+    arrows = layout.arrows
+
+    hit = layout.hit_test(arrows.x[3], arrows.y[3] + 100)
+    assert (hit.kind, hit.group, hit.step) == ("arrow", "low_lying", 0)
+
+    hit = layout.hit_test(9.0, layout.levels.y[0] + 10, tolerance=20)
+    assert (hit.kind, hit.index, hit.step) == ("level", 0, 2)
+
+    assert layout.hit_test(9.0, layout.levels.y[0] + 30, tolerance=20) is None
+
+
+def test_layout_plain(parser):
+    """Layout of plain labels only differs in the label texts."""
+    layout = SchemeLayout(parser)
+    plain = SchemeLayout(parser, plain_labels=True)
+
+    for key in ["x", "y", "ha", "va", "rotation"]:
+        np.testing.assert_array_equal(
+            getattr(layout.labels, key), getattr(plain.labels, key)
+        )
+    assert not any("$" in it for it in plain.labels.text)
+
+
+def test_axes_frame(parser):
+    """Estimate the position of the axes within the figure."""
+    frame = parser.layout().axes_frame()
+    width, height = (72 * it for it in parser.sett_fig_size)
+
+    assert 0 < frame.x0 < frame.x1 < width
+    assert 0 < frame.y0 < frame.y1 < height
+    assert frame.ticks[0] == 0 and frame.ticks[-1] <= parser.layout().ymax
+    assert frame.ypos(0, 1) == frame.y1
+
+
+@pytest.mark.parametrize(
+    "vals",
+    [
+        [55000.0, [0.0, 10000.0, 20000.0, 30000.0, 40000.0, 50000.0]],
+        [6.8, [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]],
+        [3.3, [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0]],
+        [0.9, [0.1 * it for it in range(10)]],
+    ],
+)
+def test_axis_ticks(vals):
+    """Create ticks like matplotlib's auto locator."""
+    assert axis_ticks(vals[0], 500, 12) == vals[1]
+
+
+def testformat_ticks():
+    """Format all ticks with the same number of decimals."""
+    assert format_ticks([0.0, 0.5, 1.0]) == ["0.0", "0.5", "1.0"]
+    assert format_ticks([0.0, 0.2, 0.6000000000000001]) == ["0.0", "0.2", "0.6"]
+    assert format_ticks([0.0, 1.0]) == ["0", "1"]
@@ -0,0 +1,160 @@
+# Test fetching ionization potentials from NIST against a local server
+
+import http.server
+import threading
+import urllib.parse
+
+import numpy as np
+import pytest
+
+from rimsschemedrawer import nist
+from rimsschemedrawer.ip_table import IPTable
+
+HEADER = (
+    "Configuration,Term,J,Prefix,Level (cm-1),Suffix,Uncertainty (cm-1),Lande,"
+    "Leading percentages,Reference\n"
+)
+
+# csv responses per spectrum, formatted like the ones from NIST
+RESPONSES = {
+    "Ti I": HEADER
+    + '="3d2.4s2",="a 3F",="2",="",="0.000",="",="0.003",="0.66",="100",=""\n'
+    + '="Ti II (4F<3/2>)",="Limit",="",="",="55072.5",="",="0.3",="",="",=""\n',
+    "Ti II": HEADER
+    + '="3d2(3F).4s",="a 4F",="3/2",="",="0.00",="",="",="0.4",="",=""\n'
+    + '="Ti III (3F<2>)",="Limit",="",="[",="109494",="]",="",="",="",=""\n',
+    "H I": HEADER + '="1s",="2S",="1/2",="",="0.000",="",="",="2",="",=""\n',
+}
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Serve the stub responses with an ETag and count the requests."""
+
+    requests = []
+
+    def do_GET(self):
+        """Answer with the response of the requested spectrum."""
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        spectrum = query["spectrum"][0]
+        self.requests.append(spectrum)
+
+        if spectrum not in RESPONSES:
+            self.send_error(404)
+            return
+        etag = f'"{spectrum}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = RESPONSES[spectrum].encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Do not log the requests."""
+
+
+@pytest.fixture
+def server():
+    """Run the stub server in a thread and return its URL."""
+    StubHandler.requests = []
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/energy1.pl"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_ips(server, tmp_path):
+    """Fetch concurrently and replay from the cache without the server."""
+    keys = [("Ti", 0), ("Ti", 1), ("H", 0), ("Xx", 0)]
+    fetcher = nist.NistFetcher(tmp_path, url=server, retry_delay=0)
+    ips, errors = fetcher.fetch_ips(keys, jobs=4)
+
+    assert ips[("Ti", 0)] == (55072.5, 0.3)
+    assert ips[("Ti", 1)][0] == 109494
+    assert np.isnan(ips[("Ti", 1)][1])
+    assert list(errors) == [("H", 0), ("Xx", 0)]
+    assert "No ionization limit" in errors[("H", 0)]
+    assert "HTTPError" in errors[("Xx", 0)]
+
+    # cached responses are used without any request, errors are not cached
+    num_requests = len(StubHandler.requests)
+    assert fetcher.fetch_ips(keys)[0] == ips
+    assert StubHandler.requests[num_requests:] == ["Xx I"]
+
+    offline = nist.NistFetcher(tmp_path, url="http://127.0.0.1:9", offline=True)
+    assert offline.fetch_ips(keys)[0] == ips
+
+
+def test_fetch_conditional(server, tmp_path):
+    """Refresh old responses with a conditional request."""
+    fetcher = nist.NistFetcher(tmp_path, url=server, max_age=0, retry_delay=0)
+    text = fetcher.fetch("Ti")
+    assert fetcher.fetch("Ti") == text
+    assert StubHandler.requests == ["Ti I", "Ti I"]
+
+    # stale responses are used if the server cannot be reached
+    fetcher.url = "http://127.0.0.1:9"
+    fetcher.retries = 0
+    assert fetcher.fetch("Ti") == text
+
+    with pytest.raises(FileNotFoundError):
+        nist.NistFetcher(tmp_path, offline=True).fetch("Ti", 1)
+
+
+def test_query_url(tmp_path):
+    """Request the spectrum of the given charge state."""
+    fetcher = nist.NistFetcher(tmp_path)
+    assert fetcher.query_url("Ti").startswith(f"{nist.NIST_URL}?spectrum=Ti+I&")
+    assert "spectrum=Ti+III&" in fetcher.query_url("Ti", 2)
+
+
+def test_update_ip_table(tmp_path, server):
+    """Update NIST values, keep others, and rebuild the table reproducibly."""
+    references = {
+        "nist_old": {"author": "NIST ASD", "year": 2020, "url": ""},
+        "other": {"author": "Other", "year": 2021, "url": ""},
+    }
+    table = IPTable(
+        element=["H", "Ti"],
+        charge=[0, 0],
+        ip=[109678.0, 55000.0],
+        uncertainty=[np.nan, np.nan],
+        reference=["other", "nist_old"],
+        references=references,
+    )
+    ips = {("Ti", 1): (109494.0, np.nan), ("Ti", 0): (55072.5, 0.3), ("H", 0): (1, 0)}
+    updated = nist.update_ip_table(table, ips)
+
+    assert updated.element.tolist() == ["H", "Ti", "Ti"]
+    assert updated.charge.tolist() == [0, 0, 1]
+    assert updated.get_ip("H") == 109678.0
+    assert updated.entry("Ti").uncertainty == 0.3
+    assert updated.entry("Ti", 1).reference == nist.NIST_REFERENCE
+    assert set(updated.references) == {"other", nist.NIST_REFERENCE_KEY}
+
+    # the command line rebuilds the same files twice, the second time offline
+    ftable = tmp_path.joinpath("table.json")
+    fjson = tmp_path.joinpath("ip_nist.json")
+    args = ["--cache", str(tmp_path.joinpath("cache")), "--table", str(ftable)]
+    args += ["--charges", "0", "1", "--json", str(fjson), "-j", "4"]
+    contents = []
+    for extra in (["--url", server], ["--offline"]):
+        table.save(ftable)
+        assert nist.main(args + extra) == 1  # not all elements are on the server
+        contents.append((ftable.read_text(), fjson.read_text()))
+
+    assert contents[0] == contents[1]
+    assert IPTable.from_file(ftable).get_ip("Ti", 1) == 109494
+
+
+@pytest.mark.parametrize("num_roman", [[1, "I"], [2, "II"], [4, "IV"], [19, "XIX"]])
+def test_roman(num_roman):
+    """Convert charge states to roman numerals."""
+    assert nist._roman(num_roman[0]) == num_roman[1]
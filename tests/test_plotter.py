@@ -1,4 +1,6 @@
 # Test the plotter
+import os
+
 import pytest
 
 import rimsschemedrawer.json_parser
@@ -26,3 +28,362 @@ def test_plotter_old_style(data_path):
 
     with pytest.warns(UserWarning, match="Ti"):
         _ = Plotter(data)
+
+
+def test_plotter_no_global_state(data_path):
+    """Create a standalone figure without changing global matplotlib settings."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    rc_before = dict(matplotlib.rcParams)
+    fignums_before = plt.get_fignums()
+
+    fig = Plotter(data, darkmode=True, pyplot=False)
+
+    assert dict(matplotlib.rcParams) == rc_before
+    assert plt.get_fignums() == fignums_before
+    assert isinstance(fig.figure.canvas, FigureCanvasAgg)
+
+
+def test_plotter_threads(data_path):
+    """Render light and dark figures in parallel threads without mixing styles."""
+    from concurrent.futures import ThreadPoolExecutor
+    import io
+
+    from matplotlib.colors import to_hex
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+
+    def render(darkmode):
+        fig = Plotter(data, darkmode=darkmode, pyplot=False)
+        fig.savefig(io.BytesIO(), format="png")
+        return to_hex(fig.figure.get_facecolor()), to_hex(fig.axes.get_facecolor())
+
+    darkmodes = [True, False] * 4
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        colors = list(executor.map(render, darkmodes))
+
+    for darkmode, color in zip(darkmodes, colors):
+        col_exp = "#000000" if darkmode else "#ffffff"
+        assert color == (col_exp, col_exp)
+
+
+def test_plotter_threads_concurrent(data_path):
+    """Draw and save figures while another thread holds the mathtext lock."""
+    import io
+    import threading
+
+    from rimsschemedrawer.plotter import _MATHTEXT_LOCK
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    Plotter(data, pyplot=False).savefig(io.BytesIO(), format="png")  # parse labels
+
+    def render():
+        fig = Plotter(data, pyplot=False)
+        fig.to_rgba()
+        fig.savefig(io.BytesIO(), format="png")
+
+    with _MATHTEXT_LOCK:
+        thread = threading.Thread(target=render)
+        thread.start()
+        thread.join(timeout=60)
+        assert not thread.is_alive()
+
+
+def test_plotter_update(data_path):
+    """Only redraw groups of artists whose input changed."""
+    import copy
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    fig = Plotter(data, pyplot=False)
+
+    assert fig.update(data) == []
+
+    data_title = copy.deepcopy(data)
+    data_title["settings"]["plot_title"] = "New title"
+    assert fig.update(data_title) == ["axes"]
+    assert fig.axes.get_title() == "New title"
+
+    data_level = copy.deepcopy(data_title)
+    data_level["scheme"]["step_level3"] = "45500.0"
+    redrawn = fig.update(data_level)
+    assert "steps" in redrawn
+    assert "low_lying" not in redrawn
+
+
+def test_plotter_update_same_output(data_path):
+    """An updated plot looks the same as a newly created one."""
+    import io
+
+    import numpy as np
+    from PIL import Image
+
+    data_ti = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    data_w = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("w_nm.json"))
+
+    def to_array(fig):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        buffer.seek(0)
+        return np.asarray(Image.open(buffer))
+
+    fig = Plotter(data_ti, pyplot=False)
+    fig.update(data_w)
+
+    np.testing.assert_array_equal(
+        to_array(fig), to_array(Plotter(data_w, pyplot=False))
+    )
+
+
+def test_plotter_plain_labels(data_path):
+    """Write all labels without mathtext and switch between the modes."""
+    import io
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    fig = Plotter(data, pyplot=False, plain_labels=True)
+    fig.savefig(io.BytesIO(), format="png")
+
+    texts = [it.get_text() for it in fig.figure.findobj(lambda x: hasattr(x, "_text"))]
+    assert any("cm⁻¹" in it for it in texts)
+    assert not any("$" in it for it in texts)
+
+    assert set(fig.update(data, plain_labels=False)) == {
+        "ip",
+        "steps",
+        "low_lying",
+        "axes",
+    }
+    assert fig.axes.get_ylabel() == "Wavenumber (cm$^{-1}$)"
+
+
+def test_plotter_shared_mathtext(data_path):
+    """Share parsed mathtext between standalone figures."""
+    import io
+
+    from rimsschemedrawer import plotter
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    Plotter(data, pyplot=False).savefig(io.BytesIO(), format="png")
+    hits = plotter._parse_mathtext.cache_info().hits
+    Plotter(data, pyplot=False).savefig(io.BytesIO(), format="png")
+
+    assert plotter._parse_mathtext.cache_info().hits > hits
+
+
+@pytest.mark.parametrize("fname", ["ti.json", "w_cm-1.json"])
+def test_plotter_analytic_layout(data_path, fname):
+    """Calculate margins close to the tight layout without drawing."""
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath(fname))
+    fig = Plotter(data, pyplot=False, layout="analytic")
+    tight = Plotter(data, pyplot=False).figure.subplotpars
+
+    pars = fig.figure.subplotpars
+    for key in ["left", "right", "bottom", "top"]:
+        assert getattr(pars, key) == pytest.approx(getattr(tight, key), abs=0.01)
+
+    assert fig.update(data, layout="tight") == ["axes"]
+    with pytest.raises(ValueError, match="Unknown layout"):
+        fig.update(data, layout="constrained")
+
+
+def test_plotter_batched_artists(data_path):
+    """Draw all levels, arrows, and crosses of a group as one artist each."""
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    data = rimsschemedrawer.json_parser.json_reader(
+        data_path.joinpath("raised_ground_low_lying_cm.json")
+    )
+    data["settings"]["show_forbidden_transitions"] = "x-out"
+    data["scheme"]["step_forbidden2"] = True
+    data["scheme"]["step_forbidden3"] = True
+    fig = Plotter(data, pyplot=False)
+
+    assert not fig.axes.patches
+    assert len(fig.axes.lines) == 1
+    assert len(fig.axes.lines[0].get_xdata()) == 2
+    arrows = [it for it in fig.axes.collections if type(it) is PolyCollection]
+    levels = [it for it in fig.axes.collections if type(it) is LineCollection]
+    assert len(arrows) == 2  # steps and low-lying states
+    assert len(levels) == 2
+    assert sum(len(it.get_paths()) for it in arrows) == 5
+
+
+def test_plotter_to_rgba(data_path):
+    """Render into an RGBA view of the canvas buffer, same pixels as a png."""
+    import io
+
+    import matplotlib.image
+    import numpy as np
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    fig = Plotter(data, pyplot=False)
+    position = fig.axes.get_position().bounds
+
+    rgba = fig.to_rgba(dpi=50)
+    assert rgba.shape == (400, 250, 4) and rgba.dtype == np.uint8
+    assert not rgba.flags["OWNDATA"]
+
+    assert fig.to_rgba(dpi=20, size=(4, 3)).shape == (60, 80, 4)
+    assert fig.axes.get_position().bounds == position
+    assert fig.figure.get_size_inches().tolist() == [5, 8]
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=50)
+    buffer.seek(0)
+    png = (matplotlib.image.imread(buffer) * 255).round().astype(np.uint8)
+    np.testing.assert_array_equal(fig.to_rgba(dpi=50), png)
+
+
+def test_plotter_export(data_path, tmp_path):
+    """Save several formats at once, same files as saving them one by one."""
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    fig = Plotter(data, pyplot=False)
+
+    timings = fig.export(tmp_path.joinpath("ti.json"), formats=["svg", ".PNG", "pdf"])
+
+    assert list(timings) == ["svg", "png", "pdf"]
+    assert all(it > 0 for it in timings.values())
+    for fmt in timings:
+        assert tmp_path.joinpath(f"ti.{fmt}").stat().st_size > 0
+    fig.savefig(tmp_path.joinpath("single.png"))
+    assert (
+        tmp_path.joinpath("single.png").read_bytes()
+        == tmp_path.joinpath("ti.png").read_bytes()
+    )
+
+
+@pytest.mark.parametrize("darkmode", [True, False])
+def test_plotter_restyle(data_path, darkmode):
+    """Recolor and resize the figure in place, same pixels as a new plotter."""
+    import numpy as np
+
+    data = rimsschemedrawer.json_parser.json_reader(
+        data_path.joinpath("raised_ground_low_lying_cm.json")
+    )
+    fig = Plotter(data, pyplot=False, darkmode=not darkmode)
+    fig.restyle(darkmode=darkmode, transparent=True)
+    np.testing.assert_array_equal(
+        fig.to_rgba(dpi=50),
+        Plotter(data, pyplot=False, darkmode=darkmode, transparent=True).to_rgba(
+            dpi=50
+        ),
+    )
+    assert fig.update(data) == []
+
+    fig.resize((4, 6))
+    data["settings"]["fig_width"] = "4"
+    data["settings"]["fig_height"] = "6"
+    np.testing.assert_array_equal(
+        fig.to_rgba(dpi=50),
+        Plotter(data, pyplot=False, darkmode=darkmode, transparent=True).to_rgba(
+            dpi=50
+        ),
+    )
+    assert fig.update(data) == ["axes"]  # the size is now part of the scheme
+
+
+def test_plotter_variants(data_path):
+    """Iterate over all styles and sizes, then restore the figure."""
+    from rimsschemedrawer.utils import PLOT_STYLES
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    fig = Plotter(data, pyplot=False)
+    darkmode, transparent = fig.darkmode, fig.transparent
+
+    variants = []
+    for style, size in fig.variants(sizes=[(5, 8), (4, 6)]):
+        assert fig.darkmode == ("dark" in style)
+        assert fig.transparent == ("transparent" in style)
+        assert fig.figure.get_size_inches().tolist() == list(size)
+        variants.append((style, size))
+
+    assert variants == [(it, (5, 8)) for it in PLOT_STYLES] + [
+        (it, (4, 6)) for it in PLOT_STYLES
+    ]
+    assert (fig.darkmode, fig.transparent) == (darkmode, transparent)
+    assert fig.figure.get_size_inches().tolist() == [5, 8]
+    assert fig.update(data) == []
+
+
+@pytest.mark.parametrize("fmt", ["pdf", "svg", "eps"])
+def test_plotter_reproducible(data_path, fmt):
+    """Save byte-identical files for the same scheme, without global changes."""
+    import io
+    import os
+
+    import matplotlib
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    files = []
+    for _ in range(2):
+        buffer = io.BytesIO()
+        Plotter(data, pyplot=False).savefig(buffer, format=fmt)
+        files.append(buffer.getvalue())
+
+    assert files[0] == files[1]
+    assert b"CreationDate" not in files[0]
+    assert matplotlib.rcParams["svg.hashsalt"] is None
+    assert os.environ.get("SOURCE_DATE_EPOCH") == epoch
+
+
+def test_plotter_reproducible_options(data_path, tmp_path):
+    """Save reproducible ps files by name, keep a salt from the rc parameters."""
+    import io
+
+    import matplotlib
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    fig = Plotter(data, pyplot=False)
+    fig.savefig(tmp_path.joinpath("a.ps"))
+    fig.savefig(tmp_path.joinpath("b.ps"))
+    ps_files = [tmp_path.joinpath(it).read_bytes() for it in ("a.ps", "b.ps")]
+
+    assert ps_files[0].replace(b"a.ps", b"b.ps") == ps_files[1]
+    assert b"CreationDate" not in ps_files[0]
+
+    svg_files = []
+    for salt in (None, "other"):
+        buffer = io.BytesIO()
+        with matplotlib.rc_context({"svg.hashsalt": salt}):
+            fig.savefig(buffer, format="svg")
+        svg_files.append(buffer.getvalue())
+    assert svg_files[0] != svg_files[1]
+
+
+@pytest.mark.parametrize("output", ["agg", "path"])
+def test_shared_mathtext_parser(output):
+    """Parse like matplotlib's parser, through its public interface only."""
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.mathtext import MathTextParser
+
+    from rimsschemedrawer.plotter import _shared_mathtext_parser, _shared_parser_like
+
+    prop = FontProperties(size=12)
+    parsed = _shared_mathtext_parser(output).parse("$^{3}F_{2}$", 100, prop)
+    expected = MathTextParser(output).parse("$^{3}F_{2}$", 100, prop)
+
+    assert parsed[:4] == expected[:4]
+    assert _shared_mathtext_parser(output).parse("$^{3}F_{2}$", 100, prop) is parsed
+    assert _shared_parser_like(MathTextParser(output)).output == output
+    assert _shared_parser_like(object()) is None  # unknown parser, keep it
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_plotter_fork_clears_mathtext_cache(data_path):
+    """Do not share parsed mathtext, and thus fonts, with forked processes."""
+    import io
+
+    from rimsschemedrawer.plotter import _parse_mathtext
+
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    Plotter(data, pyplot=False).savefig(io.BytesIO(), format="svg")
+    assert _parse_mathtext.cache_info().currsize > 0
+
+    pid = os.fork()
+    if pid == 0:  # child
+        os._exit(_parse_mathtext.cache_info().currsize)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
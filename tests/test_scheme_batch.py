@@ -0,0 +1,85 @@
+# Test the batch parser for many schemes
+
+import numpy as np
+import pytest
+
+from rimsschemedrawer.json_parser import ConfigParser, json_reader
+from rimsschemedrawer.scheme_batch import SchemeBatch
+
+
+@pytest.fixture
+def files(data_path):
+    """Scheme files with different numbers of steps."""
+    fnames = ["ti.json", "w_nm.json", "draw_last_true.json"]
+    return [data_path.joinpath(it) for it in fnames]
+
+
+def test_from_files(files):
+    """Columns are the same as the ones from the individual parsers."""
+    batch = SchemeBatch.from_files(files)
+
+    assert len(batch) == len(files)
+    assert batch.errors == {}
+    np.testing.assert_equal(batch.names, [str(it) for it in files])
+
+    for idx, fin in enumerate(files):
+        parser = ConfigParser(json_reader(fin))
+        num = len(parser.step_levels)
+
+        assert batch.number_of_steps[idx] == num
+        assert batch.element[idx] == parser.element
+        assert batch.charge[idx] == parser.charge
+        assert batch.ip_level[idx] == parser.ip_level
+        np.testing.assert_equal(batch.step_levels[idx, :num], parser.step_levels)
+        np.testing.assert_equal(batch.step_nm[idx, :num], parser.step_nm)
+        np.testing.assert_equal(batch.is_low_lying[idx, :num], parser.is_low_lying)
+        np.testing.assert_equal(batch.step_forbidden[idx, :num], parser.step_forbidden)
+        assert np.isnan(batch.step_levels[idx, num:]).all()
+
+    assert batch.step_nm[batch.mask].size == batch.number_of_steps.sum()
+
+
+def test_from_dicts_charge(files):
+    """Tell IPs of different charge states of the same element apart."""
+    schemes = [json_reader(files[0]), json_reader(files[0])]
+    schemes[1]["scheme"]["charge"] = 1
+
+    batch = SchemeBatch.from_dicts(schemes)
+
+    np.testing.assert_equal(batch.element, ["Ti", "Ti"])
+    np.testing.assert_equal(batch.charge, [0, 1])
+    assert batch.ip_level[1] > batch.ip_level[0]
+
+
+def test_from_dicts_invalid(files):
+    """Raise on invalid schemes or skip them and report the errors."""
+    schemes = [json_reader(it) for it in files] + [{}]
+    names = ["a", "b", "c", "broken"]
+
+    with pytest.raises(KeyError):
+        SchemeBatch.from_dicts(schemes, names)
+
+    batch = SchemeBatch.from_dicts(schemes, names, skip_invalid=True)
+    assert len(batch) == 3
+    assert list(batch.errors) == ["broken"]
+
+
+def test_from_dicts_empty():
+    """Create an empty batch."""
+    batch = SchemeBatch.from_dicts([])
+
+    assert len(batch) == 0
+    assert batch.step_levels.shape == (0, 0)
+
+
+def test_npz(files, tmp_path):
+    """Save and load a batch."""
+    batch = SchemeBatch.from_files(files)
+    fout = tmp_path.joinpath("batch.npz")
+
+    batch.save_npz(fout)
+    loaded = SchemeBatch.load_npz(fout)
+
+    assert loaded.columns == batch.columns
+    for column in batch.columns:
+        np.testing.assert_equal(getattr(loaded, column), getattr(batch, column))
@@ -0,0 +1,45 @@
+# Test writing schemes directly to SVG
+
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import rimsschemedrawer.json_parser
+from rimsschemedrawer.svg import SVGWriter, write_svg
+
+NS = {"svg": "http://www.w3.org/2000/svg"}
+
+
+@pytest.mark.parametrize("fname", ["ti.json", "raised_ground_low_lying_cm.json"])
+def test_svg_writer(data_path, fname):
+    """Write a valid SVG with all arrows and labels of the layout."""
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath(fname))
+    writer = SVGWriter(data)
+    root = ET.fromstring(writer.to_string())
+    layout = writer.config_parser.layout(plain_labels=True)
+
+    assert root.get("width") == f"{72 * writer.config_parser.sett_fig_size[0]:g}pt"
+    assert len(root.findall(".//svg:polygon", NS)) == len(layout.arrows.x)
+    texts = ["\n".join(it.itertext()) for it in root.iter("{%s}text" % NS["svg"])]
+    assert all(it in texts for it in layout.labels.text)
+    assert "Wavenumber (cm⁻¹)" in texts
+    assert not any("$" in it for it in texts)
+
+
+def test_svg_writer_options(data_path, tmp_path):
+    """Write to files and buffers, with darkmode, transparency, and crosses."""
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    data["settings"]["show_forbidden_transitions"] = "x-out"
+    data["scheme"]["step_forbidden2"] = True
+
+    buffer = io.StringIO()
+    write_svg(data, buffer, darkmode=True)
+    fout = tmp_path.joinpath("ti.svg")
+    write_svg(data, fout, darkmode=True)
+    assert fout.read_text(encoding="utf-8") == buffer.getvalue()
+    assert 'fill="#000000"' in buffer.getvalue()
+    assert 'stroke="#ff0000"' in buffer.getvalue()
+
+    transparent = SVGWriter(data, transparent=True).to_string()
+    assert 'height="100%"' not in transparent
@@ -0,0 +1,78 @@
+# Test writing schemes as TikZ pictures
+
+import io
+
+import pytest
+
+import rimsschemedrawer.json_parser
+from rimsschemedrawer.tikz import TikZWriter, write_tikz, _escape, _format_tick
+
+
+@pytest.mark.parametrize("fname", ["ti.json", "raised_ground_low_lying_cm.json"])
+def test_tikz_writer(data_path, fname):
+    """Write a TikZ picture with all arrows and labels of the layout."""
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath(fname))
+    writer = TikZWriter(data)
+    tikz = writer.to_string()
+    layout = writer.config_parser.layout()
+
+    assert tikz.startswith("\\begin{tikzpicture}")
+    assert tikz.endswith("\\end{tikzpicture}\n")
+    assert tikz.count("miter join") == len(layout.arrows.x)
+    assert all(f"{{{_escape(it)}}};" in tikz for it in layout.labels.text)
+    assert "{Wavenumber (cm$^{-1}$)}" in tikz
+    assert "\\definecolor{rsd0}{HTML}{0012A0}" in tikz
+
+
+def test_tikz_writer_options(data_path, tmp_path):
+    """Write to files and buffers, standalone, with darkmode and crosses."""
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    data["settings"]["show_forbidden_transitions"] = "x-out"
+    data["scheme"]["step_forbidden2"] = True
+
+    buffer = io.StringIO()
+    write_tikz(data, buffer, darkmode=True, standalone=True)
+    fout = tmp_path.joinpath("ti.tikz")
+    write_tikz(data, fout, darkmode=True, standalone=True)
+    assert fout.read_text(encoding="utf-8") == buffer.getvalue()
+    assert buffer.getvalue().startswith("\\documentclass{standalone}")
+    assert "\\definecolor{rsdbackground}{HTML}{000000}" in buffer.getvalue()
+    assert "\\draw[red" in buffer.getvalue()
+
+    transparent = TikZWriter(data, transparent=True).to_string()
+    assert "\\fill[rsdbackground]" not in transparent
+
+
+def test_escape():
+    """Escape special characters outside of math mode only."""
+    assert _escape("50% & #1_a") == "50\\% \\& \\#1\\_a"
+    assert _escape("<400$\\,$nm\n$^{3}$F$_{2}$") == (
+        "\\textless{}400$\\,$nm\\\\$^{3}$F$_{2}$"
+    )
+    assert _escape("a\\b {c}^~") == (
+        "a\\textbackslash{}b \\{c\\}\\textasciicircum{}\\textasciitilde{}"
+    )
+    assert _escape("5 \\$ and $x^2$") == "5 \\$ and $x^2$"
+    assert _escape("costs 5$") == "costs 5\\$"  # unbalanced, no math
+
+
+def test_tikz_writer_title(data_path):
+    """Escape LaTeX special characters in the title, but keep its math."""
+    data = rimsschemedrawer.json_parser.json_reader(data_path.joinpath("ti.json"))
+    data["settings"]["plot_title"] = "Ti {new}^~\\ for 5\\$ $^{48}$Ti"
+
+    tikz = TikZWriter(data).to_string()
+
+    assert (
+        "{Ti \\{new\\}\\textasciicircum{}\\textasciitilde{}\\textbackslash{} "
+        "for 5\\$ $^{48}$Ti};"
+    ) in tikz
+
+
+@pytest.mark.parametrize(
+    "vals",
+    [[0, "$0$"], [1.5, "$1.5$"], [10000, "$10^{4}$"], [25000, "$2.5 \\times 10^{4}$"]],
+)
+def test_format_tick(vals):
+    """Format tick labels like the figures."""
+    assert _format_tick(vals[0]) == vals[1]
@@ -1,11 +1,50 @@
 # Test utility functions for the project
 
+import re
+
 from hypothesis import given, strategies as st
+import numpy as np
 import pytest
 
 from rimsschemedrawer import utils as ut
 
 
+@pytest.mark.parametrize("darkmode", [True, False])
+def test_color_wavelengths(darkmode):
+    """Color arrays of wavelengths like single wavelengths, including the edges."""
+    lmb = np.array([300, 449.9, 450, 484, 500, 565, 590, 625, 700, 700.1, 2000])
+
+    colors = ut.color_wavelengths(lmb, darkmode)
+
+    assert colors.shape == lmb.shape
+    assert list(colors) == [ut.color_wavelength(it, darkmode) for it in lmb]
+    assert len(set(colors)) == 8
+    assert colors[1] == colors[0]  # violet below 450 nm
+    assert colors[8] != colors[9]  # 700 nm is red, above infrared
+
+
+@pytest.mark.parametrize("darkmode", [True, False])
+def test_color_wavelengths_continuous(darkmode):
+    """Return valid colors for all wavelengths in continuous mode."""
+    lmb = np.linspace(100, 2000, 1000)
+
+    colors = ut.color_wavelengths(lmb, darkmode, continuous=True)
+
+    assert colors.shape == lmb.shape
+    assert all(re.fullmatch("#[0-9a-f]{6}", it) for it in colors)
+    assert colors[0] == ut.color_wavelengths(380, darkmode, continuous=True)[0]
+
+
+@pytest.mark.parametrize("continuous", [True, False])
+def test_color_wavelengths_nan(continuous):
+    """Color undefined wavelengths like the shortest ones, not as infrared."""
+    colors = ut.color_wavelengths([np.nan, 300, 2000], continuous=continuous)
+
+    assert colors[0] == colors[1]
+    assert colors[0] != colors[2]
+    assert ut.color_wavelength(np.nan) == ut.color_wavelength(300)
+
+
 def test_cm_2_to_nm():
     """Check that the conversion from cm^-1 to nm is correct."""
     assert ut.cm_2_to_nm(1e7) == 1
@@ -33,6 +72,14 @@ def test_get_ip():
     assert ut.get_ip("N") == 117225.7
 
 
+def test_get_ip_charge():
+    """Get the IP of an ion, e.g., the second IP of Ca."""
+    assert ut.get_ip("ca", 1) == 95751.87
+    assert ut.get_ip("Sr", 1) == 88965.18
+    with pytest.raises(KeyError):
+        ut.get_ip("H", 1)
+
+
 @pytest.mark.parametrize(
     "ele_ref",
     [["H", "NIST ASD"], ["Pa", "Naubereit"], ["Fm", "Grotrian"], ["Md", "Grotrian"]],
@@ -48,6 +95,44 @@ def test_guess_element_from_ip():
     assert ut.guess_element_from_ip(117224) == "N"
 
 
+def test_guess_elements_from_ip():
+    """Guess many elements at once, same as the single guesses."""
+    ips = np.concatenate(
+        [np.linspace(0, 200000, 1001), list(ut.IP_DICTIONARY.values())]
+    )
+    guess = ut.guess_elements_from_ip(ips)
+
+    assert guess.element.tolist() == [ut.guess_element_from_ip(it) for it in ips]
+    np.testing.assert_allclose(
+        guess.deviation, ips - [ut.IP_DICTIONARY[it] for it in guess.element]
+    )
+    assert (np.abs(guess.runner_up_deviation) >= np.abs(guess.deviation)).all()
+    assert (guess.runner_up != guess.element).all()
+
+
+def test_guess_elements_from_ip_ambiguous():
+    """Flag guesses as ambiguous if the runner-up is within the tolerance."""
+    guess = ut.guess_elements_from_ip([ut.IP_DICTIONARY["Er"] + 1, 55072.5])
+
+    assert guess.element.tolist() == ["Er", "Ti"]
+    assert guess.runner_up[0] == "Tl"
+    assert guess.ambiguous.tolist() == [True, False]
+    assert not ut.guess_elements_from_ip(ut.IP_DICTIONARY["Er"], tolerance=0).ambiguous
+
+
+def test_guess_elements_from_ip_duplicate_minimum(monkeypatch):
+    """Guess the first element if the lowest IP appears twice in the table."""
+    values = np.array([10.0, 10.0, 20.0, 30.0])
+    elements = np.array(["A", "B", "C", "D"])
+    monkeypatch.setattr(ut, "_ip_index", lambda: (values, elements, np.arange(4)))
+
+    guess = ut.guess_elements_from_ip([0.0, 10.0, 12.0, 40.0])
+
+    assert guess.element.tolist() == ["A", "A", "A", "D"]
+    assert guess.runner_up.tolist() == ["B", "B", "B", "C"]
+    np.testing.assert_allclose(guess.deviation, [-10, 0, 2, 10])
+
+
 @pytest.mark.parametrize(
     "values",
     [
@@ -83,6 +168,14 @@ def test_my_formatter(value):
         assert ret[-2] == "}"
 
 
+@pytest.mark.parametrize(
+    "vals", [[0, "0"], [1, "1"], [5000, "5×10³"], [10000, "10⁴"], [25000, "2.5×10⁴"]]
+)
+def test_my_formatter_plain(vals):
+    """Format tick labels with Unicode superscripts."""
+    assert ut.my_formatter_plain(vals[0]) == vals[1]
+
+
 def test_nm_to_cm_2():
     """Check that the conversion from nm to cm^-1 is correct."""
     assert ut.nm_to_cm_2(1) == 1e7
@@ -90,6 +183,42 @@ def test_nm_to_cm_2():
     assert ut.nm_to_cm_2(3) == 3.3333333333333335e6
 
 
+@pytest.mark.parametrize(
+    "vals",
+    [
+        ["3F2", (3, "F", "2", None)],
+        ["4F9/2", (4, "F", "9/2", None)],
+        ["3Fo2", (3, "F", "2", "odd")],
+        ["5D*4", (5, "D", "4", "odd")],
+        ["J=3", (None, None, "3", None)],
+        ["IP", (None, None, None, None)],
+        ["", (None, None, None, None)],
+    ],
+)
+def test_parse_term(vals):
+    """Parse term symbols into their parts."""
+    tstr, exp = vals
+    term = ut.parse_term(tstr)
+
+    assert (term.multiplicity, term.L, term.J, term.parity) == exp
+    assert term.latex == ut.term_to_string(tstr)
+    assert term.raw == tstr
+
+
+@pytest.mark.parametrize(
+    "vals",
+    [["3F2", "³F₂"], ["4F9/2", "⁴F₉/₂"], ["3Fo2", "³F°₂"], ["^{3}F_{2}", "³F₂"]],
+)
+def test_parse_term_unicode(vals):
+    """Create plain terms with Unicode super- and subscripts."""
+    assert ut.parse_term(vals[0]).unicode == vals[1]
+
+
+def test_parse_term_cached():
+    """Return the cached term for repeated term symbols."""
+    assert ut.parse_term("3F2") is ut.parse_term("3F2")
+
+
 @pytest.mark.parametrize("vals", [["3F2", "$^{3}$F$_{2}$"], ["4G1", "$^{4}$G$_{1}$"]])
 def test_term_to_string(vals):
     """Check that the term symbols are converted correctly."""